@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+工具分类器基准测试
+在 1k / 10k / 100k 条合成命令行上对比逐关键词匹配的旧实现与编译后的单次扫描分类器
+
+用法: python3 benchmarks/bench_classifier.py [--mcp-ratio 0.1] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tool_catalog import TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS
+from tool_classifier import ToolClassifier
+
+SIZES = [1000, 10000, 100000]
+
+# 普通进程命令行样本
+OTHER_CMDLINES = [
+    '/sbin/init splash',
+    '/usr/lib/systemd/systemd-journald',
+    '/usr/bin/python3 -m http.server 8080 --bind 127.0.0.1',
+    '/bin/bash -c while true; do sleep 1; done',
+    '/opt/google/chrome/chrome --type=renderer --enable-features=NetworkService --lang=en-US',
+    '/usr/bin/dockerd -H fd:// --containerd=/run/containerd/containerd.sock',
+    'node /home/dev/project/node_modules/.bin/webpack --watch --mode development',
+    '/usr/lib/jvm/java-17/bin/java -Xmx4g -jar /opt/builds/gradle-daemon.jar',
+    'sshd: dev@pts/3',
+    'gcc -O2 -c src/module_42.c -o build/module_42.o',
+]
+
+# MCP进程命令行样本
+MCP_CMDLINES = [
+    'node /Users/dev/.npm/_npx/a1b2/node_modules/.bin/mcp-server-filesystem /Users/dev/projects',
+    'npx -y @modelcontextprotocol/server-github',
+    'node /Users/dev/.npm/_npx/c3d4/node_modules/@executeautomation/playwright-mcp-server/dist/index.js',
+    'node /usr/local/lib/node_modules/mcp-server-hotnews/build/index.js',
+    'npx -y @wonderwhy-er/desktop-commander',
+    'node /Users/dev/mcp-ai-tools/deepseek-server-proxy.js',
+    'node /Users/dev/mcp-ai-tools/gemini-server-proxy.js',
+    'node /Users/dev/mcp-ai-tools/image-generation-simple.js',
+]
+
+
+def legacy_detect(cmdline):
+    """旧版实现：逐个映射表键做子串匹配，再走手写的elif链"""
+    cmdline_lower = cmdline.lower()
+
+    for tool_key in TOOL_MAPPING:
+        if tool_key in cmdline_lower:
+            return tool_key
+
+    if 'github' in cmdline_lower:
+        return 'mcp-server-github'
+    elif 'playwright' in cmdline_lower:
+        return 'playwright-mcp-server'
+    elif 'filesystem' in cmdline_lower:
+        return 'mcp-server-filesystem'
+    elif 'hotnews' in cmdline_lower:
+        return 'mcp-server-hotnews'
+    elif 'deepseek-server-proxy' in cmdline_lower or ('ai-tools' in cmdline_lower and 'deepseek' in cmdline_lower):
+        return 'ai-tools-deepseek'
+    elif 'gemini-server-proxy' in cmdline_lower or 'ai-tools' in cmdline_lower:
+        return 'ai-tools-deepseek'
+
+    return 'unknown'
+
+
+def legacy_classify(cmdline):
+    """旧版扫描路径：关键词预筛选后再调用检测函数（两次扫描）"""
+    if any(keyword in cmdline.lower() for keyword in MCP_PROCESS_KEYWORDS):
+        return legacy_detect(cmdline)
+    return None
+
+
+def make_cmdlines(count, mcp_ratio, seed=42):
+    """生成合成命令行集合"""
+    rng = random.Random(seed)
+    cmdlines = []
+    for i in range(count):
+        if rng.random() < mcp_ratio:
+            base = rng.choice(MCP_CMDLINES)
+        else:
+            base = rng.choice(OTHER_CMDLINES)
+        cmdlines.append(f'{base} --instance={i}')
+    return cmdlines
+
+
+def time_run(func, cmdlines, repeat):
+    """取多次运行中的最短耗时"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for cmdline in cmdlines:
+            func(cmdline)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='工具分类器基准测试')
+    parser.add_argument('--mcp-ratio', type=float, default=0.1, help='MCP进程占比')
+    parser.add_argument('--repeat', type=int, default=3, help='每组重复次数')
+    args = parser.parse_args()
+
+    classifier = ToolClassifier(TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS)
+
+    print(f"📊 工具分类器基准测试 (MCP占比 {args.mcp_ratio:.0%}, 取 {args.repeat} 次最优)")
+    print(f"{'条数':>8} {'旧实现(ms)':>12} {'编译分类器(ms)':>16} {'加速比':>8}")
+
+    for size in SIZES:
+        cmdlines = make_cmdlines(size, args.mcp_ratio)
+
+        # 先校验结果一致，保证优先级顺序未变
+        for cmdline in cmdlines:
+            expected = legacy_classify(cmdline)
+            actual = classifier.classify(cmdline)
+            if expected != actual:
+                print(f"❌ 分类结果不一致: {cmdline!r} 旧={expected} 新={actual}")
+                sys.exit(1)
+
+        legacy_time = time_run(legacy_classify, cmdlines, args.repeat)
+        compiled_time = time_run(classifier.classify, cmdlines, args.repeat)
+        print(f"{size:>8} {legacy_time * 1000:>12.2f} {compiled_time * 1000:>16.2f} "
+              f"{legacy_time / compiled_time:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
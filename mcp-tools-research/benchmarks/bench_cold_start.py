@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+冷启动基准
+反复启动监控服务，测量从启动进程到第一次成功的 /api/health（端口可用）
+以及到第一个扫描快照发布（不再是预热快照）的时间，另测单独导入模块的耗时
+
+用法: python3 benchmarks/bench_cold_start.py [--runs 10] [--source synthetic:processes=20000]
+                                            [--output cold_start.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# 健康检查的轮询间隔和单次启动的等待上限（秒）
+POLL_INTERVAL = 0.005
+STARTUP_TIMEOUT = 60
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def fetch_health(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return json.loads(response.read())
+    except (OSError, ValueError):
+        return None
+
+
+def measure_startup(env):
+    """启动一次服务，返回 (到首次健康检查成功的秒数, 到首个扫描快照的秒数)"""
+    port = free_port()
+    env = dict(env, MCP_MONITOR_PORT=str(port))
+    url = f'http://127.0.0.1:{port}/api/health'
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, 'live_monitoring_app.py'], cwd=PROJECT_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first_health = first_scan = None
+    try:
+        while time.perf_counter() - started < STARTUP_TIMEOUT:
+            if server.poll() is not None:
+                raise SystemExit(f"❌ 服务启动失败（退出码 {server.returncode}）")
+            health = fetch_health(url)
+            if health is not None:
+                now = time.perf_counter() - started
+                if first_health is None:
+                    first_health = now
+                if health.get('snapshot_version', 0) > 0:
+                    first_scan = now
+                    break
+            time.sleep(POLL_INTERVAL)
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    if first_scan is None:
+        raise SystemExit("❌ 等待服务启动超时")
+    return first_health, first_scan
+
+
+def measure_import(env):
+    """单独导入模块的耗时（不启动服务）"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import live_monitoring_app'], cwd=PROJECT_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=STARTUP_TIMEOUT)
+    return time.perf_counter() - started
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'median_ms': round(statistics.median(values) * 1000, 1),
+        'min_ms': round(values[0] * 1000, 1),
+        'max_ms': round(values[-1] * 1000, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='冷启动基准')
+    parser.add_argument('--runs', type=int, default=10, help='启动次数')
+    parser.add_argument('--source', default='auto', help='进程数据源（MCP_MONITOR_PROCESS_SOURCE）')
+    parser.add_argument('--output', help='把结果保存为JSON')
+    args = parser.parse_args()
+
+    env = dict(os.environ, MCP_MONITOR_PROCESS_SOURCE=args.source, MCP_MONITOR_HISTORY_DB='off')
+    env.pop('MCP_MONITOR_WORKERS', None)
+
+    imports, healths, scans = [], [], []
+    for run in range(args.runs):
+        imports.append(measure_import(env))
+        first_health, first_scan = measure_startup(env)
+        healths.append(first_health)
+        scans.append(first_scan)
+        print(f"  第{run + 1}次: 导入 {imports[-1] * 1000:.0f}ms, 健康检查 {first_health * 1000:.0f}ms, "
+              f"首个快照 {first_scan * 1000:.0f}ms")
+
+    result = {
+        'tool': 'bench_cold_start',
+        'python': platform.python_version(),
+        'source': args.source,
+        'runs': args.runs,
+        'import': summarize(imports),
+        'first_health': summarize(healths),
+        'first_snapshot': summarize(scans)
+    }
+    print(f"\n📊 冷启动（{args.runs}次，数据源 {args.source}）")
+    for key, label in (('import', '导入模块'), ('first_health', '首次健康检查成功'), ('first_snapshot', '首个扫描快照')):
+        summary = result[key]
+        print(f"  {label:<12} 中位数 {summary['median_ms']:>8}ms  最小 {summary['min_ms']:>8}ms  "
+              f"最大 {summary['max_ms']:>8}ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+进程数据源基准测试
+对比psutil与 /proc 直读两种数据源下增量扫描器的单轮扫描耗时
+
+用法: python3 benchmarks/bench_process_sources.py [--ticks 20] [--spawn 500]
+  --spawn 额外启动N个空闲子进程来放大进程表
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from process_scanner import ProcessScanner
+from process_sources import PROCESS_SOURCES, ProcFSProcessSource
+from tool_catalog import TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS
+from tool_classifier import ToolClassifier
+
+
+def spawn_idle_processes(count):
+    """启动一批空闲子进程，其中约十分之一带MCP关键词"""
+    procs = []
+    for i in range(count):
+        tag = 'mcp-server-filesystem' if i % 10 == 0 else 'idle-worker'
+        procs.append(subprocess.Popen(
+            [sys.executable, '-c', 'import sys, time; time.sleep(3600)', tag],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+    return procs
+
+
+def bench_source(name, classifier, ticks):
+    """返回 (首轮耗时, 稳态每轮耗时列表, 进程数, MCP进程集合)"""
+    scanner = ProcessScanner(classifier.classify, PROCESS_SOURCES[name]())
+
+    start = time.perf_counter()
+    records = scanner.scan()
+    cold = time.perf_counter() - start
+
+    warm = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        records = scanner.scan()
+        warm.append(time.perf_counter() - start)
+
+    matched = {(r.pid, r.cmdline, r.tool_type) for r in records}
+    return cold, warm, scanner.cache_size(), matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description='进程数据源基准测试')
+    parser.add_argument('--ticks', type=int, default=20, help='稳态扫描轮数')
+    parser.add_argument('--spawn', type=int, default=0, help='额外启动的空闲进程数')
+    args = parser.parse_args()
+
+    classifier = ToolClassifier(TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS)
+    sources = [name for name in PROCESS_SOURCES
+               if name != 'procfs' or ProcFSProcessSource.available()]
+
+    spawned = spawn_idle_processes(args.spawn)
+    try:
+        if spawned:
+            time.sleep(1)  # 等待子进程完成exec
+
+        print(f"📊 进程数据源基准测试 ({args.ticks} 轮稳态扫描)")
+        print(f"{'数据源':>8} {'进程数':>8} {'MCP':>6} {'首轮(ms)':>10} {'稳态p50(ms)':>12} {'稳态max(ms)':>12}")
+        results = {}
+        for name in sources:
+            cold, warm, total, matched = bench_source(name, classifier, args.ticks)
+            results[name] = matched
+            print(f"{name:>8} {total:>8} {len(matched):>6} {cold * 1000:>10.2f} "
+                  f"{statistics.median(warm) * 1000:>12.2f} {max(warm) * 1000:>12.2f}")
+
+        # 校验各数据源识别出的MCP进程一致
+        baseline = results[sources[0]]
+        for name in sources[1:]:
+            if results[name] != baseline:
+                diff = results[name] ^ baseline
+                print(f"❌ {name} 与 {sources[0]} 的MCP进程不一致: {sorted(diff)[:5]}")
+                sys.exit(1)
+        print("✅ 各数据源识别出的MCP进程一致")
+    finally:
+        for proc in spawned:
+            proc.kill()
+        for proc in spawned:
+            proc.wait()
+
+
+if __name__ == '__main__':
+    main()
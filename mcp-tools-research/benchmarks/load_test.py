@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+监控API压测
+以合成进程数据源启动监控服务（或直接压测已运行的服务），用N个并发keep-alive客户端
+轮流请求各接口，报告每个接口的吞吐和 p50/p90/p99 延迟，并把结果保存为JSON便于跨版本对比
+
+用法:
+  python3 benchmarks/load_test.py [--clients 50] [--duration 10] [--processes 2000] [--mcp-ratio 0.02] [--churn 0]
+                                  [--workers 1] [--conditional] [--gzip] [--think 0]
+                                  [--output results.json] [--compare baseline.json]
+  python3 benchmarks/load_test.py --url http://localhost:5002   # 压测已运行的服务
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import Counter
+from datetime import datetime
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, PROJECT_DIR)
+
+from health_prober import KeepAliveConnection
+
+DEFAULT_ENDPOINTS = ('/api/running-tools', '/api/tools-overview')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+# 等待被测服务启动并发布第一个快照的时长（秒）
+STARTUP_TIMEOUT = 30
+
+
+class EndpointStats:
+    __slots__ = ('latencies', 'statuses', 'bytes', 'errors')
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.bytes = 0
+        self.errors = 0
+
+    def record(self, seconds, status, size):
+        self.latencies.append(seconds)
+        self.statuses[status] += 1
+        self.bytes += size
+
+
+def percentile(sorted_values, q):
+    """最近秩分位数"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(stats, duration):
+    latencies = sorted(stats.latencies)
+    requests = len(latencies)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        'requests': requests,
+        'errors': stats.errors,
+        'throughput_rps': round(requests / duration, 1),
+        'p50_ms': ms(percentile(latencies, 0.5)),
+        'p90_ms': ms(percentile(latencies, 0.9)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'max_ms': ms(latencies[-1]) if latencies else None,
+        'avg_bytes': round(stats.bytes / requests) if requests else None,
+        'status': {str(status): count for status, count in sorted(stats.statuses.items())}
+    }
+
+
+async def run_client(base_url, endpoints, offset, measure_from, stop_at, stats, options):
+    """一个模拟的仪表盘：在一条keep-alive连接上轮流请求各接口"""
+    connection = KeepAliveConnection(base_url)
+    etags = {}
+    index = offset
+    try:
+        while time.monotonic() < stop_at:
+            path = endpoints[index % len(endpoints)]
+            index += 1
+            headers = {}
+            if options.gzip:
+                headers['Accept-Encoding'] = 'gzip'
+            if options.conditional and path in etags:
+                headers['If-None-Match'] = etags[path]
+
+            started = time.monotonic()
+            try:
+                status, response_headers, body = await connection.get(path, headers)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                connection.close()
+                if started >= measure_from:
+                    stats[path].errors += 1
+                await asyncio.sleep(0.01)
+                continue
+            if started >= measure_from:
+                stats[path].record(time.monotonic() - started, status, len(body))
+            if 'etag' in response_headers:
+                etags[path] = response_headers['etag']
+            if options.think:
+                await asyncio.sleep(options.think)
+    finally:
+        connection.close()
+
+
+async def drive(base_url, options):
+    endpoints = list(options.endpoints)
+    stats = {path: EndpointStats() for path in endpoints}
+    now = time.monotonic()
+    measure_from = now + options.warmup
+    stop_at = measure_from + options.duration
+    await asyncio.gather(*(
+        run_client(base_url, endpoints, client, measure_from, stop_at, stats, options)
+        for client in range(options.clients)
+    ))
+    return stats
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def fetch_json(url, timeout=2):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def start_server(options):
+    """以合成进程数据源启动被测服务，等到第一个快照发布后返回 (进程, 地址)"""
+    port = free_port()
+    env = dict(os.environ,
+               MCP_MONITOR_PORT=str(port),
+               MCP_MONITOR_PROCESS_SOURCE=f'synthetic:processes={options.processes},'
+                                          f'mcp_ratio={options.mcp_ratio},churn={options.churn}',
+               MCP_MONITOR_HISTORY_DB='off',
+               MCP_MONITOR_WORKERS=str(options.workers))
+    server = subprocess.Popen([sys.executable, 'live_monitoring_app.py'], cwd=PROJECT_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"❌ 被测服务启动失败（退出码 {server.returncode}）")
+        try:
+            if fetch_json(base_url + '/api/health')['snapshot_version'] > 0:
+                return server, base_url
+        except (OSError, ValueError, KeyError):
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("❌ 等待被测服务启动超时")
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def server_info(base_url):
+    """被测服务一侧的状态：快照版本、扫描耗时"""
+    info = {}
+    try:
+        health = fetch_json(base_url + '/api/health')
+        info['snapshot_version'] = health.get('snapshot_version')
+        info['running_tools'] = health.get('running_tools')
+        info['role'] = health.get('role')
+        perf = fetch_json(base_url + '/api/internal/perf')
+        tick = perf['phases']['tick']
+        info['scan_tick_p50_ms'] = tick['p50_ms']
+        info['scan_tick_p99_ms'] = tick['p99_ms']
+        info['processes_visited'] = perf['processes']['last']['visited']
+    except (OSError, ValueError, KeyError):
+        pass
+    return info
+
+
+def print_report(result, baseline=None):
+    print(f"\n📊 {result['config']['clients']} 个并发客户端，{result['config']['duration']} 秒")
+    print(f"{'接口':<24} {'请求数':>8} {'错误':>6} {'吞吐(rps)':>10} {'p50(ms)':>9} {'p90(ms)':>9} "
+          f"{'p99(ms)':>9} {'max(ms)':>9}")
+    for path, summary in result['endpoints'].items():
+        print(f"{path:<24} {summary['requests']:>8} {summary['errors']:>6} {summary['throughput_rps']:>10} "
+              f"{summary['p50_ms'] or '-':>9} {summary['p90_ms'] or '-':>9} {summary['p99_ms'] or '-':>9} "
+              f"{summary['max_ms'] or '-':>9}")
+    total = result['total']
+    print(f"{'合计':<24} {total['requests']:>8} {total['errors']:>6} {total['throughput_rps']:>10}")
+    if result.get('server'):
+        print(f"🖥️ 服务端: {result['server']}")
+
+    if baseline is not None:
+        print(f"\n📈 与基准 {baseline.get('git_commit')} ({baseline.get('timestamp')}) 对比")
+        for path, summary in result['endpoints'].items():
+            old = baseline.get('endpoints', {}).get(path)
+            if not old:
+                continue
+
+            def change(new, previous):
+                if not new or not previous:
+                    return '-'
+                return f'{(new - previous) / previous * 100:+.1f}%'
+
+            print(f"{path:<24} 吞吐 {change(summary['throughput_rps'], old['throughput_rps']):>8}  "
+                  f"p50 {change(summary['p50_ms'], old['p50_ms']):>8}  p99 {change(summary['p99_ms'], old['p99_ms']):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='监控API压测')
+    parser.add_argument('--url', help='压测已运行的服务，不启动新服务')
+    parser.add_argument('--clients', type=int, default=50, help='并发keep-alive客户端数')
+    parser.add_argument('--duration', type=float, default=10, help='计入统计的压测时长（秒）')
+    parser.add_argument('--warmup', type=float, default=2, help='预热时长（秒），不计入统计')
+    parser.add_argument('--endpoints', nargs='+', default=list(DEFAULT_ENDPOINTS), help='轮流请求的接口路径')
+    parser.add_argument('--processes', type=int, default=2000, help='合成进程表规模')
+    parser.add_argument('--mcp-ratio', type=float, default=0.02, help='合成进程表中MCP进程的占比')
+    parser.add_argument('--churn', type=float, default=0.0, help='合成进程表每轮的进程更替率')
+    parser.add_argument('--workers', type=int, default=1, help='被测服务的工作进程数（MCP_MONITOR_WORKERS）')
+    parser.add_argument('--conditional', action='store_true', help='带 If-None-Match 请求（模拟仪表盘的304轮询）')
+    parser.add_argument('--gzip', action='store_true', help='带 Accept-Encoding: gzip 请求')
+    parser.add_argument('--think', type=float, default=0, help='每个客户端两次请求之间的等待（秒）')
+    parser.add_argument('--output', help='结果JSON路径（默认 benchmarks/results/load_test-<时间>.json）')
+    parser.add_argument('--compare', help='与之前保存的结果JSON对比')
+    options = parser.parse_args()
+
+    server = None
+    if options.url:
+        base_url = options.url.rstrip('/')
+    else:
+        server, base_url = start_server(options)
+        print(f"🚀 被测服务: {base_url}（合成进程表 {options.processes} 个进程，"
+              f"MCP占比 {options.mcp_ratio}，{options.workers} 个工作进程）")
+
+    try:
+        stats = asyncio.run(drive(base_url, options))
+        info = server_info(base_url)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    endpoints = {path: summarize(endpoint_stats, options.duration) for path, endpoint_stats in stats.items()}
+    total_requests = sum(summary['requests'] for summary in endpoints.values())
+    result = {
+        'tool': 'load_test',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {
+            'url': options.url,
+            'clients': options.clients,
+            'duration': options.duration,
+            'warmup': options.warmup,
+            'endpoints': options.endpoints,
+            'processes': None if options.url else options.processes,
+            'mcp_ratio': None if options.url else options.mcp_ratio,
+            'churn': None if options.url else options.churn,
+            'workers': None if options.url else options.workers,
+            'conditional': options.conditional,
+            'gzip': options.gzip,
+            'think': options.think
+        },
+        'server': info,
+        'endpoints': endpoints,
+        'total': {
+            'requests': total_requests,
+            'errors': sum(summary['errors'] for summary in endpoints.values()),
+            'throughput_rps': round(total_requests / options.duration, 1)
+        }
+    }
+
+    baseline = None
+    if options.compare:
+        with open(options.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    output = options.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"load_test-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"💾 结果已保存: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+进程扫描微基准（pytest-benchmark）
+在 1k/10k/100k 进程的合成进程表上分别测量一轮扫描、命令行分类、按工具类型聚合的耗时，
+并用 tracemalloc 记录每轮的内存分配（峰值和扫描后仍保留的字节数，写入 extra_info）
+
+用法:
+  python3 -m pytest benchmarks/test_scan_benchmarks.py --benchmark-only
+  python3 -m pytest benchmarks/test_scan_benchmarks.py --benchmark-autosave        # 保存结果
+  python3 -m pytest benchmarks/test_scan_benchmarks.py --benchmark-compare          # 与上次保存的结果对比
+  MCP_BENCH_SIZES=1000,10000 python3 -m pytest benchmarks/test_scan_benchmarks.py  # 只测部分规模
+"""
+
+import os
+import sys
+import tracemalloc
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from process_scanner import ProcessScanner
+from running_tools import aggregate_units
+from synthetic_source import SyntheticProcessSource
+from tool_catalog import TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS
+from tool_classifier import ToolClassifier
+
+SIZES = [int(size) for size in os.environ.get('MCP_BENCH_SIZES', '1000,10000,100000').split(',')]
+# 合成进程表的MCP服务占比和每轮进程更替率
+MCP_RATIO = 0.02
+CHURN = 0.01
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return ToolClassifier(TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS)
+
+
+@pytest.fixture(scope='module', params=SIZES, ids=lambda size: f'{size // 1000}k')
+def warm_scanner(request, classifier):
+    """已完成首轮扫描（缓存已填满）的扫描器，之后每轮只有更替的进程需要重新分类"""
+    source = SyntheticProcessSource(processes=request.param, mcp_ratio=MCP_RATIO, churn=CHURN, seed=request.param)
+    scanner = ProcessScanner(classifier.classify, source)
+    scanner.scan()
+    return scanner
+
+
+def record_allocations(benchmark, fn):
+    """在 tracemalloc 下单独运行一次（不计入计时），把分配峰值和保留字节数写入 extra_info"""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info['alloc_peak_kb'] = round((peak - before) / 1024, 1)
+    benchmark.extra_info['alloc_retained_kb'] = round((after - before) / 1024, 1)
+
+
+@pytest.mark.benchmark(group='scan')
+def test_scan_tick(benchmark, warm_scanner):
+    """稳态一轮扫描：遍历进程表、分类新进程、刷新MCP进程资源占用、构建进程树"""
+    record_allocations(benchmark, warm_scanner.scan)
+    records = benchmark(warm_scanner.scan)
+    benchmark.extra_info['processes'] = warm_scanner.last_scan['visited']
+    benchmark.extra_info['classified'] = warm_scanner.last_scan['classified']
+    benchmark.extra_info['matched'] = len(records)
+    assert records
+
+
+@pytest.mark.benchmark(group='classify')
+def test_classify_table(benchmark, warm_scanner, classifier):
+    """对整张进程表的命令行分类（冷启动首轮扫描的主要开销）"""
+    source = warm_scanner.source
+    cmdlines = [source.read_cmdline(pid) for pid, _ in source.iter_processes()]
+
+    def classify_all():
+        return sum(1 for cmdline in cmdlines if classifier.classify(cmdline) is not None)
+
+    record_allocations(benchmark, classify_all)
+    matched = benchmark(classify_all)
+    benchmark.extra_info['processes'] = len(cmdlines)
+    assert matched == source.mcp_count()
+
+
+@pytest.mark.benchmark(group='aggregate')
+def test_aggregate_units(benchmark, warm_scanner):
+    """把本轮的服务单元按工具类型聚合为API返回的工具列表"""
+    units = warm_scanner.units()
+    record_allocations(benchmark, lambda: aggregate_units(units))
+    tools = benchmark(aggregate_units, units)
+    benchmark.extra_info['units'] = len(units)
+    assert sum(tool['instance_count'] for tool in tools) == len(units)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+配置文件变化监听
+Linux上通过inotify（ctypes调用libc）监听配置文件所在的目录，其他平台或inotify不可用时
+按 (inode, 大小, mtime) 签名轮询。监听目录而不是文件本身，才能同时覆盖
+cp 的原地覆盖写（IN_CLOSE_WRITE）和先写临时文件再 rename 的原子替换（IN_MOVED_TO）；
+无论哪种通知，最终都以签名是否变化为准，只在文件真正变化时回调
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# 不关心 IN_MODIFY：cp 写入过程中会产生多次，等 IN_CLOSE_WRITE 时内容才完整
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE
+              | IN_ATTRIB | IN_DELETE_SELF | IN_MOVE_SELF)
+
+INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+
+# inotify模式下仍定期校验签名的间隔（秒），兜住目录被删除重建等监听失效的情况
+VERIFY_INTERVAL = 30.0
+# 轮询模式的间隔（秒）
+POLL_INTERVAL = 2.0
+# 收到通知后稍等片刻，合并同一次写入产生的多个事件
+SETTLE_DELAY = 0.05
+
+
+def file_signature(path):
+    """文件签名 (inode, 大小, mtime纳秒)，文件不存在时返回None"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def parse_inotify_events(data):
+    """解析inotify读出的数据，返回 [(mask, 文件名), ...]"""
+    events = []
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(data):
+        _, mask, _, name_len = INOTIFY_EVENT.unpack_from(data, offset)
+        start = offset + INOTIFY_EVENT.size
+        name = data[start:start + name_len].split(b'\0', 1)[0].decode('utf-8', 'surrogateescape')
+        events.append((mask, name))
+        offset = start + name_len
+    return events
+
+
+class Inotify:
+    """最小化的inotify封装"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.fd = fd
+
+    def add_watch(self, path, mask):
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read(self):
+        try:
+            return parse_inotify_events(os.read(self.fd, 65536))
+        except BlockingIOError:
+            return []
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class ConfigWatcher:
+    def __init__(self, path, on_change, poll_interval=POLL_INTERVAL):
+        # on_change(版本号) 在监听线程中调用，文件签名变化时才会调用
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.mode = None
+        self.error = None
+        self.version = 0
+        self.signature = file_signature(self.path)
+        self._inotify = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动监听线程，返回实际使用的模式（inotify / polling）"""
+        if self._thread is not None:
+            return self.mode
+        try:
+            self._inotify = self._open_inotify()
+            self.mode = 'inotify'
+        except (OSError, AttributeError) as e:
+            # 非Linux平台、libc不支持或配置目录尚不存在
+            self.error = f'inotify不可用，改为轮询: {e}'
+            self.mode = 'polling'
+        self._thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+        self._thread.start()
+        return self.mode
+
+    def _open_inotify(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError('仅Linux支持inotify')
+        inotify = Inotify()
+        try:
+            inotify.add_watch(os.path.dirname(self.path), WATCH_MASK)
+        except OSError:
+            inotify.close()
+            raise
+        return inotify
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self):
+        """比较文件签名，变化时更新版本号并回调；返回是否变化"""
+        signature = file_signature(self.path)
+        if signature == self.signature:
+            return False
+        self.signature = signature
+        self.version += 1
+        try:
+            self.on_change(self.version)
+        except Exception as e:
+            print(f"处理配置变化失败: {e}")
+        return True
+
+    def _run(self):
+        try:
+            if self._inotify is not None:
+                self._run_inotify()
+            else:
+                while not self._stop.wait(self.poll_interval):
+                    self.check()
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+
+    def _run_inotify(self):
+        name = os.path.basename(self.path)
+        inotify = self._inotify
+        while not self._stop.is_set():
+            ready, _, _ = select.select([inotify.fd], [], [], VERIFY_INTERVAL)
+            if not ready:
+                self.check()
+                continue
+
+            relevant = False
+            watch_lost = False
+            for mask, event_name in inotify.read():
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    watch_lost = True
+                elif event_name == name:
+                    relevant = True
+
+            if watch_lost:
+                # 配置目录本身被删除或移走，inotify无法继续，退回轮询
+                self.mode = 'polling'
+                self.error = '配置目录监听失效，改为轮询'
+                while not self._stop.wait(self.poll_interval):
+                    self.check()
+                return
+            if relevant:
+                self._stop.wait(SETTLE_DELAY)
+                # 清空等待期间积累的事件，一次检查即可
+                inotify.read()
+                self.check()
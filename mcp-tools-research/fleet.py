@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+多主机汇总：agent / collector 模式
+agent 只运行扫描器，把本机快照相对上次已确认版本的增量批量、压缩后上传到 collector；
+collector 合并各主机的状态（条目带 host 字段），通过同样的 /api/* 接口对外提供。
+collector 重启或丢失某台主机的基准版本时返回409，agent 随即上传完整状态重新同步
+"""
+
+import gzip
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+
+from snapshot_delta import HOST_KEY, apply_delta, diff_tools
+from status_snapshot import serialize_payload
+
+INGEST_PATH = '/api/fleet/ingest'
+# 合并这段时间内的多个快照为一次上传（秒）
+BATCH_WINDOW = 1.0
+# 没有变化时也定期上传，collector据此判断主机在线（秒）
+HEARTBEAT_INTERVAL = 15.0
+# 上传失败后的重试退避上限（秒）
+MAX_RETRY_BACKOFF = 30.0
+UPLOAD_TIMEOUT = 10.0
+# 超过该时长没有上传的主机标记为离线，其工具不再计入汇总（秒）
+HOST_STALE_AFTER = 60.0
+# 离线超过该时长的主机从collector中移除（秒）
+HOST_EXPIRE_AFTER = 600.0
+# 解压后的上传内容上限
+MAX_BATCH_SIZE = 8 * 1024 * 1024
+
+
+class ResyncRequired(Exception):
+    """collector没有该主机的基准版本，需要上传完整状态"""
+
+
+def encode_batch(payload):
+    """序列化并gzip压缩一次上传"""
+    return gzip.compress(serialize_payload(payload), compresslevel=6, mtime=0)
+
+
+def decode_batch(body, content_encoding=None):
+    """解压并解析上传内容，解压后超过 MAX_BATCH_SIZE 时抛出 ValueError"""
+    if content_encoding == 'gzip':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        body = decompressor.decompress(body, MAX_BATCH_SIZE)
+        if decompressor.unconsumed_tail:
+            raise ValueError('上传内容过大')
+    elif len(body) > MAX_BATCH_SIZE:
+        raise ValueError('上传内容过大')
+    return json.loads(body)
+
+
+class FleetAgent:
+    """把本机快照的增量上传到collector（独立线程）"""
+
+    def __init__(self, publisher, collector_url, host, token=None,
+                 batch_window=BATCH_WINDOW, heartbeat=HEARTBEAT_INTERVAL):
+        self.publisher = publisher
+        self.url = collector_url.rstrip('/') + INGEST_PATH
+        self.host = host
+        self.token = token
+        self.batch_window = batch_window
+        self.heartbeat = heartbeat
+        # collector已确认的基准：版本号和对应的状态；None表示需要完整上传
+        self.acked = None
+        self.uploads = 0
+        self.bytes_sent = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='fleet-agent', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def build_batch(self, snapshot):
+        """相对已确认基准构造一次上传；没有基准时上传完整状态"""
+        payload = {
+            'host': self.host,
+            'epoch': snapshot.epoch,
+            'version': snapshot.version,
+            'last_update': snapshot.last_update,
+            'current_scenario': snapshot.current_scenario,
+            'sent_at': time.time()
+        }
+        acked = self.acked
+        if acked is None or acked['epoch'] != snapshot.epoch:
+            payload['full'] = True
+            payload['running_tools'] = list(snapshot.running_tools)
+            payload['configured_tools'] = list(snapshot.configured_tools)
+            return payload
+
+        payload['full'] = False
+        payload['base_version'] = acked['version']
+        payload['running_delta'] = diff_tools(acked['running_tools'], snapshot.running_tools)
+        # 配置的工具很少变化，变化时整体上传
+        if snapshot.configured_tools != acked['configured_tools']:
+            payload['configured_tools'] = list(snapshot.configured_tools)
+        return payload
+
+    def upload(self, snapshot):
+        """上传一次；成功后把该快照记为新的基准"""
+        payload = self.build_batch(snapshot)
+        body = encode_batch(payload)
+        request = urllib.request.Request(self.url, data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip'
+        })
+        if self.token:
+            request.add_header('Authorization', f'Bearer {self.token}')
+        try:
+            with urllib.request.urlopen(request, timeout=UPLOAD_TIMEOUT) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                self.acked = None
+                raise ResyncRequired(self.host)
+            raise
+
+        self.uploads += 1
+        self.bytes_sent += len(body)
+        self.acked = {
+            'epoch': snapshot.epoch,
+            'version': snapshot.version,
+            'running_tools': snapshot.running_tools,
+            'configured_tools': snapshot.configured_tools
+        }
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            sent_version = self.acked['version'] if self.acked is not None else -1
+            # 等待新快照；超时也上传一次作为心跳
+            if self.publisher.wait_for_newer(sent_version, self.heartbeat) is not None:
+                # 合并批处理窗口内陆续发布的快照
+                self._stop.wait(self.batch_window)
+            try:
+                self.upload(self.publisher.current)
+                self.last_error = None
+                backoff = 1.0
+            except ResyncRequired:
+                # 立即进行完整上传
+                continue
+            except (OSError, urllib.error.URLError) as e:
+                # collector不可用：保留已确认的基准，恢复后从基准继续上传增量
+                self.last_error = str(e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_RETRY_BACKOFF)
+
+    def stats(self):
+        return {
+            'collector': self.url,
+            'host': self.host,
+            'acked_version': self.acked['version'] if self.acked is not None else None,
+            'uploads': self.uploads,
+            'bytes_sent': self.bytes_sent,
+            'last_error': self.last_error
+        }
+
+
+class HostState:
+    __slots__ = ('host', 'epoch', 'version', 'running_tools', 'configured_tools',
+                 'current_scenario', 'last_update', 'last_seen')
+
+    def __init__(self, host, epoch):
+        self.host = host
+        self.epoch = epoch
+        self.version = None
+        self.running_tools = []
+        self.configured_tools = []
+        self.current_scenario = 'unknown'
+        self.last_update = None
+        self.last_seen = None
+
+
+class FleetCollector:
+    """合并各主机上传的状态，变化后回调 on_update(collector)"""
+
+    def __init__(self, on_update=None, stale_after=HOST_STALE_AFTER, expire_after=HOST_EXPIRE_AFTER,
+                 clock=time.time):
+        self.on_update = on_update
+        self.stale_after = stale_after
+        self.expire_after = expire_after
+        self.clock = clock
+        self.batches = 0
+        self.resyncs = 0
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, batch):
+        """应用一次上传；缺少基准时抛出 ResyncRequired"""
+        host = batch['host']
+        with self._lock:
+            state = self._hosts.get(host)
+            if batch.get('full'):
+                state = HostState(host, batch['epoch'])
+                state.running_tools = list(batch['running_tools'])
+                state.configured_tools = list(batch['configured_tools'])
+            elif state is None or state.epoch != batch['epoch'] or state.version != batch['base_version']:
+                self.resyncs += 1
+                raise ResyncRequired(host)
+            else:
+                state.running_tools = apply_delta(state.running_tools, batch['running_delta'])
+                if 'configured_tools' in batch:
+                    state.configured_tools = list(batch['configured_tools'])
+
+            state.version = batch['version']
+            state.current_scenario = batch.get('current_scenario', 'unknown')
+            state.last_update = batch.get('last_update')
+            state.last_seen = self.clock()
+            self._hosts[host] = state
+            self.batches += 1
+
+        if self.on_update is not None:
+            self.on_update(self)
+        return state.version
+
+    def expire_hosts(self):
+        """移除长时间离线的主机，返回是否有主机被移除"""
+        now = self.clock()
+        with self._lock:
+            expired = [host for host, state in self._hosts.items() if now - state.last_seen > self.expire_after]
+            for host in expired:
+                del self._hosts[host]
+        return bool(expired)
+
+    def merged(self):
+        """在线主机的 (运行工具, 配置工具)，每个条目附带 host 字段"""
+        now = self.clock()
+        running = []
+        configured = []
+        with self._lock:
+            for host in sorted(self._hosts):
+                state = self._hosts[host]
+                if now - state.last_seen > self.stale_after:
+                    continue
+                running.extend(dict(tool, **{HOST_KEY: host}) for tool in state.running_tools)
+                configured.extend(dict(tool, **{HOST_KEY: host}) for tool in state.configured_tools)
+        return running, configured
+
+    def hosts(self):
+        now = self.clock()
+        with self._lock:
+            return [{
+                'host': state.host,
+                'online': now - state.last_seen <= self.stale_after,
+                'last_seen': state.last_seen,
+                'last_update': state.last_update,
+                'version': state.version,
+                'current_scenario': state.current_scenario,
+                'running_tools': len(state.running_tools),
+                'configured_tools': len(state.configured_tools)
+            } for state in sorted(self._hosts.values(), key=lambda state: state.host)]
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+AI服务健康探测
+独立线程中运行一个asyncio事件循环，按各自的周期并发探测每个 health_endpoint：
+每个服务复用一条keep-alive连接，连续失败时指数退避，记录延迟直方图。
+扫描线程只读取最近一次的探测结果，不会被挂起的服务阻塞
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from histogram import LatencyHistogram
+
+# 正常服务的探测周期（秒）
+PROBE_INTERVAL = 5.0
+# 单次探测超时（秒）
+PROBE_TIMEOUT = 3.0
+# 连续失败时退避的上限（秒）
+MAX_BACKOFF = 60.0
+# 健康检查响应体上限，超出部分不解析
+MAX_BODY_SIZE = 64 * 1024
+
+
+class ProbeError(Exception):
+    """探测失败，status为对外展示的状态"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class KeepAliveConnection:
+    """到单个 host:port 的HTTP/1.1长连接，只支持GET请求（健康探测和压测客户端使用）"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.use_ssl = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.use_ssl else 80)
+        self.path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        self.host_header = parts.netloc
+        self._reader = None
+        self._writer = None
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def get(self, path=None, headers=None):
+        """
+        发送一次GET请求（默认请求构造时URL的路径），返回 (状态码, 响应头, 响应体)；
+        复用的连接已被对端关闭时重连一次
+        """
+        reused = self._writer is not None
+        try:
+            return await self._request(path, headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused:
+                raise
+        return await self._request(path, headers)
+
+    async def _request(self, path=None, extra_headers=None):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.use_ssl or None)
+
+        request = (f'GET {path or self.path} HTTP/1.1\r\nHost: {self.host_header}\r\n'
+                   f'Accept: application/json\r\nConnection: keep-alive\r\n')
+        for name, value in (extra_headers or {}).items():
+            request += f'{name}: {value}\r\n'
+        self._writer.write((request + '\r\n').encode('latin-1'))
+        await self._writer.drain()
+
+        reader = self._reader
+        status_line = await reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if status in (204, 304) or 100 <= status < 200:
+            # 这些响应没有响应体
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = await self._read_chunked()
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            # 没有长度信息只能读到连接关闭
+            body = await reader.read(MAX_BODY_SIZE)
+            headers['connection'] = 'close'
+
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, headers, body
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self._reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            if size == 0:
+                # 跳过trailer
+                while await self._reader.readuntil(b'\r\n') != b'\r\n':
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self._reader.readexactly(size))
+            await self._reader.readexactly(2)
+
+
+class ServiceProbe:
+    """单个服务的探测状态"""
+
+    def __init__(self, tool_type, url, interval, timeout, max_backoff):
+        self.tool_type = tool_type
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.connection = KeepAliveConnection(url)
+        self.histogram = LatencyHistogram()
+        self.failures = 0
+        self.next_delay = 0.0
+        self.last_probe = None
+        self.result = {
+            'status': 'unknown',
+            'available': False,
+            'error': '尚未完成探测'
+        }
+
+    async def probe(self):
+        """探测一次并更新结果，返回距下次探测的秒数"""
+        started = time.perf_counter()
+        try:
+            status, headers, body = await asyncio.wait_for(self.connection.get(), self.timeout)
+            elapsed = time.perf_counter() - started
+            self.histogram.observe(elapsed)
+            if status == 200:
+                self.result = {
+                    'status': 'running',
+                    'available': True,
+                    'response_time': round(elapsed, 4),
+                    'server_info': parse_server_info(headers, body)
+                }
+            else:
+                raise ProbeError('error', f'HTTP {status}')
+        except asyncio.TimeoutError:
+            self.connection.close()
+            self._fail('timeout', 'Service timeout')
+        except ProbeError as e:
+            self._fail(e.status, str(e))
+        except (ConnectionRefusedError, OSError):
+            self.connection.close()
+            self._fail('stopped', 'Connection refused - service not running')
+        except Exception as e:
+            self.connection.close()
+            self._fail('error', str(e))
+        else:
+            self.failures = 0
+        self.last_probe = time.time()
+
+        if self.failures == 0:
+            self.next_delay = self.interval
+        else:
+            # 指数退避并加入抖动，避免多个服务同时重试
+            backoff = min(self.interval * 2 ** (self.failures - 1), self.max_backoff)
+            self.next_delay = backoff * random.uniform(0.8, 1.0)
+        return self.next_delay
+
+    def _fail(self, status, message):
+        self.failures += 1
+        self.result = {'status': status, 'available': False, 'error': message}
+
+    def stats(self):
+        return {
+            'url': self.url,
+            'consecutive_failures': self.failures,
+            'next_probe_in': round(self.next_delay, 2),
+            'last_probe': self.last_probe,
+            'latency': self.histogram.summary()
+        }
+
+
+def parse_server_info(headers, body):
+    if headers.get('content-type', '').startswith('application/json'):
+        try:
+            return json.loads(body)
+        except ValueError:
+            pass
+    return {'message': 'Health check passed'}
+
+
+def catalog_health_endpoints(catalog):
+    """从工具映射表中取出所有配置了 health_endpoint 的工具"""
+    return {
+        tool_type: info['health_endpoint']
+        for tool_type, info in catalog.items()
+        if info.get('health_endpoint')
+    }
+
+
+class HealthProber:
+    def __init__(self, endpoints, interval=PROBE_INTERVAL, timeout=PROBE_TIMEOUT, max_backoff=MAX_BACKOFF):
+        # endpoints: {工具类型: 健康检查URL}
+        self.probes = {
+            tool_type: ServiceProbe(tool_type, url, interval, timeout, max_backoff)
+            for tool_type, url in endpoints.items()
+        }
+        self._loop = None
+        self._thread = None
+
+    def start(self):
+        """在后台线程中启动事件循环，重复调用无效"""
+        if self._thread is not None or not self.probes:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _run(self):
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+        for probe in self.probes.values():
+            loop.create_task(self._probe_forever(probe))
+        try:
+            loop.run_forever()
+        finally:
+            for probe in self.probes.values():
+                probe.connection.close()
+
+    async def _probe_forever(self, probe):
+        while True:
+            delay = await probe.probe()
+            await asyncio.sleep(delay)
+
+    def results(self):
+        """{工具类型: 最近一次探测结果}，结果字典发布后不再修改"""
+        return {tool_type: probe.result for tool_type, probe in self.probes.items()}
+
+    def stats(self):
+        return {tool_type: probe.stats() for tool_type, probe in self.probes.items()}
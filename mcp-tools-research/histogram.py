@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+固定分桶的耗时直方图
+桶边界按 1-2.5-5 递增，观测一次只做一次二分查找和两次加法；
+分位数按桶线性插值估算，精度足够用于监控展示
+"""
+
+from array import array
+from bisect import bisect_left
+
+# 桶上界（秒），最后一个桶收集超出上界的观测值
+DEFAULT_BOUNDS = (
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0
+)
+
+
+class LatencyHistogram:
+    """累计耗时直方图（单位秒），单线程写入，读取时容忍轻微的不一致"""
+
+    __slots__ = ('bounds', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, bounds=DEFAULT_BOUNDS):
+        self.bounds = tuple(bounds)
+        self.counts = array('Q', bytes(8 * (len(self.bounds) + 1)))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """估算分位数（秒），没有观测值时返回None"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                fraction = (rank - seen) / bucket_count
+                return min(lower + (upper - lower) * fraction, self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self):
+        """JSON友好的统计摘要（毫秒）"""
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            'count': self.count,
+            'avg_ms': ms(self.total / self.count) if self.count else None,
+            'p50_ms': ms(self.quantile(0.5)),
+            'p90_ms': ms(self.quantile(0.9)),
+            'p95_ms': ms(self.quantile(0.95)),
+            'p99_ms': ms(self.quantile(0.99)),
+            'max_ms': ms(self.max) if self.count else None
+        }
+
+    def buckets(self):
+        """[(桶上界, 累计计数), ...]，最后一个上界为 inf"""
+        result = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds + (float('inf'),), self.counts):
+            cumulative += bucket_count
+            result.append((bound, cumulative))
+        return result
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+持久化资源历史（SQLite，WAL模式）
+扫描线程只把每轮的采样整理成元组放入队列，后台写入线程把积累的多轮合并到一个事务中写入：
+- samples: 每个服务单元的原始采样，只保留较短时间
+- rollup_1m / rollup_1h: 每个工具按分钟、小时聚合的 min/avg/max，写入时直接累加，长期保留
+- lifecycle: 每个服务单元的启动、退出时间和内存峰值，服务重启后仍可查到工具何时启动、退出、增长
+长时间窗口的查询只读聚合表，数据量与保留时长无关
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# 原始采样保留时长（秒）
+RAW_RETENTION = 6 * 3600
+# 分钟聚合保留时长（秒）
+MINUTE_RETENTION = 14 * 24 * 3600
+# 小时聚合保留时长（秒），同时是生命周期记录的保留时长
+HOUR_RETENTION = 365 * 24 * 3600
+# 进程集合不变时两次采样的最小间隔（秒）
+SAMPLE_INTERVAL = 10.0
+# 写入线程合并批次的等待时间（秒）
+FLUSH_INTERVAL = 2.0
+# 清理过期数据的间隔（秒）
+PRUNE_INTERVAL = 600.0
+# 写入线程落后太多（如磁盘卡住）时丢弃新的采样，不让扫描线程等待
+MAX_PENDING_TICKS = 1000
+
+METRICS = ('rss_mb', 'cpu_percent', 'instance_count')
+ROLLUPS = (('rollup_1m', 60), ('rollup_1h', 3600))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    ts REAL NOT NULL,
+    tool TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    create_time REAL NOT NULL,
+    rss_mb REAL NOT NULL,
+    cpu_percent REAL NOT NULL,
+    process_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts);
+CREATE INDEX IF NOT EXISTS samples_pid ON samples (pid, ts);
+
+CREATE TABLE IF NOT EXISTS lifecycle (
+    pid INTEGER NOT NULL,
+    create_time REAL NOT NULL,
+    tool TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    exited_at REAL,
+    peak_rss_mb REAL NOT NULL,
+    PRIMARY KEY (pid, create_time)
+);
+CREATE INDEX IF NOT EXISTS lifecycle_tool ON lifecycle (tool, last_seen);
+"""
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    tool TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    rss_min REAL NOT NULL, rss_max REAL NOT NULL, rss_sum REAL NOT NULL,
+    cpu_min REAL NOT NULL, cpu_max REAL NOT NULL, cpu_sum REAL NOT NULL,
+    inst_min INTEGER NOT NULL, inst_max INTEGER NOT NULL, inst_sum INTEGER NOT NULL,
+    PRIMARY KEY (tool, bucket)
+) WITHOUT ROWID;
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO {table} VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (tool, bucket) DO UPDATE SET
+    samples = samples + 1,
+    rss_min = min(rss_min, excluded.rss_min), rss_max = max(rss_max, excluded.rss_max),
+    rss_sum = rss_sum + excluded.rss_sum,
+    cpu_min = min(cpu_min, excluded.cpu_min), cpu_max = max(cpu_max, excluded.cpu_max),
+    cpu_sum = cpu_sum + excluded.cpu_sum,
+    inst_min = min(inst_min, excluded.inst_min), inst_max = max(inst_max, excluded.inst_max),
+    inst_sum = inst_sum + excluded.inst_sum
+"""
+
+LIFECYCLE_UPSERT = """
+INSERT INTO lifecycle (pid, create_time, tool, first_seen, last_seen, peak_rss_mb) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (pid, create_time) DO UPDATE SET
+    last_seen = excluded.last_seen,
+    exited_at = NULL,
+    peak_rss_mb = max(peak_rss_mb, excluded.peak_rss_mb)
+"""
+
+ROLLUP_COLUMNS = {
+    'rss_mb': ('rss_min', 'rss_max', 'rss_sum'),
+    'cpu_percent': ('cpu_min', 'cpu_max', 'cpu_sum'),
+    'instance_count': ('inst_min', 'inst_max', 'inst_sum')
+}
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    connection.execute('PRAGMA journal_mode=WAL')
+    # WAL下 NORMAL 只在检查点时同步，断电最多丢失最近的事务，不会损坏数据库
+    connection.execute('PRAGMA synchronous=NORMAL')
+    return connection
+
+
+class HistoryStore:
+    """由扫描线程调用 record()，写入线程独占写连接，查询使用各线程自己的只读连接"""
+
+    def __init__(self, path, raw_retention=RAW_RETENTION, minute_retention=MINUTE_RETENTION,
+                 hour_retention=HOUR_RETENTION, sample_interval=SAMPLE_INTERVAL,
+                 flush_interval=FLUSH_INTERVAL, prune_interval=PRUNE_INTERVAL):
+        self.path = path
+        self.raw_retention = raw_retention
+        self.minute_retention = minute_retention
+        self.hour_retention = hour_retention
+        self.sample_interval = sample_interval
+        self.flush_interval = flush_interval
+        self.prune_interval = prune_interval
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._writer = connect(path)
+        with self._writer:
+            self._writer.executescript(SCHEMA)
+            for table, _ in ROLLUPS:
+                self._writer.executescript(ROLLUP_SCHEMA.format(table=table))
+
+        self._queue = queue.Queue(MAX_PENDING_TICKS)
+        self._readers = threading.local()
+        self._thread = None
+        self._stop = threading.Event()
+        # 扫描线程上一次入队的时刻和服务单元集合
+        self._last_sample = None
+        self._last_keys = None
+        # 写入线程记录过的工具，本轮没有进程时记为0
+        self._known_tools = set()
+        # 写入线程认为仍在运行的服务单元 (pid, create_time)
+        self._alive = None
+        self._last_prune = 0.0
+        self.ticks_written = 0
+        self.batches_written = 0
+        self.dropped_ticks = 0
+        self.last_error = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止写入线程，写完已入队的批次"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def record(self, units, now=None):
+        """扫描线程调用：服务单元集合变化或距上次采样超过 sample_interval 时入队一轮采样"""
+        now = time.time() if now is None else now
+        rows = tuple(
+            (unit.tool_type, unit.pid, unit.create_time, unit.rss / 1024 / 1024, unit.cpu_percent, len(unit.members))
+            for unit in units
+        )
+        keys = frozenset((row[1], row[2]) for row in rows)
+        if (self._last_sample is not None and keys == self._last_keys
+                and now - self._last_sample < self.sample_interval):
+            return False
+        self._last_sample = now
+        self._last_keys = keys
+        try:
+            self._queue.put_nowait((now, rows))
+        except queue.Full:
+            self.dropped_ticks += 1
+            return False
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._stop.wait(self.flush_interval)
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """把队列中的全部采样写入一个事务，返回写入的轮数"""
+        ticks = []
+        while True:
+            try:
+                ticks.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            if ticks:
+                # 事务失败时回滚：内存中的运行单元和工具集合恢复到事务前，
+                # 下一轮据此重新判断启动和退出，生命周期事件不会丢失
+                alive, known_tools = self._alive, set(self._known_tools)
+                try:
+                    with self._writer:
+                        for now, rows in ticks:
+                            self._write_tick(now, rows)
+                except sqlite3.Error:
+                    self._alive, self._known_tools = alive, known_tools
+                    raise
+                self.ticks_written += len(ticks)
+                self.batches_written += 1
+            now = time.time()
+            if now - self._last_prune >= self.prune_interval:
+                self.prune(now)
+                self._last_prune = now
+            self.last_error = None
+        except sqlite3.Error as e:
+            self.last_error = str(e)
+            print(f"写入历史数据库失败: {e}")
+        return len(ticks)
+
+    def _write_tick(self, now, rows):
+        writer = self._writer
+        if self._alive is None:
+            # 服务重启后第一次写入：上次运行时仍在运行的单元，如果这一轮不在了就记为已退出
+            self._alive = set(writer.execute('SELECT pid, create_time FROM lifecycle WHERE exited_at IS NULL'))
+
+        writer.executemany('INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?)',
+                           [(now, tool, pid, create_time, rss_mb, cpu, count)
+                            for tool, pid, create_time, rss_mb, cpu, count in rows])
+        writer.executemany(LIFECYCLE_UPSERT, [(pid, create_time, tool, now, now, rss_mb)
+                                               for tool, pid, create_time, rss_mb, _, _ in rows])
+        alive = {(row[1], row[2]) for row in rows}
+        exited = self._alive - alive
+        if exited:
+            writer.executemany('UPDATE lifecycle SET exited_at = ? WHERE pid = ? AND create_time = ?',
+                               [(now, pid, create_time) for pid, create_time in exited])
+        self._alive = alive
+
+        totals = {tool: [0.0, 0.0, 0] for tool in self._known_tools}
+        for tool, _, _, rss_mb, cpu, _ in rows:
+            total = totals.setdefault(tool, [0.0, 0.0, 0])
+            total[0] += rss_mb
+            total[1] += cpu
+            total[2] += 1
+        self._known_tools.update(totals)
+        for table, width in ROLLUPS:
+            bucket = int(now // width * width)
+            writer.executemany(ROLLUP_UPSERT.format(table=table), [
+                (tool, bucket, rss_mb, rss_mb, rss_mb, cpu, cpu, cpu, count, count, count)
+                for tool, (rss_mb, cpu, count) in totals.items()
+            ])
+
+    def prune(self, now=None):
+        """删除超出保留时长的原始采样、聚合和已退出单元的生命周期记录"""
+        now = time.time() if now is None else now
+        with self._writer:
+            self._writer.execute('DELETE FROM samples WHERE ts < ?', (now - self.raw_retention,))
+            self._writer.execute('DELETE FROM rollup_1m WHERE bucket < ?', (now - self.minute_retention,))
+            self._writer.execute('DELETE FROM rollup_1h WHERE bucket < ?', (now - self.hour_retention,))
+            self._writer.execute('DELETE FROM lifecycle WHERE exited_at < ?', (now - self.hour_retention,))
+
+    def _reader(self):
+        connection = getattr(self._readers, 'connection', None)
+        if connection is None:
+            connection = connect(self.path)
+            self._readers.connection = connection
+        return connection
+
+    def rollup_for(self, window, points):
+        """每个点跨越一小时以上或超出分钟聚合的保留时长时读小时聚合，否则读分钟聚合"""
+        if window / points >= 3600 or window > self.minute_retention:
+            return 'rollup_1h', 3600
+        return 'rollup_1m', 60
+
+    def tools(self):
+        rows = self._reader().execute('SELECT DISTINCT tool FROM rollup_1h ORDER BY tool').fetchall()
+        return [row[0] for row in rows]
+
+    def query(self, tool, window=86400, points=120, now=None):
+        """
+        工具在最近 window 秒内的降采样序列（与 ResourceHistory.query 格式相同），
+        只读取聚合表；没有该工具的数据时返回None
+        """
+        now = time.time() if now is None else now
+        start = now - window
+        width = window / points
+        table, bucket_width = self.rollup_for(window, points)
+        select = ', '.join(f'min({low}), max({high}), sum({total})' for low, high, total in ROLLUP_COLUMNS.values())
+        # 包含窗口起点的那个聚合桶归入第一个点
+        rows = self._reader().execute(
+            f'SELECT max(CAST((bucket - ?) / ? AS INTEGER), 0) AS idx, sum(samples), {select} '
+            f'FROM {table} WHERE tool = ? AND bucket > ? AND bucket < ? GROUP BY idx ORDER BY idx',
+            (start, width, tool, start - bucket_width, now)
+        ).fetchall()
+        if not rows:
+            return None
+
+        series = {metric: [] for metric in METRICS}
+        for row in rows:
+            timestamp = round(start + row[0] * width, 3)
+            count = row[1]
+            for offset, metric in enumerate(METRICS):
+                low, high, total = row[2 + offset * 3:5 + offset * 3]
+                series[metric].append({
+                    't': timestamp, 'min': round(low, 2), 'max': round(high, 2), 'avg': round(total / count, 2)
+                })
+        return {
+            'tool': tool,
+            'window': window,
+            'points': points,
+            'resolution': bucket_width,
+            'samples': sum(row[1] for row in rows),
+            'series': series
+        }
+
+    def lifecycle(self, tool=None, window=86400, now=None):
+        """窗口内出现过的服务单元：启动、最后一次看到、退出时间和内存峰值"""
+        now = time.time() if now is None else now
+        sql = ('SELECT pid, create_time, tool, first_seen, last_seen, exited_at, peak_rss_mb FROM lifecycle '
+               'WHERE last_seen >= ?')
+        params = [now - window]
+        if tool is not None:
+            sql += ' AND tool = ?'
+            params.append(tool)
+        rows = self._reader().execute(sql + ' ORDER BY create_time', params).fetchall()
+        return [{
+            'pid': pid,
+            'tool': tool_type,
+            'started_at': create_time,
+            'first_seen': first_seen,
+            'last_seen': last_seen,
+            'exited_at': exited_at,
+            'peak_rss_mb': round(peak_rss_mb, 1)
+        } for pid, create_time, tool_type, first_seen, last_seen, exited_at, peak_rss_mb in rows]
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'pending_ticks': self._queue.qsize(),
+            'ticks_written': self.ticks_written,
+            'batches_written': self.batches_written,
+            'dropped_ticks': self.dropped_ticks,
+            'last_error': self.last_error
+        }
@@ -2,195 +2,222 @@
 """
 MCP工具实时监控系统
 显示当前真实运行的MCP工具和服务器状态
+
+导入本模块没有副作用：扫描线程、健康探测、配置监听、历史数据库和共享内存都由 start_monitor() 启动。
+直接运行时先监听端口再启动；WSGI服务器使用应用工厂 create_app()（如 gunicorn 'live_monitoring_app:create_app()'），
+直接使用 app 时在第一个请求到来时启动。第一轮扫描完成前API返回预热快照（warming 为true）
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import subprocess
+import sys
 import json
 import os
 import psutil
 import re
+import signal
+import socket
+import tempfile
 from datetime import datetime
 import threading
 import time
-import requests
+
+from config_watcher import ConfigWatcher
+from mcp_restart import McpRestarter, SpawnRegistry, server_spec
+from metrics import OPENMETRICS_CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE, MetricsResponses, render_monitor_metrics
+from proc_events import ProcEventListener
+from process_control import DEFAULT_GRACE, KILL_TIMEOUT, MAX_GRACE, ProcessControl, protected_pids
+from process_scanner import ProcessScanner
+from process_sources import create_process_source
+from process_tree import FootprintSampler
+from resource_history import ResourceHistory
+from running_tools import aggregate_units
+from scan_scheduler import ERROR_INTERVAL, AdaptiveScheduler
+from scan_profiler import PhaseTimer, ScanProfiler
+from scenario_index import ScenarioIndex
+from snapshot_delta import DeltaResponses
+from static_assets import StaticAssets
+from status_snapshot import SnapshotPublisher, serialize_payload
+from tool_catalog import TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS
+from tool_classifier import ToolClassifier
+
+# 运行工具的快照版本号、发布者标识和更新时间放在响应头中，响应体只含工具列表，
+# 进程表不变时响应字节不变，轮询可以得到304
+SNAPSHOT_HEADERS = ('X-Snapshot-Version', 'X-Snapshot-Epoch', 'X-Snapshot-Updated')
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=list(SNAPSHOT_HEADERS))
+
+# 运行模式: MCP_MONITOR_MODE=standalone(默认，本机监控) / agent(只扫描并上传) / collector(汇总多台主机)
+MONITOR_MODE = os.environ.get('MCP_MONITOR_MODE', 'standalone')
+
+# 多进程部署（仅standalone模式）: MCP_MONITOR_WORKERS=N 时本进程只运行扫描，快照写入共享内存，
+# 由N个工作进程提供HTTP服务。也可以分别启动：MCP_MONITOR_ROLE=scanner 的扫描进程，
+# 加上任意HTTP服务器（如 gunicorn -w N live_monitoring_app:app）中 MCP_MONITOR_ROLE=worker 的工作进程，
+# 两者使用相同的 MCP_MONITOR_SHM_NAME
+MONITOR_PORT = int(os.environ.get('MCP_MONITOR_PORT', '5002'))
+WORKER_COUNT = int(os.environ.get('MCP_MONITOR_WORKERS', '1')) if MONITOR_MODE == 'standalone' else 1
+MONITOR_ROLE = os.environ.get('MCP_MONITOR_ROLE', 'scanner' if WORKER_COUNT > 1 else 'all')
+SHARED_SNAPSHOT_NAME = os.environ.get('MCP_MONITOR_SHM_NAME', f'mcp-monitor-{MONITOR_PORT}')
 
 # 配置路径
 MCP_CONFIG_FILE = os.path.expanduser("~/.cursor/mcp.json")
+MCP_SCENARIO_DIR = os.path.expanduser("~/.cursor/mcp-configs")
 SWITCHER_SCRIPT = "../mcp-switcher-final.sh"
 SWITCHER_SCRIPT_PATH = os.path.join(os.path.dirname(__file__), SWITCHER_SCRIPT)
 
+# 仪表盘页面按本文件所在目录定位，不依赖启动时的工作目录
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # 修正路径 - 项目根目录已从 'C++' 改为 'MCP工具研究'
 PROJECT_ROOT = "/Users/zhangzhong/zz/MCP工具研究"
 
-# 工具映射表
-TOOL_MAPPING = {
-    'mcp-server-filesystem': {
-        'name': 'Files工具',
-        'category': '文件系统',
-        'description': '完整的文件系统操作工具集',
-        'icon': 'fas fa-folder',
-        'color': '#67c23a',
-        'functions': [
-            {'name': 'read_file', 'desc': '读取文件内容'},
-            {'name': 'write_file', 'desc': '写入文件内容'},
-            {'name': 'create_directory', 'desc': '创建目录'},
-            {'name': 'list_directory', 'desc': '列出目录内容'},
-            {'name': 'move_file', 'desc': '移动/重命名文件'},
-            {'name': 'search_files', 'desc': '搜索文件'},
-            {'name': 'get_file_info', 'desc': '获取文件信息'},
-            {'name': 'directory_tree', 'desc': '获取目录树结构'},
-            {'name': 'read_multiple_files', 'desc': '批量读取文件'},
-            {'name': 'edit_file', 'desc': '编辑文件内容'},
-            {'name': 'list_allowed_directories', 'desc': '查看允许访问的目录'}
-        ],
-        'total_functions': 11
-    },
-    'mcp-server-github': {
-        'name': 'GitHub工具',
-        'category': 'GitHub集成',
-        'description': '完整的GitHub API集成工具',
-        'icon': 'fab fa-github',
-        'color': '#24292e',
-        'functions': [
-            {'name': 'get_user_profile', 'desc': '获取用户资料'},
-            {'name': 'list_repositories', 'desc': '列出仓库'},
-            {'name': 'get_repository', 'desc': '获取仓库详情'},
-            {'name': 'list_issues', 'desc': '列出Issues'},
-            {'name': 'create_issue', 'desc': '创建Issue'},
-            {'name': 'update_issue', 'desc': '更新Issue'},
-            {'name': 'list_pull_requests', 'desc': '列出Pull Requests'},
-            {'name': 'create_pull_request', 'desc': '创建Pull Request'},
-            {'name': 'get_file_contents', 'desc': '获取文件内容'},
-            {'name': 'create_file', 'desc': '创建文件'},
-            {'name': 'update_file', 'desc': '更新文件'},
-            {'name': 'delete_file', 'desc': '删除文件'},
-            {'name': 'list_commits', 'desc': '列出提交记录'},
-            {'name': 'get_commit', 'desc': '获取提交详情'},
-            {'name': 'create_branch', 'desc': '创建分支'},
-            {'name': 'list_branches', 'desc': '列出分支'},
-            {'name': 'fork_repository', 'desc': 'Fork仓库'},
-            {'name': 'star_repository', 'desc': '标星仓库'},
-            {'name': 'search_repositories', 'desc': '搜索仓库'},
-            {'name': 'search_users', 'desc': '搜索用户'},
-            {'name': 'search_issues', 'desc': '搜索Issues'},
-            {'name': 'get_workflow_runs', 'desc': '获取工作流运行'},
-            {'name': 'list_releases', 'desc': '列出发布版本'},
-            {'name': 'create_release', 'desc': '创建发布版本'},
-            {'name': 'list_collaborators', 'desc': '列出协作者'},
-            {'name': 'manage_webhooks', 'desc': '管理Webhooks'}
-        ],
-        'total_functions': 26
-    },
-    'playwright-mcp-server': {
-        'name': 'Playwright工具',
-        'category': '网页自动化',
-        'description': '强大的网页自动化和测试工具',
-        'icon': 'fas fa-robot',
-        'color': '#e67e22',
-        'functions': [
-            {'name': 'navigate', 'desc': '导航到URL'},
-            {'name': 'click', 'desc': '点击元素'},
-            {'name': 'fill', 'desc': '填写表单'},
-            {'name': 'type', 'desc': '输入文本'},
-            {'name': 'screenshot', 'desc': '页面截图'},
-            {'name': 'get_text', 'desc': '获取文本内容'},
-            {'name': 'get_html', 'desc': '获取HTML内容'},
-            {'name': 'wait_for_element', 'desc': '等待元素出现'},
-            {'name': 'select_option', 'desc': '选择下拉选项'},
-            {'name': 'upload_file', 'desc': '上传文件'},
-            {'name': 'download_file', 'desc': '下载文件'},
-            {'name': 'execute_script', 'desc': '执行JavaScript'},
-            {'name': 'scroll', 'desc': '页面滚动'},
-            {'name': 'hover', 'desc': '鼠标悬停'},
-            {'name': 'drag_and_drop', 'desc': '拖拽操作'},
-            {'name': 'press_key', 'desc': '键盘按键'},
-            {'name': 'go_back', 'desc': '后退'},
-            {'name': 'go_forward', 'desc': '前进'},
-            {'name': 'reload', 'desc': '刷新页面'},
-            {'name': 'set_viewport', 'desc': '设置视窗大小'},
-            {'name': 'get_cookies', 'desc': '获取Cookies'},
-            {'name': 'set_cookies', 'desc': '设置Cookies'},
-            {'name': 'intercept_requests', 'desc': '拦截请求'},
-            {'name': 'mock_responses', 'desc': '模拟响应'},
-            {'name': 'pdf_export', 'desc': '导出PDF'},
-            {'name': 'performance_metrics', 'desc': '性能指标'},
-            {'name': 'network_monitoring', 'desc': '网络监控'},
-            {'name': 'console_logs', 'desc': '控制台日志'},
-            {'name': 'iframe_operations', 'desc': 'iframe操作'},
-            {'name': 'mobile_simulation', 'desc': '移动设备模拟'},
-            {'name': 'accessibility_testing', 'desc': '无障碍测试'},
-            {'name': 'visual_testing', 'desc': '视觉回归测试'}
-        ],
-        'total_functions': 32
-    },
-    'mcp-server-hotnews': {
-        'name': 'HotNews工具',
-        'category': '数据获取',
-        'description': '实时热点新闻数据抓取工具',
-        'icon': 'fas fa-newspaper',
-        'color': '#f39c12',
-        'functions': [
-            {'name': 'get_hot_news', 'desc': '获取热点新闻列表 (支持多平台)'}
-        ],
-        'platforms': [
-            {'name': '知乎热榜', 'id': 1},
-            {'name': '36氪热榜', 'id': 2}, 
-            {'name': '百度热点', 'id': 3},
-            {'name': 'B站热榜', 'id': 4},
-            {'name': '微博热搜', 'id': 5},
-            {'name': '抖音热点', 'id': 6},
-            {'name': '虎扑热榜', 'id': 7},
-            {'name': '豆瓣热榜', 'id': 8},
-            {'name': 'IT新闻', 'id': 9}
-        ],
-        'total_functions': 1
-    },
-    'desktop-commander': {
-        'name': 'Desktop Commander',
-        'category': '系统控制',
-        'description': '桌面应用控制和系统监控工具',
-        'icon': 'fas fa-desktop',
-        'color': '#9b59b6',
-        'functions': [
-            {'name': 'list_applications', 'desc': '列出运行中的应用'},
-            {'name': 'launch_application', 'desc': '启动应用程序'},
-            {'name': 'quit_application', 'desc': '退出应用程序'},
-            {'name': 'get_system_info', 'desc': '获取系统信息'},
-            {'name': 'monitor_resources', 'desc': '监控系统资源'}
-        ],
-        'total_functions': 5
-    },
-    'ai-tools-deepseek': {
-        'name': 'AI DeepSeek工具',
-        'category': 'AI增强',
-        'description': 'DeepSeek AI智能分析工具 (支持Gemini备用)',
-        'icon': 'fas fa-brain',
-        'color': '#ff6b6b',
-        'server_port': 3001,
-        'health_endpoint': 'http://localhost:3001/health',
-        'functions': [
-            {'name': 'smart_conversation', 'desc': '智能对话交流'},
-            {'name': 'code_review', 'desc': '代码审查分析'},
-            {'name': 'readme_generation', 'desc': 'README文档生成'},
-            {'name': 'ui_feedback', 'desc': 'UI设计反馈'}
-        ],
-        'total_functions': 4,
-        'is_ai_service': True
+# 从映射表编译的单次扫描分类器，新增的映射表条目自动生效
+tool_classifier = ToolClassifier(TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS)
+
+# 是否对较大的API响应启用gzip（客户端支持时）
+RESPONSE_GZIP = os.environ.get('MCP_MONITOR_GZIP', '1').lower() not in ('0', 'false', 'no')
+
+def render_api_payloads(snapshot):
+    """快照对应的各API响应内容，发布时序列化一次"""
+    return {
+        'running-tools': {
+            'success': True,
+            'data': snapshot.running_tools,
+            'count': len(snapshot.running_tools),
+            'full': True,
+            'warming': snapshot.version == 0
+        },
+        'configured-tools': {
+            'success': True,
+            'data': snapshot.configured_tools,
+            'count': len(snapshot.configured_tools)
+        },
+        'tools-overview': {
+            'success': True,
+            'data': snapshot.overview,
+            'current_scenario': snapshot.current_scenario,
+            'warming': snapshot.version == 0
+        }
     }
-}
 
-# 系统状态
-system_status = {
-    'running_tools': [],
-    'configured_tools': [],
-    'current_scenario': 'unknown',
-    'last_update': None
-}
+# 系统状态：扫描线程每轮发布一个不可变快照，API只读取当前快照；
+# 第一轮扫描完成前是版本0的预热快照。工作进程没有扫描线程，启动时换成读取扫描进程
+# 写入共享内存的快照的镜像（接口与 SnapshotPublisher 相同，见 use_publisher）
+status_publisher = SnapshotPublisher(render_api_payloads)
+
+# 运行工具的增量响应（?since=<版本号>）
+running_tools_deltas = DeltaResponses(status_publisher)
+
+# SSE推送：心跳间隔和订阅者上限（每个订阅者占用一个空闲的服务线程）
+STREAM_HEARTBEAT = 15
+STREAM_MAX_SUBSCRIBERS = int(os.environ.get('MCP_MONITOR_STREAM_MAX', '500'))
+STREAM_RESPONSES = ('running-tools', 'configured-tools', 'tools-overview')
+
+stream_subscribers = 0
+stream_subscribers_lock = threading.Lock()
+# 最近一个快照的合并推送事件，每个快照只拼接一次
+_stream_event_cache = (None, None)
+
+def build_stream_event(snapshot):
+    """把快照中已序列化的三个响应拼接成一条SSE事件（不重新序列化）"""
+    global _stream_event_cache
+    # 扫描进程重启后版本号重新计数，缓存按 (epoch, 版本号) 区分
+    cached_key, event = _stream_event_cache
+    if cached_key == (snapshot.epoch, snapshot.version):
+        return event
+
+    responses = snapshot.responses
+    data = (b'{"version":' + str(snapshot.version).encode()
+            + b',"epoch":' + serialize_payload(snapshot.epoch)
+            + b',"last_update":' + serialize_payload(snapshot.last_update)
+            + b',"running_tools":' + responses['running-tools'].body
+            + b',"configured_tools":' + responses['configured-tools'].body
+            + b',"overview":' + responses['tools-overview'].body + b'}')
+    event = b'id: ' + str(snapshot.version).encode() + b'\nevent: snapshot\ndata: ' + data + b'\n\n'
+    _stream_event_cache = ((snapshot.epoch, snapshot.version), event)
+    return event
+
+def stream_snapshots():
+    """SSE事件生成器：只有快照内容变化时才推送，空闲时定期发送心跳"""
+    global stream_subscribers
+    # 在生成器开始执行时计数，客户端在首次读取前断开时不会漏减
+    with stream_subscribers_lock:
+        stream_subscribers += 1
+    try:
+        yield b'retry: 3000\n\n'
+        last_sent = None
+        config_version = None
+        version = -1
+        while True:
+            snapshot = status_publisher.wait_for_newer(version, STREAM_HEARTBEAT)
+            if snapshot is None:
+                yield b': keepalive\n\n'
+                continue
+
+            version = snapshot.version
+            # 响应体不含版本号和更新时间，内容不变的响应沿用旧ETag：ETag组合即内容标识，
+            # 进程表不变的重复发布只会让订阅者收到心跳
+            etags = tuple(snapshot.responses[name].etag for name in STREAM_RESPONSES)
+            if etags != last_sent:
+                last_sent = etags
+                yield build_stream_event(snapshot)
+            if config_version is not None and snapshot.config_version != config_version:
+                yield ('event: config-changed\ndata: {"config_version":%d}\n\n' % snapshot.config_version).encode()
+            config_version = snapshot.config_version
+    finally:
+        with stream_subscribers_lock:
+            stream_subscribers -= 1
+
+def serve_cached_response(name):
+    """返回快照中预先序列化的响应，支持 If-None-Match -> 304 和 gzip"""
+    return send_cached(status_publisher.current.responses[name])
+
+def send_cached(cached, mimetype='application/json'):
+    """发送一个CachedResponse"""
+    use_gzip = RESPONSE_GZIP and 'gzip' in request.accept_encodings and cached.gzip_body is not None
+    # gzip变体的字节不同，使用不同的强ETag
+    etag = cached.etag + '-gz' if use_gzip else cached.etag
+
+    if request.if_none_match.contains(cached.etag) or request.if_none_match.contains(cached.etag + '-gz'):
+        response = Response(status=304)
+    elif use_gzip:
+        response = Response(cached.gzip_body, content_type=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(cached.body, content_type=mimetype)
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+# 仪表盘页面：首次请求时读入内存并预压缩，文件变化时才重新读取
+dashboard_assets = StaticAssets({
+    'live': os.path.join(APP_DIR, 'live_dashboard.html'),
+    'standalone': os.path.join(APP_DIR, 'standalone_dashboard.html')
+})
+
+def send_asset(name):
+    """发送内存中的页面，支持 If-None-Match -> 304 和 brotli/gzip"""
+    asset = dashboard_assets.get(name)
+    if asset is None:
+        return f'<h1>错误</h1><p>无法加载页面: {dashboard_assets.files[name]}</p>', 404
+
+    encoding, body, etag = asset.negotiate(request.accept_encodings if RESPONSE_GZIP else ())
+    if any(request.if_none_match.contains(tag) for tag in asset.etags()):
+        response = Response(status=304)
+    else:
+        response = Response(body, content_type=asset.mimetype)
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    # 每次使用前向服务端验证：页面更新后立即生效，未变化时只需一次304
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 def parse_mcp_config():
     """解析MCP配置文件"""
@@ -208,160 +235,88 @@ def parse_mcp_config():
 
 def detect_tool_from_process(cmdline):
     """从进程命令行检测工具类型"""
-    cmdline_lower = cmdline.lower()
-    
-    for tool_key, tool_info in TOOL_MAPPING.items():
-        if tool_key in cmdline_lower:
-            return tool_key
-    
-    # 额外的模式匹配
-    if 'github' in cmdline_lower:
-        return 'mcp-server-github'
-    elif 'playwright' in cmdline_lower:
-        return 'playwright-mcp-server'
-    elif 'filesystem' in cmdline_lower:
-        return 'mcp-server-filesystem'
-    elif 'hotnews' in cmdline_lower:
-        return 'mcp-server-hotnews'
-    elif 'deepseek-server-proxy' in cmdline_lower or ('ai-tools' in cmdline_lower and 'deepseek' in cmdline_lower):
-        return 'ai-tools-deepseek'
-    elif 'gemini-server-proxy' in cmdline_lower or 'ai-tools' in cmdline_lower:
-        return 'ai-tools-deepseek'  # 默认归类为deepseek工具
-    
-    return 'unknown'
+    return tool_classifier.detect(cmdline)
+
+# AI服务健康探测：独立的asyncio线程探测映射表中所有 health_endpoint（启动后才创建）
+health_prober = None
 
 def check_ai_service_status():
-    """检查AI服务状态"""
-    ai_status = {}
-    
-    # 检查DeepSeek AI服务
+    """检查AI服务状态（读取探测线程最近一次的结果，不发起请求）"""
+    return health_prober.results() if health_prober is not None else {}
+
+# 增量进程扫描器（按 pid + create_time 缓存分类结果），由 create_process_scanner() 在启动时创建
+process_scanner = None
+
+def create_process_scanner():
+    """
+    进程数据源: MCP_MONITOR_PROCESS_SOURCE=auto(默认，Linux上直接读/proc) / procfs / psutil / synthetic[:参数]
+    可选的PSS/USS内存统计: MCP_MONITOR_PSS=1，每轮扫描的采样时间预算 MCP_MONITOR_PSS_BUDGET_MS（默认10毫秒）
+    """
+    process_source = create_process_source(os.environ.get('MCP_MONITOR_PROCESS_SOURCE', 'auto'))
+    footprint_sampler = None
+    if os.environ.get('MCP_MONITOR_PSS', '').lower() in ('1', 'true', 'yes'):
+        footprint_sampler = FootprintSampler(
+            process_source,
+            budget=float(os.environ.get('MCP_MONITOR_PSS_BUDGET_MS', '10')) / 1000
+        )
+    return ProcessScanner(tool_classifier.classify, process_source, footprint=footprint_sampler)
+
+# 扫描循环各阶段的耗时直方图和每轮进程计数（/api/internal/perf）
+scan_profiler = ScanProfiler()
+
+# 每个工具/进程的资源使用时间序列（扫描时采样）
+resource_history = ResourceHistory()
+
+# 持久化历史（SQLite），MCP_MONITOR_HISTORY_DB=off 时只保留内存中的时间序列；启动时打开
+HISTORY_DB = os.environ.get('MCP_MONITOR_HISTORY_DB',
+                            os.path.expanduser('~/.local/state/mcp-monitor/history.sqlite3'))
+history_store = None
+
+# /api/history 查询参数上限；超出内存时间序列覆盖范围的窗口从历史数据库的聚合表查询
+HISTORY_MEMORY_WINDOW = 3600
+HISTORY_MAX_WINDOW = 24 * 3600
+HISTORY_MAX_POINTS = 1000
+
+def open_history_store():
+    """打开历史数据库，查询窗口上限放宽到小时聚合的保留期；打不开时只保留内存历史"""
+    global history_store, HISTORY_MAX_WINDOW
+    if HISTORY_DB.lower() in ('', 'off', '0', 'false', 'no'):
+        return
+    import sqlite3
+    from history_store import HOUR_RETENTION, HistoryStore
+
     try:
-        response = requests.get('http://localhost:3001/health', timeout=10)
-        if response.status_code == 200:
-            ai_status['ai-tools-deepseek'] = {
-                'status': 'running',
-                'available': True,
-                'response_time': response.elapsed.total_seconds(),
-                'server_info': response.json() if response.headers.get('content-type', '').startswith('application/json') else {'message': 'Health check passed'}
-            }
-        else:
-            ai_status['ai-tools-deepseek'] = {
-                'status': 'error',
-                'available': False,
-                'error': f'HTTP {response.status_code}'
-            }
-    except requests.exceptions.ConnectionError:
-        ai_status['ai-tools-deepseek'] = {
-            'status': 'stopped',
-            'available': False,
-            'error': 'Connection refused - service not running'
-        }
-    except requests.exceptions.Timeout:
-        ai_status['ai-tools-deepseek'] = {
-            'status': 'timeout',
-            'available': False,
-            'error': 'Service timeout'
-        }
-    except Exception as e:
-        ai_status['ai-tools-deepseek'] = {
-            'status': 'error',
-            'available': False,
-            'error': str(e)
-        }
-    
-    return ai_status
+        history_store = HistoryStore(HISTORY_DB)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ 无法打开历史数据库，只保留内存历史: {e}")
+        return
+    HISTORY_MAX_WINDOW = HOUR_RETENTION
 
-def get_running_mcp_tools():
-    """获取当前运行的MCP工具（合并相同类型）"""
-    tools_dict = {}  # 使用字典来合并相同类型的工具
-    
+def get_running_mcp_tools(timer=None):
+    """获取当前运行的MCP工具（合并相同类型）；timer 为扫描线程的分段计时器"""
+    if timer is None:
+        timer = PhaseTimer()
     # 首先检查AI服务状态
     ai_services = check_ai_service_status()
+    timer.lap('health')
     
     try:
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'create_time', 'memory_info']):
-            try:
-                cmdline = ' '.join(proc.info['cmdline']) if proc.info['cmdline'] else ''
-                
-                # 检测MCP相关进程
-                if any(keyword in cmdline.lower() for keyword in ['mcp', 'playwright', 'github', 'gemini-server-proxy']):
-                    tool_type = detect_tool_from_process(cmdline)
-                    tool_info = TOOL_MAPPING.get(tool_type, {
-                        'name': '未知工具',
-                        'category': '其他',
-                        'description': '检测到的MCP相关进程',
-                        'icon': 'fas fa-question',
-                        'color': '#95a5a6'
-                    })
-                    
-                    # 计算运行时间
-                    create_time = datetime.fromtimestamp(proc.info['create_time'])
-                    running_time = datetime.now() - create_time
-                    
-                    # 获取内存使用
-                    memory_mb = proc.info['memory_info'].rss / 1024 / 1024
-                    
-                    # 如果这个工具类型还没有记录，创建新记录
-                    if tool_type not in tools_dict:
-                        tools_dict[tool_type] = {
-                            'name': tool_info['name'],
-                            'category': tool_info['category'],
-                            'description': tool_info['description'],
-                            'icon': tool_info['icon'],
-                            'color': tool_info['color'],
-                            'functions': tool_info.get('functions', []),
-                            'platforms': tool_info.get('platforms', []),
-                            'total_functions': tool_info.get('total_functions', 0),
-                            'status': 'running',
-                            'processes': [],
-                            'total_memory': 0,
-                            'instance_count': 0
-                        }
-                    
-                    # 添加进程信息
-                    tools_dict[tool_type]['processes'].append({
-                        'pid': proc.info['pid'],
-                        'cmdline': cmdline[:80] + '...' if len(cmdline) > 80 else cmdline,
-                        'running_time': str(running_time).split('.')[0],
-                        'memory_mb': round(memory_mb, 1)
-                    })
-                    
-                    # 更新总计信息
-                    tools_dict[tool_type]['total_memory'] += memory_mb
-                    tools_dict[tool_type]['instance_count'] += 1
-                    
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+        process_scanner.scan()
+        timer.lap('scan')
+        if timer.profiler is not None:
+            timer.profiler.record_scan(process_scanner.last_scan)
+        # 每个MCP服务（包装进程+子进程+后代）是一个逻辑单元
+        units = process_scanner.units()
+        resource_history.record(units)
+        if history_store is not None:
+            history_store.record(units)
     except Exception as e:
         print(f"获取运行工具失败: {e}")
-    
-    # 转换为列表格式，添加聚合信息
-    tools = []
-    for tool_type, tool_data in tools_dict.items():
-        # 选择最早的进程作为主要显示
-        oldest_process = min(tool_data['processes'], key=lambda p: p['running_time'])
-        
-        tools.append({
-            'tool_type': tool_type,
-            'name': tool_data['name'],
-            'category': tool_data['category'],
-            'description': tool_data['description'],
-            'icon': tool_data['icon'],
-            'color': tool_data['color'],
-            'functions': tool_data['functions'],
-            'platforms': tool_data['platforms'],
-            'total_functions': tool_data['total_functions'],
-            'status': 'running',
-            'instance_count': tool_data['instance_count'],
-            'total_memory_mb': round(tool_data['total_memory'], 1),
-            'processes': tool_data['processes'],
-            # 主要显示信息（使用最早的进程）
-            'pid': oldest_process['pid'],
-            'cmdline': oldest_process['cmdline'],
-            'running_time': oldest_process['running_time'],
-            'memory_mb': oldest_process['memory_mb']
-        })
-    
+        units = []
+    timer.lap('history')
+
+    tools = aggregate_units(units)
+
     # 添加AI服务信息到工具列表
     for ai_tool_type, ai_status in ai_services.items():
         ai_tool_info = TOOL_MAPPING.get(ai_tool_type, {})
@@ -389,11 +344,19 @@ def get_running_mcp_tools():
                 'processes': [],
                 'pid': 'N/A',
                 'cmdline': f"AI Service on port {ai_tool_info.get('server_port', 'unknown')}",
-                'running_time': 'N/A',
+                'start_time': None,
                 'memory_mb': 0
             }
             tools.append(ai_tool)
     
+    timer.lap('build')
+    return tools
+
+def load_configured_tools():
+    """解析配置的工具并记录耗时（只在启动和配置文件变化时执行）"""
+    started = time.perf_counter()
+    tools = get_configured_tools()
+    scan_profiler.observe('configured', time.perf_counter() - started)
     return tools
 
 def get_configured_tools():
@@ -431,139 +394,782 @@ def get_configured_tools():
     
     return tools
 
+# 扫描间隔由自适应调度决定；事件模式下事件驱动扫描，轮询至少间隔30秒只作兜底
+EVENT_MODE_POLL_INTERVAL = 30
+# 收到事件后稍等片刻再扫描，合并 npx -> node 这类连续启动产生的事件
+EVENT_DEBOUNCE = 0.02
+
+# 进程事件到达或配置文件变化时提前唤醒后台扫描
+scan_wakeup = threading.Event()
+
+# 自适应扫描调度：扫描线程CPU预算（单核比例）可通过 MCP_MONITOR_SCAN_CPU_BUDGET 调整
+scan_scheduler = AdaptiveScheduler(cpu_budget=float(os.environ.get('MCP_MONITOR_SCAN_CPU_BUDGET', '0.05')))
+
+# 配置的工具列表只在配置文件变化时重新解析：(配置版本号, 工具列表) 整体替换；扫描线程第一轮前解析
+configured_state = None
+
+def on_config_changed(version):
+    """配置文件变化：重新解析并立即触发一轮扫描发布新快照"""
+    global configured_state
+    configured_state = (version, load_configured_tools())
+    print("🔄 MCP配置已变化，重新加载配置的工具")
+    # 切换场景后MCP服务会陆续重启，先按最短间隔扫描一段时间
+    scan_scheduler.boost('config-change')
+    scan_wakeup.set()
+
+config_watcher = ConfigWatcher(MCP_CONFIG_FILE, on_config_changed)
+
+# 场景索引：按内容哈希识别当前 mcp.json 对应 mcp-configs 下的哪个场景
+scenario_index = ScenarioIndex(MCP_SCENARIO_DIR)
+# 工作进程：上次重新加载场景索引时扫描进程的场景索引版本号
+worker_scenario_version = None
+
+def available_scenarios(snapshot):
+    """场景列表；工作进程在扫描进程的场景索引变化后重新加载自己的索引"""
+    global worker_scenario_version
+    if MONITOR_ROLE == 'worker' and snapshot.scenario_version != worker_scenario_version:
+        scenario_index.refresh()
+        worker_scenario_version = snapshot.scenario_version
+    return scenario_index.scenarios()
+
+def handle_proc_event(event, pid):
+    """处理内核进程事件（在监听线程中调用）"""
+    if event == 'exec':
+        # exec后命令行已变化，旧的分类结果作废
+        process_scanner.invalidate(pid)
+        try:
+            cmdline = process_scanner.source.read_cmdline(pid)
+        except Exception:
+            return
+        if tool_classifier.classify(cmdline) is not None:
+            scan_wakeup.set()
+    elif event == 'exit':
+        if process_scanner.is_mcp_pid(pid):
+            # 退出事件早于父进程回收，此时进程还是僵尸，需重新分类才会被剔除
+            process_scanner.invalidate(pid)
+            scan_wakeup.set()
+
+proc_event_listener = ProcEventListener(handle_proc_event)
+
+def start_proc_events():
+    """启用事件驱动的进程发现，不可用时保持轮询模式"""
+    if proc_event_listener.start():
+        print("⚡ 已订阅内核进程事件，MCP服务启停将即时反映")
+    else:
+        print(f"⚠️ 进程事件不可用，使用轮询模式: {proc_event_listener.error}")
+
+def render_metrics(snapshot):
+    probes = health_prober.probes if health_prober is not None else None
+    return render_monitor_metrics(snapshot, probes, scan_profiler.histograms['tick'])
+
+# /metrics：每个快照版本渲染一次，抓取直接返回缓存的字节
+metrics_responses = MetricsResponses(status_publisher, render_metrics)
+
+def use_publisher(publisher):
+    """替换快照来源（工作进程换成共享内存镜像），依赖它的增量响应和指标缓存一并重建"""
+    global status_publisher, running_tools_deltas, metrics_responses
+    status_publisher = publisher
+    running_tools_deltas = DeltaResponses(publisher)
+    metrics_responses = MetricsResponses(publisher, render_metrics)
+
 def update_system_status():
     """后台更新系统状态"""
+    global configured_state
     while True:
         try:
-            system_status['running_tools'] = get_running_mcp_tools()
-            system_status['configured_tools'] = get_configured_tools()
-            system_status['last_update'] = datetime.now().isoformat()
-            time.sleep(3)  # 每3秒更新一次
+            cpu_started = time.thread_time()
+            timer = scan_profiler.timer()
+            previous_pids = process_scanner.mcp_pids()
+
+            if configured_state is None:
+                configured_state = (0, load_configured_tools())
+            config_version, configured_tools = configured_state
+            running_tools = get_running_mcp_tools(timer)
+            current_scenario = scenario_index.detect(MCP_CONFIG_FILE)
+            timer.lap('scenario')
+            snapshot = status_publisher.publish(
+                running_tools=running_tools,
+                configured_tools=configured_tools,
+                last_update=datetime.now().isoformat(),
+                current_scenario=current_scenario,
+                config_version=config_version,
+                scenario_version=scenario_index.version
+            )
+            timer.lap('publish')
+            if snapshot.version == 1:
+                print(f"🔧 首轮扫描完成: 运行工具 {len(running_tools)}个，配置工具 {len(configured_tools)}个")
+
+            wall_seconds = timer.finish()
+            scan_scheduler.record_scan(
+                time.thread_time() - cpu_started,
+                wall_seconds,
+                churned=process_scanner.mcp_pids() != previous_pids
+            )
+            # 推送订阅者和agent上传都需要保持常规扫描频率
+            if stream_subscribers or fleet_agent is not None:
+                scan_scheduler.note_client()
+            floor = EVENT_MODE_POLL_INTERVAL if proc_event_listener.active else 0.0
+            if scan_wakeup.wait(scan_scheduler.next_interval(floor)):
+                time.sleep(EVENT_DEBOUNCE)
+                scan_wakeup.clear()
         except Exception as e:
             print(f"更新系统状态失败: {e}")
-            time.sleep(10)
+            time.sleep(ERROR_INTERVAL)
+
+# 多主机汇总的共享令牌（agent上传时携带，collector校验）
+FLEET_TOKEN = os.environ.get('MCP_MONITOR_FLEET_TOKEN')
+# collector定期重新汇总，让离线主机及时从结果中消失（秒）
+FLEET_REFRESH_INTERVAL = 5
+
+fleet_collector = None
+fleet_agent = None
+fleet_publish_lock = threading.Lock()
+
+def publish_fleet_snapshot(collector):
+    """collector模式：把各主机的最新状态合并发布为一个快照（可能在多个请求线程中调用）"""
+    with fleet_publish_lock:
+        running_tools, configured_tools = collector.merged()
+        scenarios = {host['current_scenario'] for host in collector.hosts() if host['online']}
+        status_publisher.publish(
+            running_tools=running_tools,
+            configured_tools=configured_tools,
+            last_update=datetime.now().isoformat(),
+            current_scenario=scenarios.pop() if len(scenarios) == 1 else ('mixed' if scenarios else 'unknown')
+        )
+
+def refresh_fleet():
+    """collector模式的后台线程：移除过期主机并重新汇总"""
+    while True:
+        time.sleep(FLEET_REFRESH_INTERVAL)
+        try:
+            fleet_collector.expire_hosts()
+            publish_fleet_snapshot(fleet_collector)
+        except Exception as e:
+            print(f"汇总主机状态失败: {e}")
+
+def scanner_health():
+    """扫描进程的运行状态（/api/health 中与快照无关的部分）"""
+    return {
+        'mode': MONITOR_MODE,
+        'config_watch': config_watcher.mode,
+        'scan_scheduler': scan_scheduler.stats(),
+        'history_store': history_store.stats() if history_store is not None else None,
+        'discovery_mode': 'events' if proc_event_listener.active else 'polling'
+    }
+
+def scanner_perf():
+    report = scan_profiler.report()
+    report['process_cache_size'] = process_scanner.cache_size() if process_scanner is not None else None
+    report['scan_scheduler'] = scan_scheduler.stats()
+    return report
+
+# 只存在于扫描进程中的状态，多进程模式下随每个快照写入共享内存
+SCANNER_STATUS = {
+    'health': scanner_health,
+    'perf': scanner_perf,
+    'ai_services': check_ai_service_status,
+    'probes': lambda: health_prober.stats() if health_prober is not None else {},
+    'history_tools': lambda: resource_history.tools()
+}
+
+def scanner_status(section):
+    """扫描进程的某部分状态：工作进程从最新快照中读取，其他情况直接计算"""
+    if MONITOR_ROLE == 'worker':
+        # 读取 current 以刷新镜像
+        status_publisher.current
+        return status_publisher.status.get(section)
+    return SCANNER_STATUS[section]()
+
+shared_snapshot_writer = None
+
+def export_shared_snapshot(snapshot):
+    """扫描进程：把快照、指标和扫描进程状态写入共享内存"""
+    from shared_snapshot import encode_frame
 
-# 启动状态更新线程
-status_thread = threading.Thread(target=update_system_status, daemon=True)
-status_thread.start()
+    status = {section: render() for section, render in SCANNER_STATUS.items()}
+    shared_snapshot_writer.write(encode_frame(snapshot, [metrics_responses.get()], status))
+
+# 工作进程收到API请求后记录在共享内存中，扫描进程据此保持常规扫描频率
+WORKER_CLIENT_POLL_INTERVAL = 0.5
+
+def watch_worker_clients():
+    last_seen = 0.0
+    while True:
+        time.sleep(WORKER_CLIENT_POLL_INTERVAL)
+        seen = shared_snapshot_writer.last_client()
+        if seen != last_seen:
+            last_seen = seen
+            if scan_scheduler.note_client():
+                scan_wakeup.set()
+
+status_thread = None
+monitor_started = False
+monitor_start_lock = threading.Lock()
+
+def start_monitor():
+    """
+    按运行模式和角色启动后台组件（只执行一次，可在任意线程调用）：
+    扫描线程、健康探测、配置监听、历史数据库、共享快照、多主机汇总
+    """
+    global monitor_started, status_thread, health_prober, process_scanner
+    global shared_snapshot_writer, fleet_collector, fleet_agent
+    with monitor_start_lock:
+        if monitor_started:
+            return
+        monitor_started = True
+
+        open_history_store()
+
+        if MONITOR_ROLE == 'worker':
+            # 扫描、探测和配置监听都在扫描进程中，工作进程只读取共享内存中的快照
+            from shared_snapshot import SharedSnapshotReader, SnapshotMirror
+
+            try:
+                reader = SharedSnapshotReader(SHARED_SNAPSHOT_NAME)
+            except FileNotFoundError:
+                raise SystemExit(f"共享快照 {SHARED_SNAPSHOT_NAME} 不存在，请先启动 MCP_MONITOR_ROLE=scanner 的扫描进程")
+            use_publisher(SnapshotMirror(reader, render_api_payloads))
+            return
+
+        if MONITOR_ROLE == 'scanner':
+            from shared_snapshot import SharedSnapshotWriter
+
+            shared_snapshot_writer = SharedSnapshotWriter(SHARED_SNAPSHOT_NAME)
+            status_publisher.on_publish = export_shared_snapshot
+            threading.Thread(target=watch_worker_clients, name='worker-clients', daemon=True).start()
+
+        if MONITOR_MODE == 'collector':
+            from fleet import FleetCollector
+
+            fleet_collector = FleetCollector(on_update=publish_fleet_snapshot)
+            status_thread = threading.Thread(target=refresh_fleet, daemon=True)
+            status_thread.start()
+            return
+
+        from health_prober import HealthProber, catalog_health_endpoints
+
+        process_scanner = create_process_scanner()
+        health_prober = HealthProber(catalog_health_endpoints(TOOL_MAPPING))
+
+        # 可选的事件驱动模式: MCP_MONITOR_EVENTS=1
+        if os.environ.get('MCP_MONITOR_EVENTS', '').lower() in ('1', 'true', 'yes'):
+            start_proc_events()
+
+        # 启动健康探测、配置监听和状态更新线程
+        health_prober.start()
+        config_watcher.start()
+        if history_store is not None:
+            history_store.start()
+        status_thread = threading.Thread(target=update_system_status, daemon=True)
+        status_thread.start()
+
+        if MONITOR_MODE == 'agent':
+            from fleet import FleetAgent
+
+            fleet_agent = FleetAgent(
+                status_publisher,
+                os.environ.get('MCP_MONITOR_COLLECTOR_URL', 'http://localhost:5002'),
+                os.environ.get('MCP_MONITOR_HOST_ID') or socket.gethostname(),
+                token=FLEET_TOKEN
+            )
+            fleet_agent.start()
+
+def create_app():
+    """应用工厂：供WSGI服务器在监听端口后调用（如 gunicorn 'live_monitoring_app:create_app()'），启动后台组件并返回应用"""
+    start_monitor()
+    return app
+
+@app.before_request
+def note_api_client():
+    """有客户端在查看数据时保持常规扫描频率；未经 create_app() 启动时在第一个请求时启动后台组件"""
+    if not monitor_started:
+        start_monitor()
+    if not request.path.startswith('/api/'):
+        return
+    if MONITOR_ROLE == 'worker':
+        status_publisher.reader.note_client()
+    elif scan_scheduler.note_client():
+        scan_wakeup.set()
 
 @app.route('/')
 def index():
     """主页面"""
-    try:
-        with open('live_dashboard.html', 'r', encoding='utf-8') as f:
-            return f.read()
-    except Exception as e:
-        return f'<h1>错误</h1><p>无法加载页面: {e}</p>'
+    return send_asset('live')
+
+@app.route('/standalone')
+def standalone_index():
+    """独立版页面"""
+    return send_asset('standalone')
 
 @app.route('/api/running-tools')
 def get_running_tools():
-    """获取当前运行的工具"""
-    return jsonify({
-        'success': True,
-        'data': system_status['running_tools'],
-        'count': len(system_status['running_tools']),
-        'last_update': system_status['last_update']
-    })
+    """获取当前运行的工具；带 since=<版本号> 时只返回该版本之后的变化"""
+    since = request.args.get('since', type=int)
+    epoch = request.args.get('epoch')
+    if since is not None and (epoch is None or epoch == status_publisher.epoch):
+        cached = running_tools_deltas.get(since)
+        if cached is not None:
+            snapshot = status_publisher.get_snapshot(cached.version) or status_publisher.current
+            return with_snapshot_headers(send_cached(cached), snapshot)
+    # 没有since、服务已重启或版本超出历史窗口：返回完整数据，客户端据此重新同步
+    snapshot = status_publisher.current
+    return with_snapshot_headers(send_cached(snapshot.responses['running-tools']), snapshot)
+
+def with_snapshot_headers(response, snapshot):
+    """响应对应的快照版本（304响应同样带上，客户端据此请求之后的增量）"""
+    response.headers['X-Snapshot-Version'] = str(snapshot.version)
+    response.headers['X-Snapshot-Epoch'] = snapshot.epoch
+    if snapshot.last_update is not None:
+        response.headers['X-Snapshot-Updated'] = snapshot.last_update
+    return response
 
 @app.route('/api/configured-tools')
 def get_configured_tools_api():
     """获取配置的工具"""
-    return jsonify({
-        'success': True,
-        'data': system_status['configured_tools'],
-        'count': len(system_status['configured_tools'])
-    })
+    return serve_cached_response('configured-tools')
 
 @app.route('/api/tools-overview')
 def get_tools_overview():
-    """获取工具总览"""
-    running = system_status['running_tools']
-    configured = system_status['configured_tools']
-    
-    # 统计分类
-    categories = {}
-    for tool in running:
-        cat = tool['category']
-        if cat not in categories:
-            categories[cat] = {'running': 0, 'total': 0}
-        categories[cat]['running'] += 1
-        categories[cat]['total'] += 1
-    
-    # 内存使用统计
-    total_memory = sum(tool['memory_mb'] for tool in running)
-    
-    return jsonify({
-        'success': True,
-        'data': {
-            'running_count': len(running),
-            'configured_count': len(configured),
-            'categories': categories,
-            'total_memory_mb': round(total_memory, 1),
-            'system_health': 'healthy' if len(running) > 0 else 'warning'
-        }
-    })
+    """获取工具总览（统计数据在发布快照时已计算好）"""
+    return serve_cached_response('tools-overview')
+
+@app.route('/api/stream')
+def stream():
+    """SSE推送：快照变化时推送一条合并了运行工具、配置工具和总览的事件"""
+    if stream_subscribers >= STREAM_MAX_SUBSCRIBERS:
+        return jsonify({'success': False, 'error': '推送订阅者已满，请使用轮询接口'}), 503
+
+    response = Response(stream_snapshots(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# 批量终止进程的后台任务；任务结束后立即扫描一轮，让快照尽快反映进程退出
+process_control = ProcessControl(on_finish=lambda job: scan_wakeup.set())
+
+def local_units(tool_type=None):
+    """当前快照中本机MCP服务单元（不含AI服务和远程主机），每个单元为 {PID: 创建时间}；tool_type 限定工具类型"""
+    units = []
+    for tool in status_publisher.current.running_tools:
+        if 'host' in tool or tool.get('is_ai_service'):
+            continue
+        if tool_type is not None and tool.get('tool_type') != tool_type:
+            continue
+        for process in tool['processes']:
+            units.append({pid: create_time for pid, create_time in process.get('members', ())})
+    return units
+
+def local_tool_members(tool_type):
+    """某类工具全部实例的成员进程 {PID: 创建时间}"""
+    members = {}
+    for unit in local_units(tool_type):
+        members.update(unit)
+    return members
+
+def job_response(job, wait=None, **fields):
+    """返回任务状态；wait>0 时最多等待这么多秒，完成则直接返回最终结果"""
+    if wait:
+        job.wait(min(wait, MAX_GRACE + KILL_TIMEOUT))
+    response = jsonify({'success': True, 'job': job.to_dict(), **fields})
+    response.status_code = 200 if job.state == 'done' else 202
+    response.headers['Location'] = f'/api/processes/jobs/{job.id}'
+    return response
 
 @app.route('/api/kill-process', methods=['POST'])
 def kill_process():
-    """终止指定进程"""
+    """终止指定进程（SIGTERM，宽限期后仍未退出则SIGKILL），返回可轮询的任务"""
+    data = request.get_json(silent=True) or {}
+    pid = data.get('pid')
+    if not isinstance(pid, int) or isinstance(pid, bool) or pid <= 0:
+        return jsonify({'success': False, 'error': '缺少PID参数'}), 400
+    if fleet_collector is not None:
+        return jsonify({'success': False, 'error': 'collector模式下不能终止进程'}), 404
+
+    # 快照中的MCP进程发送信号前核对创建时间，防止PID已被复用
+    identities = {member: create_time for unit in local_units() for member, create_time in unit.items()}
+    job = process_control.submit([pid], target={'pids': [pid]}, identities=identities)
+    return job_response(job, message=f'进程 {pid} 正在终止')
+
+@app.route('/api/processes/terminate', methods=['POST'])
+def terminate_processes():
+    """批量终止进程：pids 列表、tool_type（该类工具的全部实例）或两者合并。
+    tree=true 时终止这些PID所属的整个MCP服务单元（以扫描快照中的单元成员为准，不再现查子进程），
+    不属于任何MCP单元的PID和系统/监控自身进程不会被展开，也不会收到信号。
+    快照中的进程发送信号前核对创建时间，PID已被复用的记为 replaced。
+    所有进程同时收到SIGTERM，grace 秒后仍存活的升级为SIGKILL；返回202和任务，按 Location 轮询结果"""
+    if fleet_collector is not None:
+        return jsonify({'success': False, 'error': 'collector模式下不能终止进程'}), 404
+    data = request.get_json(silent=True) or {}
+    pids = data.get('pids') or []
+    tool_type = data.get('tool_type')
+    tree = bool(data.get('tree'))
+    grace = data.get('grace', DEFAULT_GRACE)
+
+    if not isinstance(pids, list) or not all(isinstance(pid, int) and not isinstance(pid, bool) for pid in pids):
+        return jsonify({'success': False, 'error': 'pids需为整数列表'}), 400
+    if isinstance(grace, bool) or not isinstance(grace, (int, float)):
+        return jsonify({'success': False, 'error': 'grace需为秒数'}), 400
+
+    # 合成数据源的PID与本机真实进程无关，不能按工具类型或单元终止
+    if (tool_type is not None or tree) and os.environ.get('MCP_MONITOR_PROCESS_SOURCE', 'auto').startswith('synthetic'):
+        return jsonify({'success': False, 'error': '合成进程数据源不支持按工具类型或进程树终止'}), 409
+
+    units = local_units()
+    identities = {pid: create_time for unit in units for pid, create_time in unit.items()}
+    targets = set(pids)
+    if tool_type is not None:
+        tool_members = local_tool_members(tool_type)
+        if not tool_members:
+            return jsonify({'success': False, 'error': f'没有运行中的 {tool_type} 实例'}), 404
+        targets |= tool_members.keys()
+    ignored = []
+    if tree:
+        # 只从已知MCP单元的成员展开，受保护进程不作为根也不会被选中
+        protected = protected_pids()
+        roots = {pid for pid in targets if pid in identities and pid not in protected}
+        ignored = sorted(targets - roots)
+        targets = set()
+        for unit in units:
+            if not roots.isdisjoint(unit):
+                targets |= unit.keys()
+        targets -= protected
+        if not targets:
+            return jsonify({'success': False, 'error': '指定的PID不属于任何运行中的MCP服务', 'ignored': ignored}), 404
+
     try:
-        data = request.get_json()
-        pid = data.get('pid')
-        
-        if not pid:
-            return jsonify({'success': False, 'error': '缺少PID参数'}), 400
-        
-        # 终止进程
-        proc = psutil.Process(pid)
-        proc.terminate()
-        
-        return jsonify({
-            'success': True,
-            'message': f'进程 {pid} 已终止'
-        })
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        job = process_control.submit(targets, grace, target={'pids': pids, 'tool_type': tool_type, 'tree': tree},
+                                     identities={pid: identities[pid] for pid in targets if pid in identities})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    # 多工作进程模式下任务只保存在接收请求的进程中，客户端可用 ?wait=<秒> 同步等待结果
+    fields = {'ignored': ignored} if ignored else {}
+    return job_response(job, request.args.get('wait', type=float), **fields)
+
+@app.route('/api/processes/jobs')
+def list_process_jobs():
+    """最近的终止任务，新任务在前"""
+    limit = request.args.get('limit', default=20, type=int)
+    return jsonify({'success': True, 'data': [job.to_dict() for job in process_control.recent(limit)]})
+
+@app.route('/api/processes/jobs/<job_id>')
+def get_process_job(job_id):
+    """终止任务的状态和每个PID的结果；wait=<秒> 时等待任务完成"""
+    job = process_control.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '任务不存在或已过期'}), 404
+    return job_response(job, request.args.get('wait', type=float))
+
+def restart_find_pids(spec):
+    """重启前要终止的进程 {PID: 创建时间}：该工具类型的全部运行实例（无法识别类型的服务只终止上次重启时启动的进程）"""
+    return local_tool_members(spec['tool_type']) if spec['tool_type'] else {}
+
+# 重启时启动的MCP进程记录在文件中：多工作进程模式下由同一个共享快照名的全部工作进程共用，
+# 任一工作进程都能终止其他工作进程上次启动的实例，监控服务重启后也能找到
+RESTART_REGISTRY_PATH = os.path.join(tempfile.gettempdir(), f'{SHARED_SNAPSHOT_NAME}-spawned.json')
 
-@app.route('/api/restart-mcp')
+# MCP服务并行重启（终止旧实例复用批量进程控制），完成后立即扫描一轮
+mcp_restarter = McpRestarter(process_control, restart_find_pids, on_finish=lambda job: scan_wakeup.set(),
+                             registry=SpawnRegistry(RESTART_REGISTRY_PATH))
+
+def restart_specs(server_names=None):
+    """从 mcp.json 取出要重启的服务（默认全部），返回 (服务信息列表, 不存在的服务名)"""
+    config = parse_mcp_config()
+    names = server_names or list(config)
+    specs = []
+    for server_name in names:
+        server_config = config.get(server_name)
+        if server_config is None or not server_config.get('command'):
+            continue
+        command_str = f"{server_config.get('command', '')} {' '.join(server_config.get('args', []))}"
+        tool_type = detect_tool_from_process(command_str)
+        tool_type = None if tool_type == 'unknown' else tool_type
+        health_endpoint = TOOL_MAPPING.get(tool_type, {}).get('health_endpoint')
+        specs.append(server_spec(server_name, server_config, tool_type, health_endpoint))
+    missing = [name for name in names if name not in {spec['server_name'] for spec in specs}]
+    return specs, missing
+
+def restart_response(job, wait=None, **fields):
+    """返回重启任务；wait>0 时最多等待这么多秒"""
+    if wait:
+        job.wait(min(wait, mcp_restarter.stop_grace + KILL_TIMEOUT + mcp_restarter.ready_timeout))
+    response = jsonify({'success': True, 'job': job.to_dict(), **fields})
+    response.status_code = 200 if job.state == 'done' else 202
+    response.headers['Location'] = f'/api/restart-mcp/jobs/{job.id}'
+    return response
+
+@app.route('/api/restart-mcp', methods=['POST'])
 def restart_mcp():
-    """重启MCP服务"""
+    """
+    并行重启 mcp.json 中的MCP服务：servers=名称列表（JSON数组或逗号分隔，默认全部）。
+    各服务同时终止旧实例、按 command/args 重新启动并等待就绪，返回202和任务，按 Location 轮询每个服务的重启耗时。
+    只接受POST：会终止和启动进程，不能由跨站的GET请求（如图片链接）触发。
+    stdio类服务只终止旧实例（状态 stopped），由MCP客户端重新启动；配置了 healthEndpoint 或 url 的服务由本服务重新启动
+    """
+    if fleet_collector is not None:
+        return jsonify({'success': False, 'error': 'collector模式下不能重启MCP服务'}), 404
+    if os.environ.get('MCP_MONITOR_PROCESS_SOURCE', 'auto').startswith('synthetic'):
+        return jsonify({'success': False, 'error': '合成进程数据源不支持重启MCP服务'}), 409
+
+    data = request.get_json(silent=True) or {}
+    servers = data.get('servers', request.args.get('servers'))
+    if isinstance(servers, str):
+        servers = [name.strip() for name in servers.split(',') if name.strip()]
+    if servers is not None and not (isinstance(servers, list) and all(isinstance(name, str) for name in servers)):
+        return jsonify({'success': False, 'error': 'servers需为服务名列表'}), 400
+
+    specs, missing = restart_specs(servers)
+    if missing:
+        return jsonify({'success': False, 'error': f'mcp.json 中没有可启动的服务: {", ".join(missing)}'}), 404
     try:
-        # 这里可以添加重启MCP的逻辑
-        # 例如: 终止所有MCP进程，然后重新启动
-        
+        job = mcp_restarter.submit(specs)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    return restart_response(job, request.args.get('wait', type=float),
+                            message=f'正在重启 {len(specs)} 个MCP服务')
+
+@app.route('/api/restart-mcp/jobs/<job_id>')
+def get_restart_job(job_id):
+    """重启任务的状态和每个服务的耗时；wait=<秒> 时等待任务完成"""
+    job = mcp_restarter.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '任务不存在或已过期'}), 404
+    return restart_response(job, request.args.get('wait', type=float))
+
+@app.route('/api/restart-mcp/history')
+def restart_history():
+    """最近的重启记录（新的在前）和每个服务重启耗时的分位数"""
+    limit = request.args.get('limit', default=20, type=int)
+    return jsonify({
+        'success': True,
+        'data': [job.to_dict() for job in mcp_restarter.recent(limit)],
+        'stats': mcp_restarter.stats()
+    })
+
+@app.route('/api/current-scenario')
+def get_current_scenario():
+    """当前 mcp.json 对应的场景（custom 表示自定义配置，missing 表示配置文件不存在）"""
+    snapshot = status_publisher.current
+    return jsonify({
+        'success': True,
+        'scenario': snapshot.current_scenario,
+        'config_file': MCP_CONFIG_FILE,
+        'scenario_dir': MCP_SCENARIO_DIR,
+        'available_scenarios': available_scenarios(snapshot),
+        'last_update': snapshot.last_update
+    })
+
+@app.route('/api/fleet/ingest', methods=['POST'])
+def fleet_ingest():
+    """collector模式：接收agent上传的（gzip压缩的）快照增量"""
+    if fleet_collector is None:
+        return jsonify({'success': False, 'error': '当前不是collector模式'}), 404
+    if FLEET_TOKEN and request.headers.get('Authorization') != f'Bearer {FLEET_TOKEN}':
+        return jsonify({'success': False, 'error': '令牌无效'}), 401
+    from fleet import ResyncRequired, decode_batch
+
+    try:
+        batch = decode_batch(request.get_data(cache=False), request.headers.get('Content-Encoding'))
+        version = fleet_collector.ingest(batch)
+    except ResyncRequired:
+        return jsonify({'success': False, 'error': '缺少基准版本，请上传完整状态', 'resync': True}), 409
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({'success': False, 'error': f'无效的上传内容: {e}'}), 400
+    return jsonify({'success': True, 'version': version})
+
+@app.route('/api/fleet/hosts')
+def fleet_hosts():
+    """collector模式下各主机的状态；agent模式下返回上传状态"""
+    if fleet_collector is not None:
+        return jsonify({'success': True, 'mode': MONITOR_MODE, 'data': fleet_collector.hosts()})
+    if fleet_agent is not None:
+        return jsonify({'success': True, 'mode': MONITOR_MODE, 'agent': fleet_agent.stats()})
+    return jsonify({'success': True, 'mode': MONITOR_MODE, 'data': []})
+
+@app.route('/metrics')
+def metrics():
+    """OpenMetrics格式的指标（工具实例数、内存、进程运行时长、探测延迟、扫描耗时）"""
+    accept = request.headers.get('Accept', '')
+    mimetype = OPENMETRICS_CONTENT_TYPE if 'application/openmetrics-text' in accept else PROMETHEUS_CONTENT_TYPE
+    response = send_cached(metrics_responses.get(), mimetype)
+    response.headers['Vary'] = 'Accept, Accept-Encoding'
+    return response
+
+@app.route('/api/internal/perf')
+def internal_perf():
+    """扫描循环各阶段耗时的 p50/p95/p99 和每轮遍历、匹配的进程数"""
+    report = dict(scanner_status('perf') or {})
+    report['success'] = True
+    return jsonify(report)
+
+@app.route('/api/history')
+def get_resource_history():
+    """工具或进程的资源使用历史（内存MB、CPU%、实例数），按时间分桶降采样"""
+    tool = request.args.get('tool')
+    pid = request.args.get('pid', type=int)
+    window = request.args.get('window', default=3600, type=int)
+    points = request.args.get('points', default=120, type=int)
+
+    if tool is None and pid is None:
+        tools = set(scanner_status('history_tools'))
+        if history_store is not None:
+            tools.update(history_store.tools())
+        return jsonify({'success': True, 'tools': sorted(tools)})
+    if not 0 < window <= HISTORY_MAX_WINDOW or not 0 < points <= HISTORY_MAX_POINTS:
         return jsonify({
-            'success': True,
-            'message': 'MCP服务重启命令已发送，请重启Cursor使配置生效'
-        })
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+            'success': False,
+            'error': f'window需在1-{HISTORY_MAX_WINDOW}秒之间，points需在1-{HISTORY_MAX_POINTS}之间'
+        }), 400
+
+    history = None
+    # 内存中的时间序列在扫描进程里，工作进程只能查询历史数据库
+    memory_window = 0 if MONITOR_ROLE == 'worker' else HISTORY_MEMORY_WINDOW
+    if pid is None and window > memory_window and history_store is not None:
+        history = history_store.query(tool, window=window, points=points)
+    if history is None:
+        history = resource_history.query(tool=tool, pid=pid, window=window, points=points)
+    if history is None:
+        return jsonify({'success': False, 'error': '没有该工具或进程的历史数据'}), 404
+    return jsonify({'success': True, 'data': history})
+
+@app.route('/api/history/lifecycle')
+def get_process_lifecycle():
+    """窗口内出现过的MCP服务单元：启动、退出时间和内存峰值（需要历史数据库）"""
+    if history_store is None:
+        return jsonify({'success': False, 'error': '未启用历史数据库'}), 404
+    window = request.args.get('window', default=86400, type=int)
+    if not 0 < window <= HISTORY_MAX_WINDOW:
+        return jsonify({'success': False, 'error': f'window需在1-{HISTORY_MAX_WINDOW}秒之间'}), 400
+    return jsonify({
+        'success': True,
+        'data': history_store.lifecycle(tool=request.args.get('tool'), window=window)
+    })
 
 @app.route('/api/ai-services')
 def get_ai_services():
     """获取AI服务状态"""
-    ai_services = check_ai_service_status()
     return jsonify({
         'success': True,
-        'data': ai_services,
+        'data': scanner_status('ai_services'),
+        'probes': scanner_status('probes'),
         'timestamp': datetime.now().isoformat()
     })
 
 @app.route('/api/health')
 def health_check():
-    return jsonify({
+    snapshot = status_publisher.current
+    health = {
         'success': True,
         'message': 'MCP实时监控系统运行正常',
         'version': '1.0.0 - Live Monitoring',
-        'running_tools': len(system_status['running_tools']),
-        'configured_tools': len(system_status['configured_tools']),
-        'last_update': system_status['last_update']
-    })
+        'running_tools': len(snapshot.running_tools),
+        'configured_tools': len(snapshot.configured_tools),
+        'last_update': snapshot.last_update,
+        'snapshot_version': snapshot.version,
+        # 第一轮扫描完成前（或工作进程尚未读到扫描进程的快照）为true
+        'warming': snapshot.version == 0,
+        'config_version': snapshot.config_version,
+        'stream_subscribers': stream_subscribers,
+        'role': MONITOR_ROLE,
+        'pid': os.getpid(),
+        'static_assets': dashboard_assets.stats(),
+        'process_control': process_control.stats(),
+        'mcp_restart': mcp_restarter.stats()
+    }
+    health.update(scanner_status('health') or {})
+    return jsonify(health)
+
+def serve_workers(port, count):
+    """扫描进程：监听端口并启动count个工作进程共享这个监听socket，退出时一并终止"""
+    listener = socket.create_server(('0.0.0.0', port), backlog=1024)
+    listener.set_inheritable(True)
+    env = dict(os.environ, MCP_MONITOR_ROLE='worker', MCP_MONITOR_SHM_NAME=SHARED_SNAPSHOT_NAME,
+               MCP_MONITOR_LISTEN_FD=str(listener.fileno()))
+    env.pop('MCP_MONITOR_WORKERS', None)
+    start_monitor()
+
+    # 等扫描进程写入第一帧再接受请求
+    deadline = time.monotonic() + 30
+    while shared_snapshot_writer.writes == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    def spawn():
+        return subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=env,
+                                pass_fds=(listener.fileno(),))
+
+    workers = [spawn() for _ in range(count)]
+    # 被 systemd/kill 终止时同样清理工作进程和共享内存
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        while True:
+            time.sleep(1)
+            for index, worker in enumerate(workers):
+                if worker.poll() is not None:
+                    print(f"⚠️ 工作进程 {worker.pid} 退出（{worker.returncode}），重新启动")
+                    workers[index] = spawn()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            try:
+                worker.wait(5)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+        listener.close()
+        shared_snapshot_writer.close()
+
+def serve(port, fd=None):
+    """监听端口（或使用继承的监听socket）后再启动后台组件，第一轮扫描完成前API返回预热快照"""
+    from werkzeug.serving import make_server
+
+    server = make_server('0.0.0.0', port, app, threaded=True, fd=fd)
+    if MONITOR_ROLE == 'worker':
+        # 找不到共享快照时应直接退出
+        start_monitor()
+    else:
+        # 端口已可用，打开数据源和历史数据库等不推迟开始服务
+        threading.Thread(target=start_monitor, name='monitor-start', daemon=True).start()
+    server.serve_forever()
+
+def serve_worker(port):
+    """工作进程：在继承的监听socket上提供HTTP服务（单独启动时自行监听）"""
+    fd = os.environ.get('MCP_MONITOR_LISTEN_FD')
+    serve(port, int(fd) if fd else None)
 
 if __name__ == '__main__':
-    print("🚀 启动MCP工具实时监控系统...")
-    print("📍 访问地址: http://localhost:5002")
-    print(f"🔧 当前运行工具: {len(get_running_mcp_tools())}个")
-    print(f"⚙️ 配置工具: {len(get_configured_tools())}个")
-    
-    app.run(debug=False, host='0.0.0.0', port=5002)
\ No newline at end of file
+    port = MONITOR_PORT
+    if MONITOR_ROLE == 'worker':
+        serve_worker(port)
+    elif MONITOR_ROLE == 'scanner':
+        print("🚀 启动MCP工具实时监控系统（多进程模式）...")
+        print(f"📍 访问地址: http://localhost:{port}")
+        if WORKER_COUNT > 1:
+            print(f"🧵 1个扫描进程 + {WORKER_COUNT}个工作进程，快照共享内存: {SHARED_SNAPSHOT_NAME}")
+            serve_workers(port, WORKER_COUNT)
+        else:
+            # 只运行扫描，由外部启动的工作进程提供HTTP服务
+            start_monitor()
+            print(f"🧵 扫描进程已启动，快照共享内存: {SHARED_SNAPSHOT_NAME}")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                shared_snapshot_writer.close()
+    elif MONITOR_MODE == 'agent':
+        # agent只运行扫描和上传，不提供HTTP服务
+        start_monitor()
+        print(f"🛰️ MCP监控agent启动: 主机 {fleet_agent.host} -> {fleet_agent.url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            fleet_agent.stop()
+    else:
+        print("🚀 启动MCP工具实时监控系统...")
+        print(f"📍 访问地址: http://localhost:{port}")
+        if MONITOR_MODE == 'collector':
+            print("🗄️ collector模式: 汇总各agent上传的状态")
+        serve(port)
\ No newline at end of file
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+并行重启MCP服务
+每个选中的服务在各自的线程中：终止正在运行的全部实例（SIGTERM，宽限期后SIGKILL），
+按 mcp.json 中的 command/args/env 重新启动，等待就绪（进程存活超过稳定期，配置了健康检查地址时还需返回2xx）。
+各服务同时进行，一次重启的总耗时等于最慢的那个服务；每个服务的重启耗时计入直方图并保留最近的重启记录。
+
+只有能通过网络访问的服务（配置了 healthEndpoint 或 url）由本服务重新启动。
+stdio类服务由MCP客户端启动并通过自己的stdin/stdout通信，本服务启动的实例没有客户端连接，
+所以只终止旧实例（状态 stopped），由客户端在下次连接时重新启动
+"""
+
+import fcntl
+import json
+import os
+import subprocess
+import threading
+import time
+import urllib.request
+import uuid
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+
+import psutil
+
+from histogram import LatencyHistogram
+from process_control import CREATE_TIME_TOLERANCE
+
+# 终止旧实例的宽限期（秒），之后升级为SIGKILL
+STOP_GRACE = 5.0
+# 新进程启动后至少存活这么久才算就绪（秒）：命令写错、依赖缺失的服务通常在这段时间内退出
+SETTLE_TIME = 1.0
+# 等待就绪的上限（秒），包括 npx 首次下载包的时间
+READY_TIMEOUT = 60.0
+# 就绪检查的轮询间隔和单次健康检查超时（秒）
+READY_POLL_INTERVAL = 0.05
+HEALTH_TIMEOUT = 1.0
+# 保留的重启记录数
+MAX_HISTORY = 50
+# 重启耗时直方图的桶上界（秒）
+RESTART_BOUNDS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+
+# 单个服务的结果: ready(已就绪) / stopped(stdio服务，旧实例已终止，等待客户端重新启动) / exited(启动后退出)
+#                 timeout(期限内未就绪) / spawn_failed(无法启动) / stop_failed(旧实例无法终止)
+
+
+def server_spec(server_name, server_config, tool_type=None, health_endpoint=None):
+    """把 mcp.json 中的一个服务配置整理为重启所需的信息"""
+    return {
+        'server_name': server_name,
+        'tool_type': tool_type,
+        'command': server_config.get('command', ''),
+        'args': list(server_config.get('args', [])),
+        'env': dict(server_config.get('env') or {}),
+        'cwd': server_config.get('cwd'),
+        'url': server_config.get('url'),
+        # mcp.json 中的 healthEndpoint 优先，其次是工具映射表中的 health_endpoint
+        'health_endpoint': server_config.get('healthEndpoint') or health_endpoint
+    }
+
+
+def respawns(spec):
+    """是否由本服务重新启动：只有客户端通过网络连接的服务才能在没有客户端的情况下独立运行"""
+    return bool(spec['health_endpoint'] or spec['url'])
+
+
+def is_running(pid, create_time):
+    """PID仍是当初启动的那个进程（未退出，也未被复用）"""
+    try:
+        proc = psutil.Process(pid)
+        return proc.status() != psutil.STATUS_ZOMBIE and abs(proc.create_time() - create_time) <= CREATE_TIME_TOLERANCE
+    except psutil.Error:
+        return False
+
+
+def check_health(url, timeout=HEALTH_TIMEOUT):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return 200 <= response.status < 300
+    except (OSError, ValueError):
+        return False
+
+
+class RestartJob:
+    """一次重启：每个服务一条结果，由各服务的线程写入"""
+
+    def __init__(self, specs):
+        self.id = uuid.uuid4().hex[:12]
+        self.state = 'running'
+        self.created = time.time()
+        self.finished = None
+        self.results = OrderedDict(
+            (spec['server_name'], {'server_name': spec['server_name'], 'tool_type': spec['tool_type'],
+                                   'status': 'stopping'})
+            for spec in specs
+        )
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def update(self, server_name, **fields):
+        with self._lock:
+            self.results[server_name].update(fields)
+
+    def finish(self):
+        self.finished = time.time()
+        self.state = 'done'
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """等待全部服务完成，返回是否已完成"""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        with self._lock:
+            results = [dict(result) for result in self.results.values()]
+        totals = [result['total_ms'] for result in results if 'total_ms' in result]
+        return {
+            'id': self.id,
+            'state': self.state,
+            'created': self.created,
+            'finished': self.finished,
+            'duration_ms': round((self.finished - self.created) * 1000, 1) if self.finished else None,
+            # 并行重启时总耗时应接近最慢的服务，而不是各服务之和
+            'slowest_ms': max(totals) if totals else None,
+            'sum_ms': round(sum(totals), 1) if totals else None,
+            'ready': sum(1 for result in results if result['status'] == 'ready'),
+            'stopped': sum(1 for result in results if result['status'] == 'stopped'),
+            'servers': results
+        }
+
+
+class SpawnRegistry:
+    """
+    本服务启动的MCP进程 {服务名: (PID, 创建时间)}，下次重启时一并终止。
+    path 为None时只保存在内存中；多工作进程模式下各工作进程共用同一个文件（flock 加锁），
+    任一工作进程发起的重启都能找到其他工作进程启动的实例，同一时刻也只有一个工作进程在重启
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._running_file = None
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return {name: tuple(entry) for name, entry in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp, self.path)
+
+    @contextmanager
+    def _update(self):
+        with self._lock:
+            if self.path is None:
+                yield self._entries
+                return
+            with open(self.path + '.lock', 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                entries = self._read()
+                yield entries
+                self._write(entries)
+
+    def put(self, name, pid, create_time):
+        with self._update() as entries:
+            entries[name] = (pid, create_time)
+
+    def pop(self, name):
+        with self._update() as entries:
+            return entries.pop(name, None)
+
+    def entries(self):
+        with self._update() as entries:
+            return dict(entries)
+
+    def begin(self):
+        """占用重启锁，其他工作进程正在重启时返回False；调用方保证同一进程内不重复占用"""
+        if self.path is None:
+            return True
+        running = open(self.path + '.running', 'a')
+        try:
+            fcntl.flock(running, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            running.close()
+            return False
+        self._running_file = running
+        return True
+
+    def end(self):
+        if self._running_file is not None:
+            self._running_file.close()
+            self._running_file = None
+
+
+class McpRestarter:
+    """
+    MCP服务重启器
+    find_pids(spec) 返回该服务当前运行实例的全部进程 {PID: 创建时间}；process_control 核对创建时间后终止它们。
+    重新启动的进程在独立的会话中运行（stdin为/dev/null），不随监控服务或工作进程退出，
+    其 (PID, 创建时间) 记录在 registry 中，下次重启时由任一工作进程终止
+    """
+
+    def __init__(self, process_control, find_pids, on_finish=None, stop_grace=STOP_GRACE,
+                 settle_time=SETTLE_TIME, ready_timeout=READY_TIMEOUT, max_history=MAX_HISTORY, registry=None):
+        self.process_control = process_control
+        self.find_pids = find_pids
+        # on_finish(job) 在全部服务完成后调用（如触发一轮扫描）
+        self.on_finish = on_finish
+        self.stop_grace = stop_grace
+        self.settle_time = settle_time
+        self.ready_timeout = ready_timeout
+        self.restarts = 0
+        # 服务名 -> 重启耗时直方图（只统计成功就绪的重启）
+        self.latency = {}
+        self._history = deque(maxlen=max_history)
+        self.registry = registry or SpawnRegistry()
+        # PID -> 本进程启动的子进程，退出后回收
+        self._children = {}
+        self._running = None
+        self._lock = threading.Lock()
+
+    def submit(self, specs):
+        """开始一次重启；已有重启在进行时抛出 RuntimeError"""
+        if not specs:
+            raise ValueError('没有要重启的MCP服务')
+        with self._lock:
+            if self._running is not None:
+                raise RuntimeError(f'重启任务 {self._running.id} 正在进行')
+            if not self.registry.begin():
+                raise RuntimeError('其他工作进程正在重启MCP服务')
+            job = RestartJob(specs)
+            self._running = job
+            self._history.append(job)
+            self.restarts += 1
+        threading.Thread(target=self._run, args=(job, specs), name=f'restart-{job.id}', daemon=True).start()
+        return job
+
+    def _run(self, job, specs):
+        started = time.monotonic()
+        threads = [
+            threading.Thread(target=self._restart_server, args=(job, spec, started),
+                             name=f'restart-{spec["server_name"]}', daemon=True)
+            for spec in specs
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with self._lock:
+            self.registry.end()
+            self._running = None
+        job.finish()
+        if self.on_finish is not None:
+            self.on_finish(job)
+
+    def _restart_server(self, job, spec, started):
+        name = spec['server_name']
+
+        def elapsed_ms():
+            return round((time.monotonic() - started) * 1000, 1)
+
+        # 1. 终止旧实例（包括上次由本服务启动的进程，可能来自其他工作进程）
+        identities = dict(self.find_pids(spec))
+        previous = self.registry.pop(name)
+        if previous is not None:
+            identities[previous[0]] = previous[1]
+        job.update(name, stopped_pids=sorted(identities))
+        if identities:
+            stop = self.process_control.submit(identities, self.stop_grace, target={'restart': name},
+                                               identities=identities)
+            stop.wait()
+            outcome = stop.to_dict()
+            job.update(name, stop_summary=outcome['summary'])
+            if any(status in outcome['summary'] for status in ('denied', 'survived')):
+                if previous is not None and is_running(*previous):
+                    self.registry.put(name, *previous)
+                job.update(name, status='stop_failed', error='旧实例无法终止', total_ms=elapsed_ms())
+                return
+        self._reap()
+        job.update(name, stop_ms=elapsed_ms())
+
+        if not respawns(spec):
+            job.update(name, status='stopped', total_ms=elapsed_ms(),
+                       message='stdio服务由MCP客户端在下次连接时重新启动')
+            return
+        job.update(name, status='starting')
+
+        # 2. 按配置重新启动
+        try:
+            proc = subprocess.Popen(
+                [spec['command']] + spec['args'],
+                env=dict(os.environ, **spec['env']),
+                cwd=spec['cwd'] or os.path.expanduser('~'),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+        except (OSError, ValueError) as e:
+            job.update(name, status='spawn_failed', error=str(e), total_ms=elapsed_ms())
+            return
+        with self._lock:
+            self._children[proc.pid] = proc
+        try:
+            self.registry.put(name, proc.pid, psutil.Process(proc.pid).create_time())
+        except psutil.NoSuchProcess:
+            # 已经退出，由下面的就绪检查报告
+            pass
+        spawned = time.monotonic()
+        job.update(name, pid=proc.pid, spawn_ms=elapsed_ms())
+
+        # 3. 等待就绪
+        status, error = self._wait_ready(proc, spec['health_endpoint'], spawned)
+        total_ms = elapsed_ms()
+        job.update(name, status=status, total_ms=total_ms, ready_ms=round((time.monotonic() - spawned) * 1000, 1),
+                   **({'error': error} if error else {}))
+        if status == 'ready':
+            with self._lock:
+                histogram = self.latency.setdefault(name, LatencyHistogram(RESTART_BOUNDS))
+                histogram.observe(total_ms / 1000)
+
+    def _wait_ready(self, proc, health_endpoint, spawned):
+        """返回 (状态, 错误信息)"""
+        deadline = spawned + self.ready_timeout
+        while True:
+            code = proc.poll()
+            if code is not None:
+                return 'exited', f'进程启动后退出（退出码 {code}）'
+            now = time.monotonic()
+            if now - spawned >= self.settle_time and (health_endpoint is None or check_health(health_endpoint)):
+                return 'ready', None
+            if now >= deadline:
+                return 'timeout', f'{self.ready_timeout:g}秒内未就绪'
+            time.sleep(READY_POLL_INTERVAL)
+
+    def _reap(self):
+        """回收已退出的子进程"""
+        with self._lock:
+            for pid, proc in list(self._children.items()):
+                if proc.poll() is not None:
+                    del self._children[pid]
+
+    def get(self, job_id):
+        with self._lock:
+            jobs = list(self._history)
+        for job in jobs:
+            if job.id == job_id:
+                return job
+        return None
+
+    def recent(self, limit=20):
+        """最近的重启，新的在前"""
+        with self._lock:
+            jobs = list(self._history)
+        return jobs[::-1][:limit]
+
+    def stats(self):
+        self._reap()
+        with self._lock:
+            latency = {name: histogram.summary() for name, histogram in self.latency.items()}
+            running = self._running.id if self._running is not None else None
+        return {
+            'restarts': self.restarts,
+            'running': running,
+            'spawned': {name: entry[0] for name, entry in self.registry.entries().items() if is_running(*entry)},
+            'latency': latency
+        }
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+OpenMetrics 导出
+/metrics 的文本内容只由快照和探测/扫描直方图生成，每个快照版本渲染一次并缓存，
+频繁抓取只是返回同一份字节，不会触发额外的进程遍历或重新渲染
+"""
+
+import threading
+import time
+
+from status_snapshot import CachedResponse
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+# 不支持OpenMetrics的抓取方按Prometheus文本格式解析，内容兼容
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+METRIC_PREFIX = 'mcp_monitor_'
+
+BYTES_PER_MB = 1024 * 1024
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label_value(value)}"' for key, value in labels.items()) + '}'
+
+
+class OpenMetricsWriter:
+    """按指标族输出 OpenMetrics 文本"""
+
+    def __init__(self, prefix=METRIC_PREFIX):
+        self.prefix = prefix
+        self.lines = []
+
+    def _family(self, name, metric_type, help_text, unit):
+        name = self.prefix + name
+        self.lines.append(f'# TYPE {name} {metric_type}')
+        if unit:
+            self.lines.append(f'# UNIT {name} {unit}')
+        self.lines.append(f'# HELP {name} {help_text}')
+        return name
+
+    def gauge(self, name, help_text, samples, unit=None):
+        """samples: [(标签字典, 数值), ...]"""
+        name = self._family(name, 'gauge', help_text, unit)
+        for labels, value in samples:
+            self.lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+
+    def histogram(self, name, help_text, samples, unit=None):
+        """samples: [(标签字典, LatencyHistogram), ...]"""
+        name = self._family(name, 'histogram', help_text, unit)
+        for labels, histogram in samples:
+            for bound, cumulative in histogram.buckets():
+                bucket_labels = dict(labels, le=format_value(float(bound)))
+                self.lines.append(f'{name}_bucket{format_labels(bucket_labels)} {cumulative}')
+            self.lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+            self.lines.append(f'{name}_sum{format_labels(labels)} {format_value(histogram.total)}')
+
+    def render(self):
+        return ('\n'.join(self.lines) + '\n# EOF\n').encode('utf-8')
+
+
+def render_monitor_metrics(snapshot, probes=None, scan_histogram=None, now=None):
+    """
+    快照对应的指标文本
+    probes: {工具类型: ServiceProbe}，scan_histogram: 扫描线程每轮耗时的 LatencyHistogram
+    """
+    now = time.time() if now is None else now
+    writer = OpenMetricsWriter()
+
+    instances = []
+    tool_rss = []
+    process_rss = []
+    process_uptime = []
+    for tool in snapshot.running_tools:
+        if tool.get('is_ai_service'):
+            continue
+        labels = {'tool': tool['tool_type']}
+        if tool.get('host'):
+            labels['host'] = tool['host']
+        instances.append((labels, tool['instance_count']))
+        rss = 0
+        for process in tool['processes']:
+            process_labels = dict(labels, pid=process['pid'])
+            process_bytes = round(process.get('rss_mb', process['memory_mb']) * BYTES_PER_MB)
+            rss += process_bytes
+            process_rss.append((process_labels, process_bytes))
+            if process.get('start_time') is not None:
+                process_uptime.append((process_labels, round(max(now - process['start_time'], 0.0), 3)))
+        tool_rss.append((labels, rss))
+
+    writer.gauge('tool_instances', 'Running MCP service units per tool', instances)
+    writer.gauge('tool_rss_bytes', 'Resident memory of all processes of a tool', tool_rss, unit='bytes')
+    writer.gauge('process_rss_bytes', 'Resident memory of an MCP service unit (root process and descendants)',
+                 process_rss, unit='bytes')
+    writer.gauge('process_uptime_seconds', 'Seconds since the MCP service unit root process started',
+                 process_uptime, unit='seconds')
+
+    probes = probes or {}
+    writer.gauge('health_probe_up', 'Whether the last health probe of an AI service succeeded',
+                 [({'service': tool_type}, 1 if probe.result.get('available') else 0)
+                  for tool_type, probe in sorted(probes.items())])
+    writer.histogram('health_probe_latency_seconds', 'Round-trip latency of health probes that got a response',
+                     [({'service': tool_type}, probe.histogram) for tool_type, probe in sorted(probes.items())],
+                     unit='seconds')
+
+    if scan_histogram is not None:
+        writer.histogram('scan_duration_seconds', 'Wall-clock duration of one scanner tick',
+                         [({}, scan_histogram)], unit='seconds')
+    writer.gauge('snapshot_version', 'Version of the published status snapshot', [({}, snapshot.version)])
+    writer.gauge('configured_tools', 'MCP servers configured in mcp.json', [({}, len(snapshot.configured_tools))])
+    return writer.render()
+
+
+class MetricsResponses:
+    """当前快照的指标响应，每个快照版本只渲染一次"""
+
+    def __init__(self, publisher, render, name='metrics'):
+        # render(snapshot) -> 指标文本字节
+        self.publisher = publisher
+        self.render = render
+        self.name = name
+        self.renders = 0
+        self._lock = threading.Lock()
+        self._cached = None
+
+    def get(self):
+        snapshot = self.publisher.current
+        # 多进程模式下指标由扫描进程渲染，随快照一起发布
+        published = snapshot.responses.get(self.name)
+        if published is not None:
+            return published
+        cached = self._cached
+        if cached is not None and cached.version == snapshot.version:
+            return cached
+        with self._lock:
+            # 并发抓取时只有第一个请求渲染
+            cached = self._cached
+            if cached is None or cached.version != snapshot.version:
+                cached = CachedResponse(self.name, self.render(snapshot), snapshot.version, self.publisher.epoch)
+                self.renders += 1
+                self._cached = cached
+        return cached
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Linux进程事件监听
+通过netlink proc connector订阅内核的 fork/exec/exit 事件，
+让监控在MCP服务启动或退出的瞬间触发扫描，而不必等待下一个轮询周期。
+需要CAP_NET_ADMIN权限（通常为root），不满足时调用方退回轮询模式。
+"""
+
+import errno
+import os
+import socket
+import struct
+import sys
+import threading
+
+# <linux/netlink.h> / <linux/connector.h> / <linux/cn_proc.h>
+NETLINK_CONNECTOR = 11
+NLMSG_DONE = 3
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+
+NLMSGHDR = struct.Struct('=IHHII')        # len, type, flags, seq, pid
+CN_MSG = struct.Struct('=IIIIHH')          # idx, val, seq, ack, len, flags
+PROC_EVENT_HEADER = struct.Struct('=IIQ')  # what, cpu, timestamp_ns
+FORK_EVENT = struct.Struct('=IIII')        # parent_pid, parent_tgid, child_pid, child_tgid
+EXEC_EVENT = struct.Struct('=II')          # process_pid, process_tgid
+EXIT_EVENT = struct.Struct('=II')          # process_pid, process_tgid（后面还有退出码，不需要）
+
+EVENT_NAMES = {
+    PROC_EVENT_FORK: 'fork',
+    PROC_EVENT_EXEC: 'exec',
+    PROC_EVENT_EXIT: 'exit'
+}
+
+
+def build_control_message(op):
+    """构造订阅/取消订阅proc事件的netlink消息"""
+    payload = struct.pack('=I', op)
+    cn_msg = CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+    header = NLMSGHDR.pack(NLMSGHDR.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+    return header + cn_msg
+
+
+def parse_proc_events(data):
+    """
+    解析一个netlink数据报，返回 [(事件名, pid), ...]
+    fork事件给出子进程，exec/exit只保留进程级（线程组leader）事件
+    """
+    events = []
+    offset = 0
+    while offset + NLMSGHDR.size <= len(data):
+        msg_len = NLMSGHDR.unpack_from(data, offset)[0]
+        if msg_len < NLMSGHDR.size:
+            break
+
+        body = offset + NLMSGHDR.size + CN_MSG.size
+        if body + PROC_EVENT_HEADER.size <= offset + msg_len:
+            what = PROC_EVENT_HEADER.unpack_from(data, body)[0]
+            event_data = body + PROC_EVENT_HEADER.size
+            if what == PROC_EVENT_FORK:
+                _, _, child_pid, child_tgid = FORK_EVENT.unpack_from(data, event_data)
+                if child_pid == child_tgid:
+                    events.append(('fork', child_tgid))
+            elif what in (PROC_EVENT_EXEC, PROC_EVENT_EXIT):
+                layout = EXEC_EVENT if what == PROC_EVENT_EXEC else EXIT_EVENT
+                pid, tgid = layout.unpack_from(data, event_data)
+                if pid == tgid:
+                    events.append((EVENT_NAMES[what], tgid))
+
+        # netlink消息按4字节对齐
+        offset += (msg_len + 3) & ~3
+    return events
+
+
+class ProcEventListener:
+    def __init__(self, on_event):
+        # on_event(事件名, pid) 在监听线程中调用，应尽快返回
+        self.on_event = on_event
+        self.active = False
+        self.error = None
+        self.event_count = 0
+        self._sock = None
+        self._thread = None
+
+    @staticmethod
+    def available():
+        return sys.platform.startswith('linux') and hasattr(socket, 'AF_NETLINK')
+
+    def start(self):
+        """订阅进程事件，成功返回True；平台不支持或权限不足时返回False"""
+        if not self.available():
+            self.error = '当前平台不支持netlink proc connector'
+            return False
+
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        except OSError as e:
+            self.error = f'创建netlink套接字失败: {e}'
+            return False
+
+        try:
+            sock.bind((os.getpid(), CN_IDX_PROC))
+            sock.send(build_control_message(PROC_CN_MCAST_LISTEN))
+        except OSError as e:
+            # 缺少CAP_NET_ADMIN时bind/send返回EPERM
+            sock.close()
+            self.error = f'订阅进程事件失败: {e}'
+            return False
+
+        self._sock = sock
+        self.active = True
+        self._thread = threading.Thread(target=self._run, name='proc-events', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.active = False
+        if self._sock is not None:
+            try:
+                self._sock.send(build_control_message(PROC_CN_MCAST_IGNORE))
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+
+    def _run(self):
+        while self.active:
+            try:
+                data = self._sock.recv(65536)
+            except OSError as e:
+                if not self.active:
+                    break
+                # ENOBUFS表示内核事件过多导致丢弃，继续接收即可；下一轮轮询会兜底
+                if e.errno == errno.ENOBUFS:
+                    continue
+                self.error = f'接收进程事件失败: {e}'
+                self.active = False
+                break
+
+            for event, pid in parse_proc_events(data):
+                self.event_count += 1
+                try:
+                    self.on_event(event, pid)
+                except Exception as e:
+                    print(f"处理进程事件失败: {e}")
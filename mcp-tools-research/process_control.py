@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+批量进程控制
+一次请求终止一批进程：同时发送SIGTERM，用 psutil.wait_procs 在期限内等待全部退出，
+期限后仍存活的升级为SIGKILL。每批作为一个后台任务执行，按任务ID轮询每个PID的结果。
+目标来自扫描快照时附带各进程的创建时间，发送信号前核对，快照之后退出并被复用的PID不会被误杀
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import psutil
+
+# SIGTERM后等待退出的默认期限和上限（秒）
+DEFAULT_GRACE = 5.0
+MAX_GRACE = 60.0
+# SIGKILL后等待内核回收的期限（秒）
+KILL_TIMEOUT = 3.0
+# 等待期间检查僵尸进程的间隔（秒）：父进程尚未回收的进程已经退出，不必等到期限
+ZOMBIE_CHECK_INTERVAL = 0.25
+# 保留的任务数量（超出时丢弃最早完成的任务）和单个任务的PID上限
+MAX_JOBS = 100
+MAX_PIDS = 1000
+# 核对创建时间的容差（秒）：/proc 的启动时刻精度为一个时钟滴答
+CREATE_TIME_TOLERANCE = 0.05
+
+# 结束状态: terminated(SIGTERM后退出) / killed(SIGKILL后退出) / gone(开始时已不存在)
+#           replaced(PID已被其他进程复用，未发送信号) / denied(无权发送信号)
+#           protected(拒绝操作的系统进程或监控自身) / survived(SIGKILL后仍未退出)
+FINAL_STATUSES = ('terminated', 'killed', 'gone', 'replaced', 'denied', 'protected', 'survived')
+
+
+def protected_pids():
+    """不允许终止的进程：内核/init 和监控服务自身及其父进程"""
+    return {0, 1, os.getpid(), os.getppid()}
+
+
+def is_zombie(proc):
+    try:
+        return proc.status() == psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return True
+    except psutil.AccessDenied:
+        return False
+
+
+def wait_exited(procs, deadline, on_exit):
+    """等待一批进程退出直到deadline（time.monotonic()），返回仍存活的进程"""
+    alive = list(procs)
+    while alive:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        _, alive = psutil.wait_procs(alive, timeout=min(ZOMBIE_CHECK_INTERVAL, remaining), callback=on_exit)
+        still_alive = []
+        for proc in alive:
+            if is_zombie(proc):
+                on_exit(proc)
+            else:
+                still_alive.append(proc)
+        alive = still_alive
+    return alive
+
+
+class TerminateJob:
+    """一批进程的终止任务；结果由任务线程写入，其他线程通过 to_dict() 读取"""
+
+    def __init__(self, pids, grace=DEFAULT_GRACE, target=None, identities=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.grace = grace
+        # PID -> 快照中记录的创建时间，不在其中的PID不核对
+        self.identities = identities or {}
+        # 请求中的选择条件（pids / tool_type / tree），原样返回给客户端
+        self.target = target or {}
+        self.state = 'pending'
+        self.created = time.time()
+        self.finished = None
+        self.outcomes = OrderedDict((pid, {'pid': pid, 'status': 'pending'}) for pid in pids)
+        self._started = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _set(self, pid, status, **fields):
+        with self._lock:
+            outcome = self.outcomes[pid]
+            outcome['status'] = status
+            if status in FINAL_STATUSES:
+                outcome['elapsed_ms'] = round((time.monotonic() - self._started) * 1000, 1)
+            outcome.update(fields)
+
+    def run(self, kill_timeout=KILL_TIMEOUT):
+        self._started = time.monotonic()
+        self.state = 'running'
+        protected = protected_pids()
+
+        # 同时向全部进程发送SIGTERM
+        procs = []
+        for pid in self.outcomes:
+            if pid in protected:
+                self._set(pid, 'protected')
+                continue
+            try:
+                proc = psutil.Process(pid)
+                expected = self.identities.get(pid)
+                if expected is not None and abs(proc.create_time() - expected) > CREATE_TIME_TOLERANCE:
+                    self._set(pid, 'replaced')
+                    continue
+                name = proc.name()
+                proc.terminate()
+            except psutil.NoSuchProcess:
+                self._set(pid, 'gone')
+                continue
+            except psutil.AccessDenied:
+                self._set(pid, 'denied')
+                continue
+            self._set(pid, 'terminating', name=name)
+            procs.append(proc)
+
+        def exited(status):
+            # wait_procs 只能取到本进程子进程的退出码，其他进程为None
+            return lambda proc: self._set(proc.pid, status, exit_code=getattr(proc, 'returncode', None))
+
+        alive = wait_exited(procs, self._started + self.grace, exited('terminated'))
+
+        # 期限内未退出的升级为SIGKILL
+        killing = []
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.NoSuchProcess:
+                self._set(proc.pid, 'terminated')
+                continue
+            except psutil.AccessDenied:
+                self._set(proc.pid, 'denied')
+                continue
+            self._set(proc.pid, 'killing')
+            killing.append(proc)
+        for proc in wait_exited(killing, time.monotonic() + kill_timeout, exited('killed')):
+            self._set(proc.pid, 'survived')
+
+        self.finished = time.time()
+        self.state = 'done'
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """等待任务完成，返回是否已完成"""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        with self._lock:
+            outcomes = [dict(outcome) for outcome in self.outcomes.values()]
+        summary = {}
+        for outcome in outcomes:
+            summary[outcome['status']] = summary.get(outcome['status'], 0) + 1
+        return {
+            'id': self.id,
+            'state': self.state,
+            'target': self.target,
+            'grace': self.grace,
+            'created': self.created,
+            'finished': self.finished,
+            'duration_ms': round((self.finished - self.created) * 1000, 1) if self.finished else None,
+            'summary': summary,
+            'processes': outcomes
+        }
+
+
+class ProcessControl:
+    """终止任务的登记处：每个任务一个后台线程，保留最近的任务供查询"""
+
+    def __init__(self, on_finish=None, max_jobs=MAX_JOBS, kill_timeout=KILL_TIMEOUT):
+        # on_finish(job) 在任务线程中调用（如触发一轮扫描，让快照尽快反映进程退出）
+        self.on_finish = on_finish
+        self.max_jobs = max_jobs
+        self.kill_timeout = kill_timeout
+        self.submitted = 0
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, pids, grace=DEFAULT_GRACE, target=None, identities=None):
+        """identities: {PID: 创建时间}，发送信号前核对，不一致时记为 replaced"""
+        pids = sorted(set(pids))
+        if not pids:
+            raise ValueError('没有要终止的进程')
+        if len(pids) > MAX_PIDS:
+            raise ValueError(f'单个任务最多终止{MAX_PIDS}个进程')
+        if not 0 <= grace <= MAX_GRACE:
+            raise ValueError(f'grace需在0-{MAX_GRACE:g}秒之间')
+
+        job = TerminateJob(pids, grace, target, identities)
+        with self._lock:
+            self._jobs[job.id] = job
+            self.submitted += 1
+            # 丢弃最早完成的任务，未完成的任务保留
+            for job_id in [job_id for job_id, old in self._jobs.items() if old.state == 'done']:
+                if len(self._jobs) <= self.max_jobs:
+                    break
+                del self._jobs[job_id]
+        threading.Thread(target=self._run, args=(job,), name=f'terminate-{job.id}', daemon=True).start()
+        return job
+
+    def _run(self, job):
+        try:
+            job.run(self.kill_timeout)
+        finally:
+            if self.on_finish is not None:
+                self.on_finish(job)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def recent(self, limit=20):
+        """最近的任务，新任务在前"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return jobs[::-1][:limit]
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.state != 'done')
+        return {'submitted': self.submitted, 'running': running, 'retained': len(self._jobs)}
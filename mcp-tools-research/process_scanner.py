@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+MCP进程增量扫描器
+按 (pid, create_time) 缓存每个进程的分类结果和静态属性，
+每轮扫描只读取新进程的命令行，已知MCP进程只刷新内存等易变字段
+"""
+
+import threading
+import time
+
+from process_sources import ProcessGone, create_process_source
+from process_tree import build_units
+
+
+class ProcessRecord:
+    """MCP进程的缓存记录"""
+
+    __slots__ = ('pid', 'create_time', 'cmdline', 'tool_type', 'rss',
+                 'cpu_time', 'cpu_sampled_at', 'cpu_percent')
+
+    def __init__(self, pid, create_time, cmdline, tool_type):
+        self.pid = pid
+        self.create_time = create_time
+        self.cmdline = cmdline
+        self.tool_type = tool_type
+        self.rss = 0
+        # 累计CPU秒数及其采样时刻，两次采样之差得出CPU占用率
+        self.cpu_time = None
+        self.cpu_sampled_at = None
+        self.cpu_percent = 0.0
+
+    def update_usage(self, rss, cpu_time, now):
+        """刷新内存和CPU占用率（相对上一次刷新，单核100%）"""
+        self.rss = rss
+        if self.cpu_time is not None and now > self.cpu_sampled_at:
+            self.cpu_percent = max(0.0, (cpu_time - self.cpu_time) / (now - self.cpu_sampled_at) * 100)
+        self.cpu_time = cpu_time
+        self.cpu_sampled_at = now
+
+
+class ProcessScanner:
+    def __init__(self, classify, source=None, footprint=None):
+        # classify(cmdline) 返回工具类型，非MCP进程返回None
+        self.classify = classify
+        self.source = source if source is not None else create_process_source()
+        # 可选的PSS/USS采样器（process_tree.FootprintSampler）
+        self.footprint = footprint
+        # (pid, create_time) -> ProcessRecord，非MCP进程缓存为None
+        self._cache = {}
+        # pid -> (数据源给出的身份提示, 缓存键, 父进程PID)，提示不变时无需重新读取
+        self._hints = {}
+        # MCP服务的非MCP后代进程：(pid, create_time) -> ProcessRecord，用于累计CPU占用率
+        self._members = {}
+        self._units = []
+        # 收到exec事件的PID：进程身份不变但命令行已变，下一轮必须重新分类
+        self._stale = set()
+        self._stale_lock = threading.Lock()
+        self._mcp_pids = frozenset()
+        # 上一轮扫描各阶段的耗时（秒）和进程计数
+        self.last_scan = None
+
+    def invalidate(self, pid):
+        """标记某个PID的缓存失效（可在其他线程调用）"""
+        with self._stale_lock:
+            self._stale.add(pid)
+
+    def is_mcp_pid(self, pid):
+        """上一轮扫描中该PID是否为MCP进程"""
+        return pid in self._mcp_pids
+
+    def mcp_pids(self):
+        """上一轮扫描到的MCP进程PID集合"""
+        return self._mcp_pids
+
+    def units(self):
+        """上一轮扫描得到的MCP服务逻辑单元（process_tree.ProcessUnit）"""
+        return self._units
+
+    def scan(self):
+        """扫描一轮进程表，返回当前运行的MCP进程记录列表"""
+        source = self.source
+        cache = {}
+        hints = {}
+        # pid -> (父进程PID, 创建时间)，用于构建进程树
+        table = {}
+        records = []
+        with self._stale_lock:
+            stale, self._stale = self._stale, set()
+        now = time.monotonic()
+        clock = time.perf_counter
+        started = clock()
+        visited = classified = 0
+        classify_time = usage_time = 0.0
+
+        for pid, hint in source.iter_processes():
+            visited += 1
+            try:
+                known = self._hints.get(pid)
+                if known is not None and known[0] == hint and pid not in stale:
+                    key, ppid = known[1], known[2]
+                else:
+                    identity = source.read_identity(pid)
+                    if identity is None:
+                        # 无权读取创建时间的进程无法确定身份，跳过
+                        continue
+                    create_time, ppid = identity
+                    key = (pid, create_time)
+
+                if key in self._cache and pid not in stale:
+                    record = self._cache[key]
+                else:
+                    lap = clock()
+                    record = self._classify_process(pid, key[1])
+                    classify_time += clock() - lap
+                    classified += 1
+
+                cache[key] = record
+                hints[pid] = (hint, key, ppid)
+                table[pid] = (ppid, key[1])
+                if record is not None:
+                    # 只刷新已知MCP进程的易变字段
+                    lap = clock()
+                    usage = source.read_usage(pid)
+                    if usage is not None:
+                        record.update_usage(usage[0], usage[1], now)
+                    usage_time += clock() - lap
+                    records.append(record)
+            except ProcessGone:
+                pass
+
+        # 丢弃已退出进程的缓存
+        self._cache = cache
+        self._hints = hints
+        self._mcp_pids = frozenset(record.pid for record in records)
+
+        members = {}
+        member_usage_time = 0.0
+
+        def make_member(pid, create_time, tool_type):
+            nonlocal member_usage_time
+            lap = clock()
+            try:
+                return read_member(pid, create_time, tool_type)
+            finally:
+                member_usage_time += clock() - lap
+
+        def read_member(pid, create_time, tool_type):
+            key = (pid, create_time)
+            member = self._members.get(key)
+            if member is None:
+                member = ProcessRecord(pid, create_time, '', tool_type)
+            member.tool_type = tool_type
+            try:
+                usage = source.read_usage(pid)
+            except ProcessGone:
+                return None
+            if usage is not None:
+                member.update_usage(usage[0], usage[1], now)
+            members[key] = member
+            return member
+
+        scanned = clock()
+        self._units = build_units(table, records, make_member)
+        self._members = members
+        built = clock()
+        if self.footprint is not None:
+            self.footprint.sample(self._units)
+        finished = clock()
+
+        self.last_scan = {
+            'visited': visited,
+            'matched': len(records),
+            'classified': classified,
+            # 遍历进程表和读取进程身份：扣除分类和读取资源占用的时间
+            'enumerate': scanned - started - classify_time - usage_time,
+            'classify': classify_time,
+            'usage': usage_time + member_usage_time,
+            'tree': built - scanned - member_usage_time,
+            'footprint': finished - built
+        }
+        return records
+
+    def _classify_process(self, pid, create_time):
+        """读取新进程的命令行并分类"""
+        cmdline = self.source.read_cmdline(pid)
+        tool_type = self.classify(cmdline)
+        if tool_type is None:
+            return None
+        return ProcessRecord(pid, create_time, cmdline, tool_type)
+
+    def cache_size(self):
+        """当前缓存的进程数量"""
+        return len(self._cache)
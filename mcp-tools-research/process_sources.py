@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+进程数据源
+为增量扫描器提供进程表：psutil通用实现，以及直接读取 /proc 的Linux原生实现
+（压测用的合成数据源在 synthetic_source 中）
+"""
+
+import os
+import sys
+
+import psutil
+
+
+class ProcessGone(Exception):
+    """进程在读取过程中已退出"""
+
+
+class PsutilProcessSource:
+    """基于psutil的进程数据源（跨平台，默认兜底）"""
+
+    name = 'psutil'
+
+    def __init__(self):
+        self._procs = {}
+
+    def iter_processes(self):
+        """遍历进程表，产出 (pid, 身份提示)，psutil已读出创建时间，直接用作提示"""
+        # 每轮重建PID -> Process映射，已退出的进程随之丢弃
+        self._procs = procs = {}
+        for proc in psutil.process_iter(['create_time']):
+            create_time = proc.info['create_time']
+            if create_time is None:
+                continue
+            procs[proc.pid] = proc
+            yield proc.pid, create_time
+
+    def _get(self, pid):
+        proc = self._procs.get(pid)
+        if proc is None:
+            try:
+                proc = psutil.Process(pid)
+            except psutil.NoSuchProcess:
+                raise ProcessGone(pid)
+            self._procs[pid] = proc
+        return proc
+
+    def read_cmdline(self, pid):
+        """读取命令行，无权限时返回空字符串"""
+        try:
+            return ' '.join(self._get(pid).cmdline())
+        except (psutil.ZombieProcess, psutil.AccessDenied):
+            # 僵尸进程没有命令行，按非MCP进程处理
+            return ''
+        except psutil.NoSuchProcess:
+            raise ProcessGone(pid)
+
+    def read_identity(self, pid):
+        """读取 (创建时间, 父进程PID)，无权限时返回None"""
+        proc = self._get(pid)
+        try:
+            return proc.create_time(), proc.ppid()
+        except psutil.AccessDenied:
+            return None
+        except psutil.NoSuchProcess:
+            raise ProcessGone(pid)
+
+    def read_usage(self, pid):
+        """读取 (常驻内存字节, 累计CPU秒数)，无权限时返回None"""
+        proc = self._get(pid)
+        try:
+            with proc.oneshot():
+                cpu_times = proc.cpu_times()
+                return proc.memory_info().rss, cpu_times.user + cpu_times.system
+        except psutil.AccessDenied:
+            return None
+        except psutil.NoSuchProcess:
+            raise ProcessGone(pid)
+
+    def read_footprint(self, pid):
+        """读取 (PSS字节, USS字节)，开销较大（需要遍历内存映射）；无权限或平台不支持时返回None"""
+        proc = self._get(pid)
+        try:
+            info = proc.memory_full_info()
+        except (psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+        except psutil.NoSuchProcess:
+            raise ProcessGone(pid)
+        # 非Linux平台没有PSS，用USS近似
+        return getattr(info, 'pss', info.uss), info.uss
+
+
+class ProcFSProcessSource:
+    """
+    直接读取 /proc 的Linux进程数据源
+    遍历时只用 os.scandir 拿到PID和目录inode作为身份提示（不额外stat），
+    stat只在提示变化时读取一次创建时间，cmdline用原始字节读取，内存和CPU时间只对MCP进程读取
+    """
+
+    name = 'procfs'
+
+    def __init__(self, proc_root='/proc'):
+        self.proc_root = proc_root
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.boot_time = self._read_boot_time()
+
+    @staticmethod
+    def available(proc_root='/proc'):
+        return sys.platform.startswith('linux') and os.path.exists(os.path.join(proc_root, 'self', 'stat'))
+
+    def _read_boot_time(self):
+        with open(os.path.join(self.proc_root, 'stat'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime'):
+                    return float(line.split()[1])
+        return 0.0
+
+    def _read(self, pid, name):
+        try:
+            with open(f'{self.proc_root}/{pid}/{name}', 'rb') as f:
+                return f.read()
+        except (FileNotFoundError, ProcessLookupError):
+            raise ProcessGone(pid)
+
+    def iter_processes(self):
+        """
+        遍历进程表，产出 (pid, 身份提示)
+        身份提示是 /proc/<pid> 目录项的inode号，读取它不需要额外的系统调用。
+        它不是进程身份：inode号在目录项进入缓存时分配，内核回收dentry缓存后会变化；
+        扫描器只把它当作"是否需要重新读取创建时间"的提示
+        """
+        with os.scandir(self.proc_root) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.isdigit():
+                    yield int(name), entry.inode()
+
+    def read_cmdline(self, pid):
+        """读取命令行，无权限时返回空字符串"""
+        try:
+            raw = self._read(pid, 'cmdline')
+        except PermissionError:
+            return ''
+        return raw.rstrip(b'\0').replace(b'\0', b' ').decode('utf-8', 'replace')
+
+    def _read_stat_fields(self, pid):
+        raw = self._read(pid, 'stat')
+        # 进程名可能包含空格和括号，从最后一个')'之后开始切分
+        return raw[raw.rindex(b')') + 2:].split()
+
+    def read_identity(self, pid):
+        """读取 (创建时间, 父进程PID)，无权限时返回None"""
+        try:
+            fields = self._read_stat_fields(pid)
+        except PermissionError:
+            return None
+        # 第4个字段 ppid、第22个字段 starttime（开机后的时钟滴答数），切分后下标为1和19
+        return self.boot_time + int(fields[19]) / self.clock_ticks, int(fields[1])
+
+    def read_usage(self, pid):
+        """读取 (常驻内存字节, 累计CPU秒数)，无权限时返回None；只读一次stat"""
+        try:
+            fields = self._read_stat_fields(pid)
+        except PermissionError:
+            return None
+        # utime/stime/rss 为第14、15、24个字段
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / self.clock_ticks
+        return int(fields[21]) * self.page_size, cpu_seconds
+
+    def read_footprint(self, pid):
+        """读取 (PSS字节, USS字节)，开销较大（内核需要遍历内存映射）；无权限或内核不支持时返回None"""
+        try:
+            raw = self._read(pid, 'smaps_rollup')
+        except PermissionError:
+            return None
+        except ProcessGone:
+            # 内核线程没有smaps_rollup，4.14之前的内核也没有
+            if os.path.exists(f'{self.proc_root}/{pid}'):
+                return None
+            raise
+        values = {}
+        for line in raw.splitlines():
+            name, _, rest = line.partition(b':')
+            if name in (b'Pss', b'Private_Clean', b'Private_Dirty'):
+                values[name] = int(rest.split()[0]) * 1024
+        if b'Pss' not in values:
+            return None
+        return values[b'Pss'], values.get(b'Private_Clean', 0) + values.get(b'Private_Dirty', 0)
+
+
+PROCESS_SOURCES = {
+    'psutil': PsutilProcessSource,
+    'procfs': ProcFSProcessSource
+}
+
+
+def create_process_source(name='auto'):
+    """
+    按名称创建进程数据源，auto时优先使用 /proc，不可用时退回psutil；
+    synthetic[:参数] 为压测和基准测试用的合成进程表（见 synthetic_source）
+    """
+    if name and name.split(':', 1)[0] == 'synthetic':
+        from synthetic_source import SyntheticProcessSource
+        return SyntheticProcessSource.from_spec(name.partition(':')[2])
+    if name in (None, '', 'auto'):
+        name = 'procfs' if ProcFSProcessSource.available() else 'psutil'
+    if name not in PROCESS_SOURCES:
+        raise ValueError(f"未知的进程数据源: {name}")
+    if name == 'procfs' and not ProcFSProcessSource.available():
+        print("⚠️ /proc 不可用，进程数据源退回psutil")
+        name = 'psutil'
+    return PROCESS_SOURCES[name]()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+MCP服务进程树
+按PPID把同一个MCP服务的进程（npx包装进程、node子进程、浏览器等后代进程）合并为一个逻辑单元，
+单元的内存按成员合计；可选的PSS/USS采样按时间预算轮流测量成员，
+让共享页面按比例分摊，合计值反映真实占用
+"""
+
+import time
+
+
+class ProcessUnit:
+    """一个MCP服务的逻辑单元：根进程及其全部后代"""
+
+    __slots__ = ('tool_type', 'root', 'members', 'pss', 'uss', 'footprint_complete')
+
+    def __init__(self, tool_type, root):
+        self.tool_type = tool_type
+        self.root = root
+        # 根进程在前，其余成员按PID排序
+        self.members = [root]
+        # 已采样成员的PSS/USS合计（未采样的成员按RSS计入）
+        self.pss = None
+        self.uss = None
+        self.footprint_complete = False
+
+    @property
+    def pid(self):
+        return self.root.pid
+
+    @property
+    def create_time(self):
+        return self.root.create_time
+
+    @property
+    def cmdline(self):
+        return self.root.cmdline
+
+    @property
+    def rss(self):
+        return sum(member.rss for member in self.members)
+
+    @property
+    def cpu_percent(self):
+        return sum(member.cpu_percent for member in self.members)
+
+    @property
+    def memory(self):
+        """对外展示的内存：有PSS采样时用PSS，否则用RSS合计"""
+        return self.pss if self.pss is not None else self.rss
+
+
+def build_units(table, records, make_member):
+    """
+    table: pid -> (ppid, create_time)，本轮扫描到的全部进程
+    records: 本轮的MCP进程记录
+    make_member(pid, create_time, tool_type): 为非MCP后代进程返回一个进程记录（进程已退出时返回None）
+    同类型MCP进程的嵌套（npx -> node）合并到最上层的那个；非MCP进程归入最近的MCP祖先所在单元
+    """
+    mcp = {record.pid: record for record in records}
+    # pid -> 最近的MCP祖先（含自身）PID，没有时为None
+    nearest = {}
+
+    def parent_of(pid):
+        ppid, create_time = table[pid]
+        parent = table.get(ppid)
+        # 父进程已退出且PID被复用时，新进程一定比子进程晚启动
+        if parent is None or parent[1] > create_time:
+            return None
+        return ppid
+
+    def nearest_mcp(pid):
+        chain = []
+        found = None
+        while pid is not None:
+            if pid in nearest:
+                found = nearest[pid]
+                break
+            if pid in mcp:
+                found = pid
+                break
+            chain.append(pid)
+            pid = parent_of(pid)
+        for visited in chain:
+            nearest[visited] = found
+        return found
+
+    # 每个MCP进程的单元根：沿MCP祖先链向上，取最上层的同类型MCP进程
+    unit_root = {}
+    for record in records:
+        root = record.pid
+        ancestor = record.pid
+        while True:
+            parent = parent_of(ancestor)
+            ancestor = nearest_mcp(parent) if parent is not None else None
+            if ancestor is None:
+                break
+            if mcp[ancestor].tool_type == record.tool_type:
+                root = ancestor
+        unit_root[record.pid] = root
+
+    units = {}
+    for record in records:
+        root = unit_root[record.pid]
+        if root not in units:
+            units[root] = ProcessUnit(mcp[root].tool_type, mcp[root])
+        if root != record.pid:
+            units[root].members.append(record)
+
+    for pid, (_, create_time) in table.items():
+        if pid in mcp:
+            continue
+        owner = nearest_mcp(pid)
+        if owner is not None:
+            unit = units[unit_root[owner]]
+            member = make_member(pid, create_time, unit.tool_type)
+            if member is not None:
+                unit.members.append(member)
+
+    for unit in units.values():
+        unit.members[1:] = sorted(unit.members[1:], key=lambda member: member.pid)
+    return list(units.values())
+
+
+class FootprintSampler:
+    """
+    PSS/USS采样：读取一次需要内核遍历进程的全部内存映射，
+    每轮扫描只在时间预算内测量最久未测量的成员，其余沿用上次的结果
+    """
+
+    def __init__(self, source, budget=0.01, max_age=60.0, clock=time.monotonic):
+        self.source = source
+        # 每轮扫描用于采样的时间预算（秒）
+        self.budget = budget
+        # 超过该时长的采样视为过期
+        self.max_age = max_age
+        self.clock = clock
+        # (pid, create_time) -> (pss, uss, 采样时刻)
+        self._samples = {}
+        self.reads = 0
+
+    def sample(self, units):
+        """在预算内测量，然后更新每个单元的PSS/USS合计"""
+        members = [member for unit in units for member in unit.members]
+        samples = {}
+        for member in members:
+            key = (member.pid, member.create_time)
+            if key in self._samples:
+                samples[key] = self._samples[key]
+        # 丢弃已退出进程的采样
+        self._samples = samples
+
+        now = self.clock()
+        pending = sorted(members, key=lambda m: samples.get((m.pid, m.create_time), (0, 0, float('-inf')))[2])
+        deadline = time.perf_counter() + self.budget
+        # 每轮至少测量一个成员，保证预算很小时也能轮转完
+        for member in pending:
+            try:
+                footprint = self.source.read_footprint(member.pid)
+            except Exception:
+                footprint = None
+            self.reads += 1
+            # 无权限的成员也记下测量时刻，避免每轮都排在最前面浪费预算
+            pss, uss = footprint if footprint is not None else (None, None)
+            samples[(member.pid, member.create_time)] = (pss, uss, now)
+            if time.perf_counter() >= deadline:
+                break
+
+        for unit in units:
+            pss = uss = 0
+            complete = True
+            for member in unit.members:
+                sample = samples.get((member.pid, member.create_time))
+                if sample is None or sample[0] is None or now - sample[2] > self.max_age:
+                    # 未测量的成员按RSS计入
+                    pss += member.rss
+                    uss += member.rss
+                    complete = False
+                else:
+                    pss += sample[0]
+                    uss += sample[1]
+            unit.pss, unit.uss, unit.footprint_complete = pss, uss, complete
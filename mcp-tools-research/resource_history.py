@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+资源使用时间序列
+每个工具、每个MCP进程一个固定容量的环形缓冲区，记录内存、CPU占用率和实例数。
+存储是预先分配的 array（每个指标一列），采样时只覆盖槽位，不创建任何对象；
+查询时在服务端按时间分桶做 min/max/avg 降采样，图表只需绘制少量点
+"""
+
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+# 每个工具保留的样本数（3秒一轮约3小时，至少覆盖1小时）
+TOOL_CAPACITY = 3600
+# 每个进程保留的样本数
+PROCESS_CAPACITY = 1200
+# 两次采样的最小间隔（秒）：事件模式下扫描可能很频繁，不必每轮都记录
+MIN_SAMPLE_INTERVAL = 1.0
+# 已退出进程的序列在最后一个样本之后保留的时长（秒）
+PROCESS_RETENTION = 3600
+
+METRICS = ('rss_mb', 'cpu_percent', 'instance_count')
+
+
+class MetricRing:
+    """固定容量的多指标环形缓冲区，所有列共用一个时间戳列"""
+
+    __slots__ = ('capacity', 'times', 'columns', 'size', 'head')
+
+    def __init__(self, capacity, metrics=METRICS):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.columns = {metric: array('d', bytes(8 * capacity)) for metric in metrics}
+        self.size = 0
+        # 下一个写入位置
+        self.head = 0
+
+    def append(self, timestamp, *values):
+        """按 METRICS 顺序写入一个样本，满了之后覆盖最旧的样本"""
+        head = self.head
+        self.times[head] = timestamp
+        for column, value in zip(self.columns.values(), values):
+            column[head] = value
+        self.head = (head + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    @property
+    def last_time(self):
+        if self.size == 0:
+            return None
+        return self.times[self.head - 1]
+
+    def _ordered(self, column):
+        """按时间顺序返回一列（拷贝），不影响并发写入"""
+        if self.size < self.capacity:
+            return column[:self.size]
+        head = self.head
+        return column[head:] + column[:head]
+
+    def window(self, start):
+        """返回 start 之后的 (时间戳列, {指标: 数值列})"""
+        # 先拷贝再切片：写入线程在拷贝期间前移head最多使结果错开一个样本
+        times = self._ordered(self.times)
+        columns = {metric: self._ordered(column) for metric, column in self.columns.items()}
+        first = bisect_left(times, start)
+        return times[first:], {metric: values[first:] for metric, values in columns.items()}
+
+
+def downsample(times, values, start, end, points):
+    """
+    把 [start, end) 等分为 points 个桶，每个非空桶输出一个
+    {'t': 桶起始时间, 'min', 'max', 'avg'} 点
+    """
+    if points <= 0 or end <= start:
+        return []
+    width = (end - start) / points
+    result = []
+    bucket = None
+    low = high = total = 0.0
+    count = 0
+    for timestamp, value in zip(times, values):
+        index = min(int((timestamp - start) / width), points - 1)
+        if index < 0:
+            continue
+        if index != bucket:
+            if count:
+                result.append(_point(start + bucket * width, low, high, total, count))
+            bucket = index
+            low = high = total = value
+            count = 1
+        else:
+            if value < low:
+                low = value
+            elif value > high:
+                high = value
+            total += value
+            count += 1
+    if count:
+        result.append(_point(start + bucket * width, low, high, total, count))
+    return result
+
+
+def _point(timestamp, low, high, total, count):
+    return {'t': round(timestamp, 3), 'min': round(low, 2), 'max': round(high, 2), 'avg': round(total / count, 2)}
+
+
+class ResourceHistory:
+    """按工具和进程记录资源使用，由扫描线程写入，API线程只读"""
+
+    def __init__(self, tool_capacity=TOOL_CAPACITY, process_capacity=PROCESS_CAPACITY,
+                 min_interval=MIN_SAMPLE_INTERVAL, process_retention=PROCESS_RETENTION):
+        self.tool_capacity = tool_capacity
+        self.process_capacity = process_capacity
+        self.min_interval = min_interval
+        self.process_retention = process_retention
+        self._tools = {}
+        # (pid, create_time) -> (工具类型, MetricRing)
+        self._processes = {}
+        self._last_sample = None
+        # 只保护字典结构的增删，样本写入不加锁
+        self._lock = threading.Lock()
+
+    def record(self, records, now=None):
+        """记录一轮扫描的进程记录，距上次采样不足 min_interval 时跳过"""
+        now = time.time() if now is None else now
+        if self._last_sample is not None and now - self._last_sample < self.min_interval:
+            return False
+        self._last_sample = now
+
+        totals = {}
+        for record in records:
+            key = (record.pid, record.create_time)
+            entry = self._processes.get(key)
+            if entry is None:
+                entry = (record.tool_type, MetricRing(self.process_capacity))
+                with self._lock:
+                    self._processes[key] = entry
+            rss_mb = record.rss / 1024 / 1024
+            entry[1].append(now, rss_mb, record.cpu_percent, 1)
+
+            total = totals.get(record.tool_type)
+            if total is None:
+                totals[record.tool_type] = [rss_mb, record.cpu_percent, 1]
+            else:
+                total[0] += rss_mb
+                total[1] += record.cpu_percent
+                total[2] += 1
+
+        # 已知工具本轮没有进程时记为0，实例数下降本身就是有用的信息
+        for tool_type in self._tools.keys() - totals.keys():
+            totals[tool_type] = (0.0, 0.0, 0)
+        for tool_type, (rss_mb, cpu_percent, count) in totals.items():
+            ring = self._tools.get(tool_type)
+            if ring is None:
+                ring = MetricRing(self.tool_capacity)
+                with self._lock:
+                    self._tools[tool_type] = ring
+            ring.append(now, rss_mb, cpu_percent, count)
+
+        expired = [key for key, (_, ring) in self._processes.items()
+                   if now - ring.last_time > self.process_retention]
+        if expired:
+            with self._lock:
+                for key in expired:
+                    del self._processes[key]
+        return True
+
+    def tools(self):
+        with self._lock:
+            return sorted(self._tools)
+
+    def query(self, tool=None, pid=None, window=3600, points=120, now=None):
+        """
+        查询工具（或单个进程，pid优先）在最近 window 秒内的降采样序列，
+        没有该工具或进程时返回None
+        """
+        now = time.time() if now is None else now
+        start = now - window
+        with self._lock:
+            if pid is not None:
+                # 同一PID可能先后属于多个进程，取最近的一个
+                matches = [(ring.last_time, key, tool_type, ring)
+                           for key, (tool_type, ring) in self._processes.items() if key[0] == pid]
+                if not matches:
+                    return None
+                _, key, tool, ring = max(matches)
+            else:
+                ring = self._tools.get(tool)
+                if ring is None:
+                    return None
+
+        times, columns = ring.window(start)
+        result = {
+            'tool': tool,
+            'window': window,
+            'points': points,
+            'samples': len(times),
+            'series': {metric: downsample(times, values, start, now, points)
+                       for metric, values in columns.items()}
+        }
+        if pid is not None:
+            result['pid'] = pid
+        return result
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+运行中MCP工具的聚合
+把进程扫描得到的服务单元（process_tree.ProcessUnit）按工具类型合并为API返回的工具列表；
+纯函数，不依赖Flask和扫描线程，便于单独测试和基准测试。
+结果只包含启动时刻（start_time），不包含随时间变化的运行时长：进程表不变时响应字节不变，ETag/304才有效
+"""
+
+from tool_catalog import TOOL_MAPPING, UNKNOWN_TOOL_INFO
+
+
+def aggregate_units(units):
+    """按工具类型合并服务单元，每个类型以最早启动的实例作为主要显示"""
+    tools_dict = {}  # 使用字典来合并相同类型的工具
+    for unit in units:
+        tool_type = unit.tool_type
+        tool_info = TOOL_MAPPING.get(tool_type, UNKNOWN_TOOL_INFO)
+
+        # 获取内存使用（有PSS采样时为PSS合计，否则为RSS合计）
+        memory_mb = unit.memory / 1024 / 1024
+        cmdline = unit.cmdline
+
+        # 如果这个工具类型还没有记录，创建新记录
+        if tool_type not in tools_dict:
+            tools_dict[tool_type] = {
+                'name': tool_info['name'],
+                'category': tool_info['category'],
+                'description': tool_info['description'],
+                'icon': tool_info['icon'],
+                'color': tool_info['color'],
+                'functions': tool_info.get('functions', []),
+                'platforms': tool_info.get('platforms', []),
+                'total_functions': tool_info.get('total_functions', 0),
+                'status': 'running',
+                'processes': [],
+                'total_memory': 0,
+                'instance_count': 0,
+                'oldest_create_time': None,
+                'oldest_process': None
+            }
+
+        # 添加进程信息（以单元的根进程代表整个服务）
+        process_info = {
+            'pid': unit.pid,
+            'cmdline': cmdline[:80] + '...' if len(cmdline) > 80 else cmdline,
+            'start_time': unit.create_time,
+            'memory_mb': round(memory_mb, 1),
+            'rss_mb': round(unit.rss / 1024 / 1024, 1),
+            'process_count': len(unit.members),
+            # 单元全部成员的 (PID, 创建时间)：批量终止按单元选择进程，并在发送信号前核对PID未被复用
+            'members': [[member.pid, member.create_time] for member in unit.members]
+        }
+        if unit.pss is not None:
+            process_info['pss_mb'] = round(unit.pss / 1024 / 1024, 1)
+            process_info['uss_mb'] = round(unit.uss / 1024 / 1024, 1)
+            process_info['footprint_complete'] = unit.footprint_complete
+        tools_dict[tool_type]['processes'].append(process_info)
+
+        # 记录最早启动的进程，作为主要显示
+        oldest_create_time = tools_dict[tool_type]['oldest_create_time']
+        if oldest_create_time is None or unit.create_time < oldest_create_time:
+            tools_dict[tool_type]['oldest_create_time'] = unit.create_time
+            tools_dict[tool_type]['oldest_process'] = process_info
+
+        # 更新总计信息
+        tools_dict[tool_type]['total_memory'] += memory_mb
+        tools_dict[tool_type]['instance_count'] += 1
+
+    # 转换为列表格式，添加聚合信息
+    tools = []
+    for tool_type, tool_data in tools_dict.items():
+        # 选择最早的进程作为主要显示
+        oldest_process = tool_data['oldest_process']
+        
+        tools.append({
+            'tool_type': tool_type,
+            'name': tool_data['name'],
+            'category': tool_data['category'],
+            'description': tool_data['description'],
+            'icon': tool_data['icon'],
+            'color': tool_data['color'],
+            'functions': tool_data['functions'],
+            'platforms': tool_data['platforms'],
+            'total_functions': tool_data['total_functions'],
+            'status': 'running',
+            'instance_count': tool_data['instance_count'],
+            'total_memory_mb': round(tool_data['total_memory'], 1),
+            'processes': tool_data['processes'],
+            # 主要显示信息（使用最早的进程）
+            'pid': oldest_process['pid'],
+            'cmdline': oldest_process['cmdline'],
+            'start_time': oldest_process['start_time'],
+            'memory_mb': oldest_process['memory_mb']
+        })
+
+    return tools
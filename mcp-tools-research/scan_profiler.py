@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+扫描循环的自测量
+每个阶段一个固定分桶的耗时直方图；一轮扫描用一个分段计时器依次打点，
+每个阶段只多一次 perf_counter 调用和一次直方图写入，开销在微秒级
+"""
+
+import time
+
+from histogram import LatencyHistogram
+
+# 扫描线程一轮中依次经过的阶段
+TICK_PHASES = ('health', 'scan', 'history', 'build', 'scenario', 'publish')
+# 进程扫描内部的阶段（由 ProcessScanner.last_scan 给出）
+SCAN_PHASES = ('enumerate', 'classify', 'usage', 'tree', 'footprint')
+# 配置解析不在扫描线程中：只在配置文件变化时由监听线程执行
+OTHER_PHASES = ('configured',)
+# 每轮的进程计数
+SCAN_COUNTERS = ('visited', 'matched', 'classified')
+
+
+class PhaseTimer:
+    """一轮扫描的分段计时器：lap(阶段) 记录距上一次打点的耗时"""
+
+    __slots__ = ('profiler', 'started', 'last')
+
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+        self.started = self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.observe(phase, now - self.last)
+        self.last = now
+
+    def finish(self):
+        """结束一轮，返回整轮耗时（秒）"""
+        elapsed = time.perf_counter() - self.started
+        if self.profiler is not None:
+            self.profiler.observe('tick', elapsed)
+        return elapsed
+
+
+class ScanProfiler:
+    """
+    各阶段的耗时直方图和每轮的进程计数；
+    每个直方图只由一个线程写入，读取时容忍轻微的不一致
+    """
+
+    def __init__(self, phases=TICK_PHASES + SCAN_PHASES + OTHER_PHASES):
+        self.histograms = {phase: LatencyHistogram() for phase in ('tick',) + tuple(phases)}
+        self.ticks = 0
+        self.last_counts = dict.fromkeys(SCAN_COUNTERS, 0)
+        self.total_counts = dict.fromkeys(SCAN_COUNTERS, 0)
+
+    def timer(self):
+        return PhaseTimer(self)
+
+    def observe(self, phase, seconds):
+        self.histograms[phase].observe(seconds)
+
+    def record_scan(self, scan_stats):
+        """记录一次进程扫描的内部阶段耗时和计数（ProcessScanner.last_scan）"""
+        for phase in SCAN_PHASES:
+            self.observe(phase, scan_stats[phase])
+        counts = {counter: scan_stats[counter] for counter in SCAN_COUNTERS}
+        for counter, value in counts.items():
+            self.total_counts[counter] += value
+        self.last_counts = counts
+        self.ticks += 1
+
+    def report(self):
+        """各阶段的 p50/p95/p99（毫秒）和进程计数"""
+        phases = {}
+        for phase, histogram in self.histograms.items():
+            summary = histogram.summary()
+            phases[phase] = {
+                'count': summary['count'],
+                'avg_ms': summary['avg_ms'],
+                'p50_ms': summary['p50_ms'],
+                'p95_ms': summary['p95_ms'],
+                'p99_ms': summary['p99_ms'],
+                'max_ms': summary['max_ms']
+            }
+        ticks = self.ticks
+        return {
+            'phases': phases,
+            'processes': {
+                'scans': ticks,
+                'last': dict(self.last_counts),
+                'avg': {counter: round(total / ticks, 1) if ticks else None
+                        for counter, total in self.total_counts.items()}
+            }
+        }
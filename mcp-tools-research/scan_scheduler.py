@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+自适应扫描调度
+根据进程变动、客户端访问和配置变化决定下一次扫描的间隔：
+MCP进程启停或配置刚变化时缩短到亚秒级，没有客户端且进程稳定时放宽到长间隔，
+并按扫描线程实测的CPU耗时保证不超过给定的CPU预算
+"""
+
+import time
+
+# 进程变动或配置变化后的扫描间隔（秒）
+MIN_INTERVAL = 0.5
+# 有客户端访问时的常规间隔（秒）
+BASE_INTERVAL = 3.0
+# 长时间没有客户端且进程稳定时的间隔（秒）
+IDLE_INTERVAL = 30.0
+# 扫描出错后的等待（秒）
+ERROR_INTERVAL = 10.0
+# 进程变动/配置变化后保持最短间隔的时长（秒）
+BOOST_DURATION = 10.0
+# 超过该时长没有客户端访问视为无人查看（秒）
+CLIENT_IDLE_AFTER = 60.0
+# 扫描线程可占用的单核CPU比例
+CPU_BUDGET = 0.05
+# 扫描耗时的指数滑动平均系数
+COST_SMOOTHING = 0.2
+
+
+class AdaptiveScheduler:
+    def __init__(self, min_interval=MIN_INTERVAL, base_interval=BASE_INTERVAL,
+                 idle_interval=IDLE_INTERVAL, cpu_budget=CPU_BUDGET,
+                 boost_duration=BOOST_DURATION, client_idle_after=CLIENT_IDLE_AFTER,
+                 clock=time.monotonic):
+        self.min_interval = min_interval
+        self.base_interval = base_interval
+        self.idle_interval = idle_interval
+        self.cpu_budget = cpu_budget
+        self.boost_duration = boost_duration
+        self.client_idle_after = client_idle_after
+        self.clock = clock
+        self.last_client = None
+        self.boost_until = 0.0
+        self.boost_reason = None
+        # 扫描的CPU耗时和墙钟耗时（秒，滑动平均）
+        self.scan_cpu = None
+        self.scan_wall = None
+        self.scan_count = 0
+        self.interval = base_interval
+        self.reason = 'startup'
+
+    def note_client(self):
+        """
+        有API请求或推送订阅者（可在任意线程调用）；
+        返回True表示此前处于无人查看的长间隔，调用方应立即唤醒扫描以免返回过旧的数据
+        """
+        now = self.clock()
+        was_idle = self.last_client is None or now - self.last_client >= self.client_idle_after
+        self.last_client = now
+        return was_idle and self.interval > self.base_interval
+
+    def boost(self, reason):
+        """接下来一段时间内按最短间隔扫描"""
+        self.boost_until = self.clock() + self.boost_duration
+        self.boost_reason = reason
+
+    def record_scan(self, cpu_seconds, wall_seconds, churned):
+        """记录一轮扫描的开销；churned 表示MCP进程集合较上一轮有变化"""
+        if self.scan_cpu is None:
+            self.scan_cpu, self.scan_wall = cpu_seconds, wall_seconds
+        else:
+            self.scan_cpu += (cpu_seconds - self.scan_cpu) * COST_SMOOTHING
+            self.scan_wall += (wall_seconds - self.scan_wall) * COST_SMOOTHING
+        self.scan_count += 1
+        # 第一轮扫描没有可比较的上一轮
+        if churned and self.scan_count > 1:
+            self.boost('churn')
+
+    def budget_interval(self):
+        """CPU预算允许的最短间隔：cpu / (cpu + 间隔) <= 预算"""
+        if not self.scan_cpu or self.cpu_budget <= 0:
+            return 0.0
+        return self.scan_cpu * (1 - self.cpu_budget) / self.cpu_budget
+
+    def next_interval(self, floor=0.0):
+        """
+        计算下一次扫描前的等待时间；
+        floor 为非加速状态下的最小间隔（事件模式下进程启停会直接唤醒扫描，轮询只作兜底）
+        """
+        now = self.clock()
+        if now < self.boost_until:
+            interval, reason = self.min_interval, self.boost_reason
+        elif self.last_client is not None and now - self.last_client < self.client_idle_after:
+            interval, reason = max(self.base_interval, floor), 'clients'
+        else:
+            interval, reason = max(self.idle_interval, floor), 'idle'
+
+        budget = self.budget_interval()
+        if budget > interval:
+            interval, reason = budget, 'cpu-budget'
+        self.interval, self.reason = interval, reason
+        return interval
+
+    def stats(self):
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        now = self.clock()
+        return {
+            'interval_s': round(self.interval, 3),
+            'reason': self.reason,
+            'scan_cpu_ms': ms(self.scan_cpu),
+            'scan_wall_ms': ms(self.scan_wall),
+            'scan_count': self.scan_count,
+            'cpu_budget': self.cpu_budget,
+            'cpu_share': round(self.scan_cpu / (self.scan_cpu + self.interval), 4) if self.scan_cpu else None,
+            'last_client_age_s': None if self.last_client is None else round(now - self.last_client, 1)
+        }
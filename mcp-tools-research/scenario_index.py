@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+MCP场景索引
+为 ~/.cursor/mcp-configs/ 下每个场景文件计算规范化JSON的内容哈希（键排序、紧凑格式），
+按文件签名增量刷新；当前场景只需对 mcp.json 做一次哈希查表，
+不必像 mcp-switcher-final.sh 的 show_status 那样逐个 diff
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from config_watcher import file_signature
+
+# 当前配置与任何场景都不匹配
+CUSTOM_SCENARIO = 'custom'
+# 配置文件不存在
+MISSING_SCENARIO = 'missing'
+
+
+def config_fingerprint(raw):
+    """规范化JSON后的内容哈希，空白和键顺序不同的等价配置哈希相同；无法解析时按原始字节计算"""
+    try:
+        normalized = json.dumps(json.loads(raw), sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    except ValueError:
+        return 'raw:' + hashlib.sha256(raw).hexdigest()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class ScenarioIndex:
+    def __init__(self, scenario_dir):
+        self.scenario_dir = scenario_dir
+        # 文件名 -> (签名, 指纹)
+        self._entries = {}
+        # 指纹 -> 场景名
+        self._by_fingerprint = {}
+        # 当前配置文件的 (路径, 签名, 指纹)，签名不变时不重新读取
+        self._current = (None, None, None)
+        self._lock = threading.Lock()
+        # 场景目录内容每次变化递增，随快照发布供工作进程判断是否需要重新加载
+        self.version = 0
+
+    def refresh(self):
+        """重新扫描场景目录，只对签名变化的文件重新计算指纹；返回是否有变化"""
+        try:
+            with os.scandir(self.scenario_dir) as entries:
+                paths = {entry.name: entry.path for entry in entries
+                         if entry.name.endswith('.json') and entry.is_file()}
+        except (FileNotFoundError, NotADirectoryError):
+            paths = {}
+
+        changed = paths.keys() != self._entries.keys()
+        entries = {}
+        for name, path in paths.items():
+            signature = file_signature(path)
+            old = self._entries.get(name)
+            if old is not None and old[0] == signature:
+                entries[name] = old
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    fingerprint = config_fingerprint(f.read())
+            except OSError:
+                continue
+            entries[name] = (signature, fingerprint)
+            changed = True
+
+        if changed:
+            by_fingerprint = {}
+            # 多个场景内容相同时取名称排序最靠前的一个，结果稳定
+            for name in sorted(entries):
+                by_fingerprint.setdefault(entries[name][1], name[:-len('.json')])
+            with self._lock:
+                self._entries = entries
+                self._by_fingerprint = by_fingerprint
+                self.version += 1
+        return changed
+
+    def scenarios(self):
+        with self._lock:
+            return sorted(name[:-len('.json')] for name in self._entries)
+
+    def lookup(self, config_path):
+        """返回当前配置对应的场景名；不匹配任何场景时返回 custom，文件不存在时返回 missing"""
+        signature = file_signature(config_path)
+        if signature is None:
+            return MISSING_SCENARIO
+
+        path, cached_signature, fingerprint = self._current
+        if path != config_path or cached_signature != signature:
+            try:
+                with open(config_path, 'rb') as f:
+                    fingerprint = config_fingerprint(f.read())
+            except FileNotFoundError:
+                return MISSING_SCENARIO
+            self._current = (config_path, signature, fingerprint)
+
+        with self._lock:
+            return self._by_fingerprint.get(fingerprint, CUSTOM_SCENARIO)
+
+    def detect(self, config_path):
+        """刷新索引后查找当前场景"""
+        self.refresh()
+        return self.lookup(config_path)
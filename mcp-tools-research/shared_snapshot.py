@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+跨进程共享快照
+多进程部署时只有一个扫描进程：它把每个快照（各API已序列化好的响应体）写入一段
+multiprocessing.shared_memory，用顺序锁（seqlock）保护；任意数量的HTTP工作进程只读取这段内存，
+请求吞吐随核数扩展，而进程扫描的开销与工作进程数无关。
+
+共享内存布局（小端）:
+    0   magic 'MCPS'
+    8   seq          写入前加1（奇数表示写入中），写完再加1
+    16  length       帧长度
+    24  last_client  工作进程最近一次收到API请求的时刻（各工作进程直接覆盖写）
+    64  帧: 4字节索引长度 + 索引JSON + 各段内容
+"""
+
+import json
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from status_snapshot import HISTORY_SIZE, CachedResponse, SnapshotPublisher, StatusSnapshot, serialize_payload
+
+MAGIC = b'MCPS'
+HEADER_SIZE = 64
+SEQ_OFFSET = 8
+LENGTH_OFFSET = 16
+CLIENT_OFFSET = 24
+U64 = struct.Struct('<Q')
+F64 = struct.Struct('<d')
+INDEX_LENGTH = struct.Struct('<I')
+
+# 共享内存段大小：页面按需分配，未写入的部分不占物理内存
+DEFAULT_SEGMENT_SIZE = 16 * 1024 * 1024
+# 读到写入中或不一致的数据时的重试次数
+READ_RETRIES = 100
+# 工作进程检查新快照的间隔（秒）：跨进程没有条件变量可等待，每个工作进程由一个线程按此间隔轮询，
+# 有新快照时通过条件变量唤醒该进程中的推送订阅者
+MIRROR_POLL_INTERVAL = 0.05
+# 工作进程上报客户端访问的最小间隔（秒）
+CLIENT_NOTE_INTERVAL = 1.0
+
+
+def encode_frame(snapshot, extra_responses=(), status=None):
+    """
+    把快照编码为一帧：快照元数据、各响应体（保留各自的版本号，工作进程生成的ETag与扫描进程一致）
+    extra_responses: 额外随快照发布的 CachedResponse（如指标）；status: 扫描进程的运行状态（JSON）
+    """
+    sections = []
+    responses = {}
+    offset = 0
+    for cached in list(snapshot.responses.values()) + list(extra_responses):
+        responses[cached.name] = [offset, len(cached.body), cached.version]
+        sections.append(cached.body)
+        offset += len(cached.body)
+    status_body = serialize_payload(status or {})
+    sections.append(status_body)
+
+    index = serialize_payload({
+        'version': snapshot.version,
+        'epoch': snapshot.epoch,
+        'last_update': snapshot.last_update,
+        'current_scenario': snapshot.current_scenario,
+        'config_version': snapshot.config_version,
+        'scenario_version': snapshot.scenario_version,
+        'responses': responses,
+        'status': [offset, len(status_body)]
+    })
+    return INDEX_LENGTH.pack(len(index)) + index + b''.join(sections)
+
+
+def decode_frame(frame):
+    """帧 -> (StatusSnapshot, 扫描进程状态)"""
+    index_length, = INDEX_LENGTH.unpack_from(frame)
+    base = INDEX_LENGTH.size + index_length
+    index = json.loads(frame[INDEX_LENGTH.size:base])
+    epoch = index['epoch']
+
+    responses = {}
+    for name, (offset, length, version) in index['responses'].items():
+        responses[name] = CachedResponse(name, frame[base + offset:base + offset + length], version, epoch)
+
+    def payload(name, key):
+        cached = responses.get(name)
+        return json.loads(cached.body)[key] if cached is not None else None
+
+    offset, length = index['status']
+    status = json.loads(frame[base + offset:base + offset + length])
+    snapshot = StatusSnapshot(
+        version=index['version'],
+        running_tools=tuple(payload('running-tools', 'data') or ()),
+        configured_tools=tuple(payload('configured-tools', 'data') or ()),
+        overview=payload('tools-overview', 'data') or {},
+        last_update=index['last_update'],
+        current_scenario=index['current_scenario'],
+        config_version=index['config_version'],
+        scenario_version=index.get('scenario_version', 0),
+        epoch=epoch,
+        responses=responses
+    )
+    return snapshot, status
+
+
+class SharedSnapshotWriter:
+    """扫描进程持有：创建共享内存段并按seqlock协议写入"""
+
+    def __init__(self, name, size=DEFAULT_SEGMENT_SIZE):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # 上次异常退出遗留的同名段
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = name
+        self.capacity = self.shm.size - HEADER_SIZE
+        self.seq = 0
+        self.writes = 0
+        self.oversized = 0
+        buf = self.shm.buf
+        buf[0:4] = MAGIC
+        U64.pack_into(buf, SEQ_OFFSET, 0)
+        U64.pack_into(buf, LENGTH_OFFSET, 0)
+        F64.pack_into(buf, CLIENT_OFFSET, 0.0)
+
+    def write(self, frame):
+        """写入一帧（单写者）；超出容量时保留上一帧并返回False"""
+        if len(frame) > self.capacity:
+            self.oversized += 1
+            return False
+        buf = self.shm.buf
+        self.seq += 1
+        U64.pack_into(buf, SEQ_OFFSET, self.seq)
+        U64.pack_into(buf, LENGTH_OFFSET, len(frame))
+        buf[HEADER_SIZE:HEADER_SIZE + len(frame)] = frame
+        self.seq += 1
+        U64.pack_into(buf, SEQ_OFFSET, self.seq)
+        self.writes += 1
+        return True
+
+    def last_client(self):
+        """工作进程最近一次收到API请求的时刻（time.time()），没有时为0"""
+        return F64.unpack_from(self.shm.buf, CLIENT_OFFSET)[0]
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedSnapshotReader:
+    """工作进程持有：只读取共享内存段"""
+
+    def __init__(self, name):
+        self.shm = shared_memory.SharedMemory(name=name)
+        # 附加到已有段时不应由本进程的resource_tracker在退出时删除它（Python 3.13前会这样做）
+        try:
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        except Exception:
+            pass
+        if bytes(self.shm.buf[0:4]) != MAGIC:
+            self.shm.close()
+            raise ValueError(f'共享内存段 {name} 不是监控快照')
+        self.name = name
+        self.retries = 0
+        self._last_client_note = 0.0
+
+    def seq(self):
+        return U64.unpack_from(self.shm.buf, SEQ_OFFSET)[0]
+
+    def read(self, last_seq=None):
+        """
+        读取一致的一帧，返回 (seq, 帧字节)；
+        seq 与 last_seq 相同（没有新快照）或一直读不到一致的数据时返回None
+        """
+        buf = self.shm.buf
+        for _ in range(READ_RETRIES):
+            before = U64.unpack_from(buf, SEQ_OFFSET)[0]
+            if before == last_seq or before == 0:
+                # 没有新快照，或扫描进程尚未写入第一帧
+                return None
+            if before & 1:
+                # 写入中
+                self.retries += 1
+                time.sleep(0)
+                continue
+            length = U64.unpack_from(buf, LENGTH_OFFSET)[0]
+            if length <= len(buf) - HEADER_SIZE:
+                frame = bytes(buf[HEADER_SIZE:HEADER_SIZE + length])
+                if U64.unpack_from(buf, SEQ_OFFSET)[0] == before:
+                    return before, frame
+            self.retries += 1
+        return None
+
+    def note_client(self, now=None):
+        """记录一次客户端访问，扫描进程据此保持常规扫描频率"""
+        now = time.time() if now is None else now
+        if now - self._last_client_note >= CLIENT_NOTE_INTERVAL:
+            self._last_client_note = now
+            F64.pack_into(self.shm.buf, CLIENT_OFFSET, now)
+
+    def close(self):
+        self.shm.close()
+
+
+class SnapshotMirror:
+    """
+    工作进程中代替 SnapshotPublisher 的只读镜像：接口相同（current / epoch / get_snapshot / wait_for_newer），
+    读取 current 时检查共享内存的序号，有新快照才解码
+    """
+
+    def __init__(self, reader, render=None, history_size=HISTORY_SIZE):
+        # render 与扫描进程的相同，只用于扫描进程写入第一帧之前的空快照
+        self.reader = reader
+        self.history_size = history_size
+        self.status = {}
+        self.decodes = 0
+        self._seq = None
+        self._current = SnapshotPublisher(render).current
+        self._history = {}
+        self._lock = threading.Lock()
+        # 轮询线程发现新快照后唤醒等待者；第一个推送订阅者到来时才启动
+        self._changed = threading.Condition()
+        self._poller = None
+        self._closed = threading.Event()
+
+    @property
+    def epoch(self):
+        return self.current.epoch
+
+    @property
+    def current(self):
+        if self.reader.seq() != self._seq:
+            with self._lock:
+                result = self.reader.read(self._seq)
+                if result is not None:
+                    seq, frame = result
+                    snapshot, status = decode_frame(frame)
+                    if snapshot.epoch != self._current.epoch:
+                        # 扫描进程重启，版本号重新计数
+                        self._history = {}
+                    self._history[snapshot.version] = snapshot
+                    for version in [v for v in self._history if v <= snapshot.version - self.history_size]:
+                        del self._history[version]
+                    self._seq = seq
+                    self._current = snapshot
+                    self.status = status
+                    self.decodes += 1
+        return self._current
+
+    def get_snapshot(self, version):
+        """镜像观察到的历史快照（扫描进程发布得比读取快时可能缺少中间版本）"""
+        return self._history.get(version)
+
+    def wait_for_newer(self, version, timeout):
+        """等待版本号大于version的快照（扫描进程重启后任何新快照都算），超时返回None"""
+        self._start_poller()
+        epoch = self.current.epoch
+
+        def newer():
+            snapshot = self.current
+            return snapshot.version > version or snapshot.epoch != epoch
+
+        with self._changed:
+            self._changed.wait_for(newer, timeout)
+        return self.current if newer() else None
+
+    def _start_poller(self):
+        with self._lock:
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, name='snapshot-mirror', daemon=True)
+                self._poller.start()
+
+    def _poll(self):
+        """唯一的轮询线程：共享内存序号变化时解码一次并唤醒全部等待者"""
+        last = self.current
+        while not self._closed.wait(MIRROR_POLL_INTERVAL):
+            snapshot = self.current
+            if snapshot is not last:
+                last = snapshot
+                with self._changed:
+                    self._changed.notify_all()
+
+    def close(self):
+        """停止轮询线程（在关闭共享内存读者之前调用）"""
+        self._closed.set()
+        if self._poller is not None:
+            self._poller.join()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+运行工具增量响应
+客户端带上最后看到的快照版本号，服务端只返回此后新增、删除或变化的工具和进程；
+变化的工具只包含变化的字段（功能目录等静态字段不会重复下发）。
+旧版本已超出历史窗口时返回完整数据，客户端据此重新同步
+"""
+
+import threading
+
+from status_snapshot import CachedResponse, serialize_payload
+
+TOOL_KEY = 'tool_type'
+HOST_KEY = 'host'
+# AI服务的健康探测条目与同类型的进程条目共用 tool_type（如 ai-tools-deepseek），按此标记区分
+SERVICE_KEY = 'is_ai_service'
+PROCESS_KEY = 'pid'
+
+# 区分"字段不存在"和"字段值为None"
+_MISSING = object()
+
+
+def tool_key(tool):
+    """
+    工具条目在列表中的唯一标识：单机为工具类型（AI服务条目加 #service 后缀），
+    汇总多台主机时前面再加 主机/
+    """
+    key = tool[TOOL_KEY]
+    if tool.get(SERVICE_KEY):
+        key += '#service'
+    host = tool.get(HOST_KEY)
+    return key if host is None else f'{host}/{key}'
+
+
+def diff_processes(old_processes, new_processes):
+    """进程列表的增量：新增或变化的进程整条下发，退出的进程只给出PID"""
+    old_by_pid = {process[PROCESS_KEY]: process for process in old_processes}
+    upsert = []
+    for process in new_processes:
+        if old_by_pid.pop(process[PROCESS_KEY], None) != process:
+            upsert.append(process)
+    return {'upsert': upsert, 'removed': list(old_by_pid)}
+
+
+def diff_tools(old_tools, new_tools):
+    """
+    计算两组运行工具之间的增量：
+    added 为完整的新工具，removed 为消失工具的标识（tool_key），
+    changed 为 {tool_type, [host], [is_ai_service], fields: 变化的字段, processes: 进程增量}
+    """
+    old_by_key = {tool_key(tool): tool for tool in old_tools}
+    added = []
+    changed = []
+    for tool in new_tools:
+        old = old_by_key.pop(tool_key(tool), None)
+        if old is None:
+            added.append(tool)
+            continue
+        if old == tool:
+            continue
+
+        entry = {TOOL_KEY: tool[TOOL_KEY]}
+        for name in (HOST_KEY, SERVICE_KEY):
+            if tool.get(name):
+                entry[name] = tool[name]
+        fields = {
+            name: value for name, value in tool.items()
+            if name != 'processes' and old.get(name, _MISSING) != value
+        }
+        removed_fields = [name for name in old if name not in tool]
+        if fields:
+            entry['fields'] = fields
+        if removed_fields:
+            entry['removed_fields'] = removed_fields
+        if old.get('processes') != tool.get('processes'):
+            entry['processes'] = diff_processes(old.get('processes', ()), tool.get('processes', ()))
+        changed.append(entry)
+
+    return {'added': added, 'removed': list(old_by_key), 'changed': changed}
+
+
+def apply_delta(tools, delta):
+    """把 diff_tools 的结果合并到旧的工具列表上，返回新列表（不修改传入的条目）"""
+    removed = set(delta['removed'])
+    changed = {tool_key(entry): entry for entry in delta['changed']}
+    result = []
+    for tool in tools:
+        key = tool_key(tool)
+        if key in removed:
+            continue
+        entry = changed.get(key)
+        if entry is None:
+            result.append(tool)
+            continue
+
+        updated = dict(tool)
+        updated.update(entry.get('fields', {}))
+        for name in entry.get('removed_fields', ()):
+            updated.pop(name, None)
+        if 'processes' in entry:
+            gone = set(entry['processes']['removed'])
+            upsert = {process[PROCESS_KEY]: process for process in entry['processes']['upsert']}
+            processes = [upsert.pop(process[PROCESS_KEY], process)
+                         for process in tool.get('processes', ()) if process[PROCESS_KEY] not in gone]
+            updated['processes'] = processes + list(upsert.values())
+        result.append(updated)
+    return result + list(delta['added'])
+
+
+class DeltaResponses:
+    """
+    按 since 版本缓存当前快照的增量响应；
+    大多数客户端停在同一个版本上，每个 (since, 当前版本) 只计算和序列化一次
+    """
+
+    def __init__(self, publisher, name='running-tools'):
+        self.publisher = publisher
+        self.name = name
+        self._lock = threading.Lock()
+        self._version = None
+        self._responses = {}
+
+    def get(self, since):
+        """返回 since 版本之后的增量响应；since 已超出历史窗口时返回None"""
+        snapshot = self.publisher.current
+        with self._lock:
+            if self._version != snapshot.version:
+                self._version = snapshot.version
+                self._responses = {}
+            cached = self._responses.get(since)
+        if cached is not None:
+            return cached
+
+        base = self.publisher.get_snapshot(since)
+        if base is None:
+            return None
+
+        payload = {
+            'success': True,
+            'full': False,
+            'since': since,
+            'version': snapshot.version,
+            'epoch': self.publisher.epoch,
+            'count': len(snapshot.running_tools),
+            'last_update': snapshot.last_update
+        }
+        payload.update(diff_tools(base.running_tools, snapshot.running_tools))
+        cached = CachedResponse(f'{self.name}-since{since}', serialize_payload(payload),
+                                snapshot.version, self.publisher.epoch)
+        with self._lock:
+            if self._version == snapshot.version:
+                self._responses[since] = cached
+        return cached
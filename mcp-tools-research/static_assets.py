@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+仪表盘静态页面
+页面第一次被请求时读入内存，同时预先计算gzip（安装了brotli模块时还有brotli）压缩版本和基于内容哈希的强ETag；
+之后按最小间隔检查文件签名，只有文件变化时才重新读取。重复加载页面只需一次304
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import threading
+import time
+
+from config_watcher import file_signature
+
+try:
+    import brotli
+except ImportError:
+    # 可选依赖：没有时只提供gzip
+    brotli = None
+
+# 两次检查文件签名的最小间隔（秒）：编辑页面后最多这么久生效
+CHECK_INTERVAL = 1.0
+# 加载时只压缩一次，使用最高压缩级别
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# 客户端同时支持时优先使用的内容编码
+ENCODING_PREFERENCE = ('br', 'gzip')
+ETAG_SUFFIX = {'br': '-br', 'gzip': '-gz'}
+
+
+class StaticAsset:
+    """一个文件在某个版本的内存副本，加载后不再修改"""
+
+    __slots__ = ('name', 'signature', 'body', 'mimetype', 'etag', 'variants')
+
+    def __init__(self, name, body, signature, mimetype):
+        self.name = name
+        self.signature = signature
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:20]
+        # 内容编码 -> 压缩后的字节，只保留比原文小的版本
+        self.variants = {}
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        if len(compressed) < len(body):
+            self.variants['gzip'] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+            if len(compressed) < len(body):
+                self.variants['br'] = compressed
+
+    def etags(self):
+        """各编码版本的ETag（字节不同，强ETag各不相同）"""
+        return [self.etag] + [self.etag + ETAG_SUFFIX[encoding] for encoding in self.variants]
+
+    def negotiate(self, accept_encodings):
+        """按客户端支持的编码选择响应体，返回 (内容编码或None, 字节, ETag)"""
+        for encoding in ENCODING_PREFERENCE:
+            if encoding in self.variants and encoding in accept_encodings:
+                return encoding, self.variants[encoding], self.etag + ETAG_SUFFIX[encoding]
+        return None, self.body, self.etag
+
+
+class StaticAssets:
+    """一组按名称访问的静态文件：{名称: 文件路径}"""
+
+    def __init__(self, files, check_interval=CHECK_INTERVAL):
+        self.files = dict(files)
+        self.check_interval = check_interval
+        self.loads = 0
+        self.errors = 0
+        self._assets = {}
+        # 名称 -> 上次检查文件签名的时刻
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, now=None):
+        """返回文件的当前内存副本；从未成功读取时返回None（文件被删除后继续提供最后一次读到的内容）"""
+        now = time.monotonic() if now is None else now
+        checked = self._checked.get(name)
+        if checked is not None and now - checked < self.check_interval:
+            return self._assets.get(name)
+        with self._lock:
+            checked = self._checked.get(name)
+            if checked is None or now - checked >= self.check_interval:
+                self._checked[name] = now
+                self._reload(name)
+            return self._assets.get(name)
+
+    def _reload(self, name):
+        """文件签名变化时重新读取并压缩（持有锁时调用）"""
+        path = self.files[name]
+        signature = file_signature(path)
+        current = self._assets.get(name)
+        if signature is None or (current is not None and current.signature == signature):
+            return
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+        except OSError as e:
+            self.errors += 1
+            print(f"⚠️ 无法读取页面 {path}: {e}")
+            return
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if mimetype.startswith('text/'):
+            mimetype += '; charset=utf-8'
+        self._assets[name] = StaticAsset(name, body, signature, mimetype)
+        self.loads += 1
+
+    def stats(self):
+        return {
+            'loads': self.loads,
+            'errors': self.errors,
+            'brotli': brotli is not None,
+            'assets': {
+                name: {
+                    'bytes': len(asset.body),
+                    'encoded_bytes': {encoding: len(body) for encoding, body in asset.variants.items()},
+                    'etag': asset.etag
+                }
+                for name, asset in self._assets.items()
+            }
+        }
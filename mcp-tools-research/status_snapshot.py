@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+监控状态快照
+后台扫描线程每轮构建一个不可变快照（带单调递增的版本号和预先计算好的总览统计），
+通过一次引用替换发布；API请求读取同一个快照，读路径无需加锁。
+各API的JSON响应在发布时序列化一次，gzip版本按需压缩一次并缓存
+"""
+
+import gzip
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+
+# 小于该大小的响应不值得压缩
+GZIP_MIN_SIZE = 1024
+
+# 保留最近多少个快照用于计算增量响应（3秒一轮约5分钟）
+HISTORY_SIZE = 100
+
+
+def compute_overview(running_tools, configured_tools):
+    """计算工具总览统计（分类、内存、健康状态）"""
+    # 统计分类
+    categories = {}
+    for tool in running_tools:
+        cat = tool['category']
+        if cat not in categories:
+            categories[cat] = {'running': 0, 'total': 0}
+        categories[cat]['running'] += 1
+        categories[cat]['total'] += 1
+
+    # 内存使用统计：每个工具所有服务单元的合计
+    total_memory = sum(tool.get('total_memory_mb', tool['memory_mb']) for tool in running_tools)
+
+    return {
+        'running_count': len(running_tools),
+        'configured_count': len(configured_tools),
+        'categories': categories,
+        'total_memory_mb': round(total_memory, 1),
+        'system_health': 'healthy' if len(running_tools) > 0 else 'warning'
+    }
+
+
+def serialize_payload(payload):
+    """紧凑JSON序列化（中文直接输出UTF-8，比\\u转义更小）"""
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class CachedResponse:
+    """预先序列化的API响应体，ETag取自内容最后一次变化时的快照版本"""
+
+    __slots__ = ('name', 'body', 'version', 'etag', '_gzip_body')
+
+    def __init__(self, name, body, version, epoch=''):
+        self.name = name
+        self.body = body
+        self.version = version
+        # epoch区分不同的服务进程，避免重启后版本号重复导致误判304
+        self.etag = f'{name}-{epoch}-{version}'
+        self._gzip_body = None
+
+    @property
+    def gzip_body(self):
+        """gzip压缩后的响应体，首次访问时压缩并缓存；太小的响应返回None"""
+        if len(self.body) < GZIP_MIN_SIZE:
+            return None
+        if self._gzip_body is None:
+            # 并发时可能重复压缩一次，结果相同，无需加锁
+            self._gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzip_body
+
+
+@dataclass(frozen=True)
+class StatusSnapshot:
+    """一轮扫描的完整状态，发布后不再修改"""
+
+    version: int
+    running_tools: tuple
+    configured_tools: tuple
+    overview: dict
+    last_update: str = None
+    current_scenario: str = 'unknown'
+    # 配置文件版本号，每次配置变化递增
+    config_version: int = 0
+    # 场景索引版本号，场景目录变化时递增（工作进程据此重新加载自己的场景索引）
+    scenario_version: int = 0
+    # 发布者的启动标识，区分服务重启前后的版本号
+    epoch: str = ''
+    # API名称 -> CachedResponse，发布前填充完毕，发布后只读
+    responses: dict = field(default_factory=dict, compare=False, repr=False)
+
+
+class SnapshotPublisher:
+    """由扫描线程独占写入，其他线程只读取 current"""
+
+    def __init__(self, render=None, history_size=HISTORY_SIZE, on_publish=None):
+        # render(snapshot) -> {API名称: 响应payload}，发布时统一序列化
+        self.render = render
+        # on_publish(snapshot) 在新快照成为 current 之后、唤醒等待者之前调用（扫描线程中）
+        self.on_publish = on_publish
+        self.history_size = history_size
+        self.epoch = format(int(time.time()), 'x')
+        self._version = 0
+        # 只用于唤醒等待新快照的推送订阅者，读取 current 不需要它
+        self._published = threading.Condition()
+        self.current = StatusSnapshot(
+            version=0,
+            running_tools=(),
+            configured_tools=(),
+            overview=compute_overview((), ()),
+            epoch=self.epoch
+        )
+        self._serialize_responses(self.current, self.current)
+        # 版本号 -> 快照；只由扫描线程增删，其他线程只按键读取
+        self._history = {0: self.current}
+
+    def publish(self, running_tools, configured_tools, last_update, current_scenario='unknown',
+                config_version=0, scenario_version=0):
+        """构建新快照并以一次赋值替换当前快照"""
+        running_tools = tuple(running_tools)
+        configured_tools = tuple(configured_tools)
+        self._version += 1
+        snapshot = StatusSnapshot(
+            version=self._version,
+            running_tools=running_tools,
+            configured_tools=configured_tools,
+            overview=compute_overview(running_tools, configured_tools),
+            last_update=last_update,
+            current_scenario=current_scenario,
+            config_version=config_version,
+            scenario_version=scenario_version,
+            epoch=self.epoch
+        )
+        self._serialize_responses(snapshot, self.current)
+        self._history[snapshot.version] = snapshot
+        self._history.pop(snapshot.version - self.history_size, None)
+        self.current = snapshot
+        if self.on_publish is not None:
+            self.on_publish(snapshot)
+        with self._published:
+            self._published.notify_all()
+        return snapshot
+
+    def get_snapshot(self, version):
+        """按版本号取回历史快照，已超出历史窗口时返回None"""
+        return self._history.get(version)
+
+    def wait_for_newer(self, version, timeout):
+        """等待版本号大于version的快照，超时返回None"""
+        with self._published:
+            self._published.wait_for(lambda: self.current.version > version, timeout)
+        snapshot = self.current
+        return snapshot if snapshot.version > version else None
+
+    def _serialize_responses(self, snapshot, previous):
+        """序列化各API响应；内容未变的响应沿用旧对象（包括ETag和已压缩的数据）"""
+        if self.render is None:
+            return
+        for name, payload in self.render(snapshot).items():
+            body = serialize_payload(payload)
+            old = previous.responses.get(name)
+            if old is not None and old.body == body:
+                snapshot.responses[name] = old
+            else:
+                snapshot.responses[name] = CachedResponse(name, body, snapshot.version, self.epoch)
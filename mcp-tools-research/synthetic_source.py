@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+合成进程数据源
+生成可复现的进程表（给定随机种子），接口与 process_sources 中的数据源相同，
+用于压测和基准测试：不依赖本机实际运行了哪些MCP服务
+
+进程表有真实的树形结构：普通进程挂在已有进程下面，MCP服务是一棵小树
+（npx包装进程 -> node服务进程 -> 浏览器等辅助进程）；churn 为每轮退出并由新进程补足的比例，
+退出进程的子进程像真实系统一样被init收养
+
+通过 MCP_MONITOR_PROCESS_SOURCE=synthetic:processes=2000,mcp_ratio=0.02,churn=0.01 使用
+"""
+
+import random
+
+from process_sources import ProcessGone
+
+# 普通进程命令行样本
+OTHER_CMDLINES = (
+    '/sbin/init splash',
+    '/usr/lib/systemd/systemd-journald',
+    '/usr/bin/python3 -m http.server 8080 --bind 127.0.0.1',
+    '/bin/bash -c while true; do sleep 1; done',
+    '/opt/google/chrome/chrome --type=renderer --enable-features=NetworkService --lang=en-US',
+    '/usr/bin/dockerd -H fd:// --containerd=/run/containerd/containerd.sock',
+    'node /home/dev/project/node_modules/.bin/webpack --watch --mode development',
+    '/usr/lib/jvm/java-17/bin/java -Xmx4g -jar /opt/builds/gradle-daemon.jar',
+    'sshd: dev@pts/3',
+    'gcc -O2 -c src/module_42.c -o build/module_42.o',
+)
+
+# MCP服务的进程树形状：(根进程, 子进程, 孙进程...)，依次嵌套；None 表示在该层挂随机数量的渲染进程
+MCP_SERVICE_SHAPES = (
+    ('node /Users/dev/.npm/_npx/a1b2/node_modules/.bin/mcp-server-filesystem /Users/dev/projects',),
+    ('npx -y @modelcontextprotocol/server-github',
+     'node /Users/dev/.npm/_npx/e5f6/node_modules/@modelcontextprotocol/server-github/dist/index.js'),
+    ('npx -y @executeautomation/playwright-mcp-server',
+     'node /Users/dev/.npm/_npx/c3d4/node_modules/@executeautomation/playwright-mcp-server/dist/index.js',
+     '/Users/dev/Library/Caches/ms-playwright/chromium-1097/chrome-mac/Chromium --headless --remote-debugging-pipe',
+     None),
+    ('node /usr/local/lib/node_modules/mcp-server-hotnews/build/index.js',),
+    ('npx -y @wonderwhy-er/desktop-commander --mcp',
+     'node /Users/dev/.cursor/mcp/node_modules/@wonderwhy-er/desktop-commander/dist/index.js',
+     '/bin/zsh -c git status'),
+    ('node /Users/dev/mcp-ai-tools/deepseek-server-proxy.js',),
+    ('node /Users/dev/mcp-ai-tools/gemini-server-proxy.js',),
+    ('node /Users/dev/mcp-ai-tools/image-generation-simple.js',),
+)
+# 浏览器类服务的渲染进程（非MCP命令行，按进程树归入服务单元）
+HELPER_CMDLINE = '/Applications/Google Chrome.app/Contents/Frameworks/Google Chrome Helper (Renderer) --type=renderer'
+MAX_HELPERS = 4
+# 服务进程树中命令行不带MCP关键词的成员（只按进程树归入服务单元）
+NON_MCP_MEMBERS = frozenset({'/bin/zsh -c git status'})
+
+# 普通进程挂在某个已有进程下面的概率（否则直接挂在init下）
+NEST_PROBABILITY = 0.6
+# 合成进程的PID起点和启动时间基准
+FIRST_PID = 1000
+INIT_PID = 1
+BASE_CREATE_TIME = 1_700_000_000.0
+
+SPEC_PARAMETERS = {'processes': int, 'mcp_ratio': float, 'churn': float, 'seed': int}
+
+
+class SyntheticProcess:
+    __slots__ = ('pid', 'ppid', 'create_time', 'cmdline', 'rss', 'cpu_time', 'cpu_rate', 'mcp')
+
+    def __init__(self, pid, ppid, create_time, cmdline, rss, cpu_rate, mcp=False):
+        self.pid = pid
+        self.ppid = ppid
+        self.create_time = create_time
+        self.cmdline = cmdline
+        self.rss = rss
+        self.cpu_time = 0.0
+        # 每轮增加的CPU秒数
+        self.cpu_rate = cpu_rate
+        # 是否属于某个MCP服务（根进程或服务内带MCP关键词的进程）
+        self.mcp = mcp
+
+
+class SyntheticProcessSource:
+    """
+    按给定规模、MCP服务占比和进程更替率生成的进程表
+    processes: 进程表规模（每轮更替后补足到这个数量）
+    mcp_ratio: 新进程中作为MCP服务启动的比例（一个服务含1~7个进程）
+    churn: 每轮退出的进程比例
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, processes=1000, mcp_ratio=0.02, churn=0.0, seed=0):
+        self.random = random.Random(seed)
+        self.size = processes
+        self.mcp_ratio = mcp_ratio
+        self.churn = churn
+        self.ticks = 0
+        self.exited = 0
+        self._churn_debt = 0.0
+        self._next_pid = FIRST_PID
+        self._table = {}
+        # 可随机选取的PID列表及其下标，支持O(1)删除
+        self._pids = []
+        self._slots = {}
+        self._fill()
+
+    @classmethod
+    def from_spec(cls, spec):
+        """解析 'processes=2000,mcp_ratio=0.02,churn=0.01,seed=1' 形式的参数"""
+        options = {}
+        for item in filter(None, (part.strip() for part in spec.split(','))):
+            key, _, value = item.partition('=')
+            if key not in SPEC_PARAMETERS:
+                raise ValueError(f"未知的合成数据源参数: {key}")
+            options[key] = SPEC_PARAMETERS[key](value)
+        return cls(**options)
+
+    def _add(self, ppid, cmdline, rss, mcp=False):
+        pid = self._next_pid
+        self._next_pid += 1
+        process = SyntheticProcess(pid, ppid, BASE_CREATE_TIME + pid, cmdline, rss,
+                                   self.random.random() * 0.05, mcp)
+        self._table[pid] = process
+        self._slots[pid] = len(self._pids)
+        self._pids.append(pid)
+        return process
+
+    def _remove(self, pid):
+        del self._table[pid]
+        slot = self._slots.pop(pid)
+        last = self._pids.pop()
+        if last != pid:
+            self._pids[slot] = last
+            self._slots[last] = slot
+
+    def _random_parent(self):
+        if self._pids and self.random.random() < NEST_PROBABILITY:
+            return self.random.choice(self._pids)
+        return INIT_PID
+
+    def _spawn(self):
+        rng = self.random
+        parent = self._random_parent()
+        if rng.random() >= self.mcp_ratio:
+            return self._add(parent, rng.choice(OTHER_CMDLINES), rng.randint(1, 500) * 1024 * 1024)
+
+        # 启动一个MCP服务：按形状逐层创建子进程
+        shape = rng.choice(MCP_SERVICE_SHAPES)
+        root = process = self._add(parent, shape[0], rng.randint(30, 120) * 1024 * 1024, mcp=True)
+        for cmdline in shape[1:]:
+            if cmdline is None:
+                for _ in range(rng.randint(1, MAX_HELPERS)):
+                    self._add(process.pid, HELPER_CMDLINE, rng.randint(50, 300) * 1024 * 1024)
+            else:
+                process = self._add(process.pid, cmdline, rng.randint(30, 300) * 1024 * 1024,
+                                    mcp=cmdline not in NON_MCP_MEMBERS)
+        return root
+
+    def _fill(self):
+        while len(self._table) < self.size:
+            self._spawn()
+
+    def _churn(self):
+        """一批进程退出（子进程被init收养），再启动新进程补足规模"""
+        self._churn_debt += self.churn * len(self._table)
+        exits = min(int(self._churn_debt), len(self._pids))
+        self._churn_debt -= exits
+        if not exits:
+            return
+        victims = set(self.random.sample(self._pids, exits))
+        for pid in victims:
+            self._remove(pid)
+        for process in self._table.values():
+            if process.ppid in victims:
+                process.ppid = INIT_PID
+        self.exited += exits
+        self._fill()
+
+    def __len__(self):
+        return len(self._table)
+
+    def pids(self):
+        """当前进程表的PID（不推进一轮）"""
+        return list(self._table)
+
+    def mcp_count(self):
+        """属于MCP服务且命令行带MCP关键词的进程数"""
+        return sum(1 for process in self._table.values() if process.mcp)
+
+    def iter_processes(self):
+        """每次遍历视为一轮：先按更替率替换一批进程，再累计CPU时间，按PID顺序产出 (pid, 创建时间)"""
+        self.ticks += 1
+        if self.churn:
+            self._churn()
+        for pid, process in list(self._table.items()):
+            process.cpu_time += process.cpu_rate
+            yield pid, process.create_time
+
+    def _get(self, pid):
+        process = self._table.get(pid)
+        if process is None:
+            raise ProcessGone(pid)
+        return process
+
+    def read_cmdline(self, pid):
+        return self._get(pid).cmdline
+
+    def read_identity(self, pid):
+        process = self._get(pid)
+        return process.create_time, process.ppid
+
+    def read_usage(self, pid):
+        process = self._get(pid)
+        return process.rss, process.cpu_time
+
+    def read_footprint(self, pid):
+        rss = self._get(pid).rss
+        return rss * 3 // 4, rss // 2
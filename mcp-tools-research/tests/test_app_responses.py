@@ -0,0 +1,74 @@
+"""API响应：进程表不变时响应字节和ETag不变，轮询得到304"""
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_cors')
+
+import live_monitoring_app as m
+from snapshot_delta import DeltaResponses
+from status_snapshot import SnapshotPublisher
+
+
+def running_tool(pid=4242, start_time=1760000000.0):
+    process = {'pid': pid, 'cmdline': 'npx -y @modelcontextprotocol/server-filesystem', 'start_time': start_time,
+               'memory_mb': 12.5, 'rss_mb': 12.5, 'process_count': 2,
+               'members': [[pid, start_time], [pid + 1, start_time + 0.5]]}
+    return {'tool_type': 'filesystem', 'name': 'Filesystem', 'category': '文件', 'status': 'running',
+            'instance_count': 1, 'total_memory_mb': 12.5, 'processes': [process], 'pid': pid,
+            'cmdline': process['cmdline'], 'start_time': start_time, 'memory_mb': 12.5}
+
+
+@pytest.fixture
+def publisher(monkeypatch):
+    publisher = SnapshotPublisher(m.render_api_payloads)
+    # 不启动后台组件，由测试直接发布快照
+    monkeypatch.setattr(m, 'monitor_started', True)
+    monkeypatch.setattr(m, 'status_publisher', publisher)
+    monkeypatch.setattr(m, 'running_tools_deltas', DeltaResponses(publisher))
+    return publisher
+
+
+def test_unchanged_tools_keep_etag_and_get_304(publisher):
+    client = m.app.test_client()
+    publisher.publish([running_tool()], [], '2026-10-18T10:00:00')
+    first = client.get('/api/running-tools')
+    assert first.headers['X-Snapshot-Version'] == '1'
+    assert 'version' not in first.get_json() and 'last_update' not in first.get_json()
+
+    # 下一轮扫描：进程表相同，只有更新时间变化
+    publisher.publish([running_tool()], [], '2026-10-18T10:00:03')
+    assert publisher.current.responses['running-tools'].etag == first.headers['ETag'].strip('"')
+    second = client.get('/api/running-tools', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    # 304同样带上当前版本，客户端据此请求之后的增量
+    assert second.headers['X-Snapshot-Version'] == '2'
+    assert second.headers['X-Snapshot-Updated'] == '2026-10-18T10:00:03'
+
+    publisher.publish([running_tool(pid=5000)], [], '2026-10-18T10:00:06')
+    third = client.get('/api/running-tools', headers={'If-None-Match': first.headers['ETag']})
+    assert third.status_code == 200 and third.headers['ETag'] != first.headers['ETag']
+
+
+def test_stream_skips_unchanged_republish(publisher, monkeypatch):
+    monkeypatch.setattr(m, 'STREAM_HEARTBEAT', 0.2)
+    stream = m.stream_snapshots()
+    try:
+        assert next(stream).startswith(b'retry:')
+        publisher.publish([running_tool()], [], '2026-10-18T10:00:00')
+        first = next(stream)
+        assert first.startswith(b'id: 1\nevent: snapshot')
+        assert b'"last_update":"2026-10-18T10:00:00"' in first
+
+        publisher.publish([running_tool()], [], '2026-10-18T10:00:03')
+        assert next(stream) == b': keepalive\n\n'
+
+        publisher.publish([running_tool(pid=5000)], [], '2026-10-18T10:00:06')
+        assert next(stream).startswith(b'id: 3\nevent: snapshot')
+    finally:
+        stream.close()
+
+
+def test_restart_requires_post(publisher):
+    # 会终止和启动进程的接口不能由跨站的GET请求触发
+    assert m.app.test_client().get('/api/restart-mcp').status_code == 405
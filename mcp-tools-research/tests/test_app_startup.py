@@ -0,0 +1,41 @@
+"""应用启动：导入模块没有副作用，首轮扫描完成前返回预热快照"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_cors')
+
+
+def test_import_starts_no_threads_and_defers_optional_modules():
+    code = (
+        'import sys, threading\n'
+        'import live_monitoring_app as m\n'
+        'assert threading.active_count() == 1, threading.enumerate()\n'
+        'assert not m.monitor_started and m.process_scanner is None and m.history_store is None\n'
+        'deferred = [name for name in ("fleet", "shared_snapshot", "history_store", "health_prober", "sqlite3")\n'
+        '            if name in sys.modules]\n'
+        'assert not deferred, deferred\n'
+    )
+    env = dict(os.environ, MCP_MONITOR_HISTORY_DB='off')
+    subprocess.run([sys.executable, '-c', code], cwd=PROJECT_DIR, env=env, check=True, timeout=60)
+
+
+def test_warming_snapshot_before_first_scan(monkeypatch):
+    import live_monitoring_app as m
+
+    # 不启动后台组件，只检查首轮扫描前的响应
+    monkeypatch.setattr(m, 'monitor_started', True)
+    client = m.app.test_client()
+
+    health = client.get('/api/health').get_json()
+    assert health['warming'] is True
+    assert health['snapshot_version'] == 0
+    assert client.get('/api/running-tools').get_json()['warming'] is True
+    assert client.get('/api/tools-overview').get_json()['warming'] is True
+    assert client.get('/api/ai-services').get_json()['data'] == {}
@@ -0,0 +1,78 @@
+"""配置文件变化监听测试"""
+
+import os
+import shutil
+import threading
+
+import pytest
+
+from config_watcher import ConfigWatcher, file_signature
+
+
+class ChangeRecorder:
+    def __init__(self):
+        self.versions = []
+        self.event = threading.Event()
+
+    def __call__(self, version):
+        self.versions.append(version)
+        self.event.set()
+
+    def wait(self, timeout=5):
+        fired = self.event.wait(timeout)
+        self.event.clear()
+        return fired
+
+
+@pytest.fixture(params=['inotify', 'polling'])
+def watched(request, tmp_path):
+    config = tmp_path / 'mcp.json'
+    config.write_text('{"mcpServers": {}}')
+    recorder = ChangeRecorder()
+    watcher = ConfigWatcher(str(config), recorder, poll_interval=0.05)
+    if request.param == 'polling':
+        watcher._open_inotify = lambda: (_ for _ in ()).throw(OSError('disabled'))
+    assert watcher.start() == request.param
+    yield config, watcher, recorder
+    watcher.stop()
+
+
+def test_cp_overwrite_in_place_is_detected(watched, tmp_path):
+    config, watcher, recorder = watched
+    source = tmp_path / 'scenario.json'
+    source.write_text('{"mcpServers": {"github": {"command": "npx"}}}')
+    inode = os.stat(config).st_ino
+
+    # cp 覆盖已存在的目标文件时保留inode，截断后重写
+    shutil.copyfile(source, config)
+    assert os.stat(config).st_ino == inode
+    assert recorder.wait()
+    assert recorder.versions == [1]
+    assert watcher.signature == file_signature(str(config))
+
+
+def test_atomic_replace_is_detected(watched, tmp_path):
+    config, watcher, recorder = watched
+    temp = tmp_path / '.mcp.json.tmp'
+    temp.write_text('{"mcpServers": {"hotnews": {}}}')
+    os.replace(temp, config)
+    assert recorder.wait()
+    assert watcher.version == 1
+
+
+def test_unrelated_files_do_not_trigger(watched, tmp_path):
+    config, watcher, recorder = watched
+    (tmp_path / 'other.json').write_text('{}')
+    assert not recorder.wait(timeout=0.3)
+    assert watcher.version == 0
+
+
+def test_check_ignores_unchanged_signature(tmp_path):
+    config = tmp_path / 'mcp.json'
+    config.write_text('{}')
+    recorder = ChangeRecorder()
+    watcher = ConfigWatcher(str(config), recorder)
+    assert watcher.check() is False
+    config.unlink()
+    assert watcher.check() is True
+    assert recorder.versions == [1]
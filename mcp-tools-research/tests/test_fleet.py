@@ -0,0 +1,153 @@
+"""多主机汇总（agent / collector）测试"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fleet import FleetAgent, FleetCollector, ResyncRequired, decode_batch, encode_batch
+from snapshot_delta import diff_tools
+from status_snapshot import SnapshotPublisher
+
+
+def tool(tool_type, pid, memory_mb=1.0):
+    return {
+        'tool_type': tool_type,
+        'category': 'test',
+        'memory_mb': memory_mb,
+        'functions': ['x'] * 20,
+        'processes': [{'pid': pid, 'memory_mb': memory_mb}]
+    }
+
+
+class CollectorServer:
+    """用真实HTTP把agent上传转交给FleetCollector，可模拟collector重启"""
+
+    def __init__(self):
+        self.collector = FleetCollector()
+        self.bodies = []
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                outer.bodies.append(body)
+                try:
+                    outer.collector.ingest(decode_batch(body, self.headers.get('Content-Encoding')))
+                    status = 200
+                except ResyncRequired:
+                    status = 409
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def collector_server():
+    server = CollectorServer()
+    yield server
+    server.close()
+
+
+def test_batch_roundtrip_and_size_limit():
+    payload = {'host': 'a', 'running_tools': [tool('github', 1)] * 50}
+    body = encode_batch(payload)
+    assert decode_batch(body, 'gzip') == payload
+    assert len(body) < len(json.dumps(payload)) / 5
+    with pytest.raises(ValueError):
+        decode_batch(encode_batch({'x': 'a' * (9 * 1024 * 1024)}), 'gzip')
+
+
+def test_agents_upload_deltas_and_resync_after_collector_restart(collector_server):
+    publishers = {host: SnapshotPublisher() for host in ('ws-1', 'ws-2')}
+    agents = {host: FleetAgent(publisher, collector_server.url, host)
+              for host, publisher in publishers.items()}
+
+    publishers['ws-1'].publish([tool('github', 1)], [{'server_name': 'github'}], 't1')
+    publishers['ws-2'].publish([tool('github', 2), tool('hotnews', 3)], [], 't1')
+    for host, agent in agents.items():
+        agent.upload(publishers[host].current)
+
+    running, configured = collector_server.collector.merged()
+    assert sorted((t['host'], t['tool_type']) for t in running) == \
+        [('ws-1', 'github'), ('ws-2', 'github'), ('ws-2', 'hotnews')]
+    assert configured == [{'server_name': 'github', 'host': 'ws-1'}]
+
+    # 之后只上传增量
+    publishers['ws-2'].publish([tool('github', 2, memory_mb=5.0)], [], 't2')
+    agents['ws-2'].upload(publishers['ws-2'].current)
+    batch = decode_batch(collector_server.bodies[-1], 'gzip')
+    assert batch['full'] is False and 'running_tools' not in batch
+    assert batch['running_delta']['removed'] == ['hotnews']
+    running, _ = collector_server.collector.merged()
+    assert [t['processes'][0]['memory_mb'] for t in running if t['host'] == 'ws-2'] == [5.0]
+
+    # collector重启后丢失基准：返回409，agent下一次上传完整状态
+    collector_server.collector = FleetCollector()
+    with pytest.raises(ResyncRequired):
+        agents['ws-1'].upload(publishers['ws-1'].current)
+    agents['ws-1'].upload(publishers['ws-1'].current)
+    assert decode_batch(collector_server.bodies[-1], 'gzip')['full'] is True
+    assert [h['host'] for h in collector_server.collector.hosts()] == ['ws-1']
+
+
+def test_collector_hides_stale_hosts_and_expires_them():
+    now = [1000.0]
+    collector = FleetCollector(stale_after=60, expire_after=600, clock=lambda: now[0])
+    collector.ingest({'host': 'a', 'epoch': 'e', 'version': 1, 'full': True,
+                      'running_tools': [tool('github', 1)], 'configured_tools': []})
+    assert len(collector.merged()[0]) == 1
+
+    now[0] += 61
+    assert collector.merged()[0] == []
+    assert collector.hosts()[0]['online'] is False
+
+    now[0] += 600
+    assert collector.expire_hosts() is True
+    assert collector.hosts() == []
+
+
+def test_collector_rejects_delta_with_wrong_base():
+    collector = FleetCollector()
+    collector.ingest({'host': 'a', 'epoch': 'e', 'version': 3, 'full': True,
+                      'running_tools': [], 'configured_tools': []})
+    delta = {'added': [], 'removed': [], 'changed': []}
+    with pytest.raises(ResyncRequired):
+        collector.ingest({'host': 'a', 'epoch': 'e', 'version': 5, 'base_version': 4, 'running_delta': delta})
+    with pytest.raises(ResyncRequired):
+        collector.ingest({'host': 'a', 'epoch': 'other', 'version': 5, 'base_version': 3, 'running_delta': delta})
+    assert collector.ingest({'host': 'a', 'epoch': 'e', 'version': 5, 'base_version': 3,
+                             'running_delta': delta}) == 5
+
+
+def test_collector_applies_delta_with_duplicate_tool_types():
+    # AI代理进程条目和健康探测条目共用 tool_type
+    proxy = tool('ai-tools-deepseek', 7)
+    service = dict(tool('ai-tools-deepseek', 0), processes=[], is_ai_service=True, status='healthy')
+    v1 = [proxy, service]
+    v2 = [tool('ai-tools-deepseek', 7, memory_mb=3.0), dict(service, status='unhealthy')]
+    v3 = [tool('ai-tools-deepseek', 7, memory_mb=3.0)]
+
+    publisher = SnapshotPublisher()
+    collector = FleetCollector()
+    publisher.publish(v1, [], None)
+    collector.ingest({'host': 'a', 'epoch': publisher.epoch, 'version': 1, 'full': True,
+                      'running_tools': v1, 'configured_tools': []})
+    for version, (old, new) in enumerate(((v1, v2), (v2, v3)), start=2):
+        delta = diff_tools(old, new)
+        collector.ingest({'host': 'a', 'epoch': publisher.epoch, 'version': version, 'base_version': version - 1,
+                          'running_delta': delta})
+        running, _ = collector.merged()
+        assert [{k: v for k, v in t.items() if k != 'host'} for t in running] == new
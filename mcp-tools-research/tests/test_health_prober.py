@@ -0,0 +1,104 @@
+"""AI服务健康探测测试"""
+
+import asyncio
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from health_prober import ServiceProbe, catalog_health_endpoints
+from histogram import LatencyHistogram
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    status = 200
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        body = json.dumps({'status': 'ok'}).encode()
+        self.send_response(self.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def health_server():
+    HealthHandler.connections = 0
+    HealthHandler.status = 200
+    server = ThreadingHTTPServer(('127.0.0.1', 0), HealthHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/health'
+    server.shutdown()
+    server.server_close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_probe_reuses_keepalive_connection(health_server):
+    probe = ServiceProbe('ai', health_server, interval=5, timeout=2, max_backoff=60)
+
+    async def run():
+        for _ in range(3):
+            assert await probe.probe() == 5
+        probe.connection.close()
+
+    asyncio.run(run())
+    assert probe.result['status'] == 'running'
+    assert probe.result['server_info'] == {'status': 'ok'}
+    assert HealthHandler.connections == 1
+    assert probe.histogram.count == 3
+
+
+def test_probe_reports_http_errors(health_server):
+    HealthHandler.status = 503
+    probe = ServiceProbe('ai', health_server, interval=5, timeout=2, max_backoff=60)
+    asyncio.run(probe.probe())
+    assert probe.result == {'status': 'error', 'available': False, 'error': 'HTTP 503'}
+
+
+def test_dead_service_backs_off():
+    probe = ServiceProbe('ai', f'http://127.0.0.1:{free_port()}/health', interval=1, timeout=1, max_backoff=4)
+
+    async def run():
+        return [await probe.probe() for _ in range(5)]
+
+    delays = asyncio.run(run())
+    assert probe.result['status'] == 'stopped'
+    assert probe.failures == 5
+    assert 0.8 <= delays[0] <= 1.0
+    assert 1.6 <= delays[1] <= 2.0
+    assert all(3.2 <= delay <= 4.0 for delay in delays[2:])
+
+
+def test_catalog_health_endpoints():
+    catalog = {'a': {'health_endpoint': 'http://x/health'}, 'b': {}}
+    assert catalog_health_endpoints(catalog) == {'a': 'http://x/health'}
+
+
+def test_histogram_quantiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.observe(ms / 1000)
+    summary = histogram.summary()
+    assert summary['count'] == 100
+    assert summary['avg_ms'] == pytest.approx(50.5)
+    assert 25 <= summary['p50_ms'] <= 100
+    assert summary['p99_ms'] <= summary['max_ms'] == 100
+    assert histogram.buckets()[-1] == (float('inf'), 100)
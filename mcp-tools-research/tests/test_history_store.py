@@ -0,0 +1,132 @@
+"""持久化资源历史测试"""
+
+import sqlite3
+
+from history_store import HistoryStore
+
+
+class Unit:
+    def __init__(self, tool_type, pid, rss_mb, cpu_percent=0.0, create_time=100.0):
+        self.tool_type = tool_type
+        self.pid = pid
+        self.create_time = create_time
+        self.rss = int(rss_mb * 1024 * 1024)
+        self.cpu_percent = cpu_percent
+        self.members = [self]
+
+
+def make_store(tmp_path, **kwargs):
+    kwargs.setdefault('sample_interval', 0)
+    # 测试使用虚构的时间戳，不在写入时按当前时间清理
+    kwargs.setdefault('prune_interval', float('inf'))
+    return HistoryStore(str(tmp_path / 'history.sqlite3'), **kwargs)
+
+
+def test_ticks_are_batched_into_rollups(tmp_path):
+    store = make_store(tmp_path)
+    for second in range(120):
+        units = [Unit('github', 1, 10 + second % 2 * 10)]
+        if second >= 60:
+            units.append(Unit('github', 2, 5))
+        store.record(units, now=3600.0 + second)
+    assert store.flush() == 120
+    assert store.batches_written == 1
+
+    connection = sqlite3.connect(store.path)
+    assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    minutes = connection.execute(
+        'SELECT bucket, samples, rss_min, rss_max, rss_sum, inst_max FROM rollup_1m ORDER BY bucket').fetchall()
+    assert minutes == [(3600, 60, 10.0, 20.0, 900.0, 1), (3660, 60, 15.0, 25.0, 1200.0, 2)]
+    assert connection.execute('SELECT samples, inst_min, inst_max FROM rollup_1h').fetchall() == [(120, 1, 2)]
+
+    history = store.query('github', window=120, points=2, now=3720.0)
+    assert history['resolution'] == 60
+    assert history['series']['rss_mb'] == [
+        {'t': 3600.0, 'min': 10.0, 'max': 20.0, 'avg': 15.0},
+        {'t': 3660.0, 'min': 15.0, 'max': 25.0, 'avg': 20.0}
+    ]
+    assert store.query('missing', window=120, points=2, now=3720.0) is None
+
+
+def test_long_windows_read_hourly_rollups(tmp_path):
+    store = make_store(tmp_path)
+    for hour in range(48):
+        store.record([Unit('github', 1, hour)], now=hour * 3600.0)
+    store.flush()
+    history = store.query('github', window=48 * 3600, points=24, now=48 * 3600.0)
+    assert history['resolution'] == 3600
+    assert [point['avg'] for point in history['series']['rss_mb']][:3] == [0.5, 2.5, 4.5]
+
+
+def test_lifecycle_survives_restart(tmp_path):
+    store = make_store(tmp_path)
+    store.record([Unit('github', 1, 10), Unit('hotnews', 2, 5)], now=1000.0)
+    store.record([Unit('github', 1, 30), Unit('hotnews', 2, 5)], now=1010.0)
+    store.record([Unit('github', 1, 20)], now=1020.0)
+    store.flush()
+
+    by_pid = {entry['pid']: entry for entry in store.lifecycle(window=100, now=1030.0)}
+    assert by_pid[1]['exited_at'] is None and by_pid[1]['peak_rss_mb'] == 30.0
+    assert by_pid[2]['exited_at'] == 1020.0
+
+    # 监控服务重启期间 github 也退出了
+    restarted = make_store(tmp_path)
+    restarted.record([Unit('github', 3, 10, create_time=1500.0)], now=2000.0)
+    restarted.flush()
+    by_pid = {entry['pid']: entry for entry in restarted.lifecycle(tool='github', window=2000, now=2000.0)}
+    assert by_pid[1]['exited_at'] == 2000.0
+    assert by_pid[3]['started_at'] == 1500.0 and by_pid[3]['exited_at'] is None
+
+
+def test_prune_and_sample_interval(tmp_path):
+    store = make_store(tmp_path, sample_interval=10, raw_retention=100, minute_retention=1000)
+    assert store.record([Unit('github', 1, 10)], now=0.0)
+    # 单元集合不变且未到采样间隔：跳过
+    assert not store.record([Unit('github', 1, 10)], now=5.0)
+    # 单元集合变化：立即记录
+    assert store.record([], now=6.0)
+    store.record([Unit('github', 1, 10)], now=2000.0)
+    store.flush()
+
+    store.prune(now=2050.0)
+    connection = sqlite3.connect(store.path)
+    assert connection.execute('SELECT min(ts) FROM samples').fetchone()[0] == 2000.0
+    assert connection.execute('SELECT min(bucket) FROM rollup_1m').fetchone()[0] == 1980
+    assert connection.execute('SELECT count(*) FROM rollup_1h').fetchone()[0] == 1
+
+
+class FailingCommit:
+    """模拟提交失败（数据库被锁、磁盘已满）：回滚事务后抛出异常"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def __enter__(self):
+        return self.connection.__enter__()
+
+    def __exit__(self, *exc_info):
+        self.connection.rollback()
+        raise sqlite3.OperationalError('database is locked')
+
+
+def test_failed_commit_keeps_lifecycle_transitions(tmp_path):
+    store = make_store(tmp_path)
+    store.record([Unit('github', 1, 10)], now=1.0)
+    store.flush()
+
+    writer = store._writer
+    store._writer = FailingCommit(writer)
+    # 这一轮 1 退出、2 启动，但事务没有提交
+    store.record([Unit('github', 2, 10)], now=2.0)
+    store.flush()
+    assert store.last_error == 'database is locked'
+
+    store._writer = writer
+    store.record([Unit('github', 2, 10)], now=3.0)
+    store.flush()
+    assert store.last_error is None
+    rows = sqlite3.connect(store.path).execute('SELECT pid, exited_at FROM lifecycle ORDER BY pid').fetchall()
+    assert rows == [(1, 3.0), (2, None)]
@@ -0,0 +1,154 @@
+"""MCP服务并行重启：终止旧实例、按配置重新启动、等待就绪并记录耗时"""
+
+import http.server
+import subprocess
+import sys
+import threading
+
+import psutil
+import pytest
+
+from mcp_restart import McpRestarter, SpawnRegistry, server_spec
+from process_control import ProcessControl
+
+# 独立运行的网络服务（客户端通过 url 连接），由重启器重新启动
+SERVER = 'import time; time.sleep(60)'
+# stdin关闭时退出，与stdio类MCP服务一样
+STDIO_SERVER = 'import sys; sys.stdin.read()'
+URL = 'http://127.0.0.1:8931/sse'
+
+
+def spec(name, code=SERVER, **config):
+    return server_spec(name, dict({'command': sys.executable, 'args': ['-c', code]}, **config))
+
+
+def kill_spawned(restarter):
+    for pid in restarter.stats()['spawned'].values():
+        proc = psutil.Process(pid)
+        proc.kill()
+        proc.wait()
+
+
+@pytest.fixture
+def restarter():
+    restarter = McpRestarter(ProcessControl(), lambda spec: {}, stop_grace=1, settle_time=0.3, ready_timeout=5)
+    yield restarter
+    kill_spawned(restarter)
+
+
+def test_servers_restart_in_parallel(restarter):
+    specs = [spec('alpha', url=URL), spec('beta', url=URL), spec('gamma', url=URL)]
+    job = restarter.submit(specs)
+    assert job.wait(10)
+    result = job.to_dict()
+
+    assert result['ready'] == 3
+    assert {server['status'] for server in result['servers']} == {'ready'}
+    # 每个服务至少等待稳定期，并行时总耗时接近最慢的服务而不是三者之和
+    assert result['slowest_ms'] >= 300
+    assert result['duration_ms'] < result['sum_ms']
+    stats = restarter.stats()
+    assert set(stats['spawned']) == {'alpha', 'beta', 'gamma'}
+    assert stats['latency']['alpha']['count'] == 1
+
+
+def test_restart_replaces_previous_instance(restarter):
+    first = restarter.submit([spec('alpha', url=URL)])
+    first.wait(10)
+    old_pid = first.to_dict()['servers'][0]['pid']
+
+    second = restarter.submit([spec('alpha', url=URL)])
+    assert second.wait(10)
+    server = second.to_dict()['servers'][0]
+    assert server['stopped_pids'] == [old_pid]
+    assert server['stop_summary'] == {'terminated': 1}
+    assert server['status'] == 'ready' and server['pid'] != old_pid
+    assert not psutil.pid_exists(old_pid)
+    assert [job.id for job in restarter.recent()] == [second.id, first.id]
+
+
+def test_stdio_servers_are_stopped_not_respawned():
+    running = subprocess.Popen([sys.executable, '-c', STDIO_SERVER], stdin=subprocess.PIPE)
+    identity = {running.pid: psutil.Process(running.pid).create_time()}
+    try:
+        restarter = McpRestarter(ProcessControl(), lambda spec: identity, settle_time=0.1, ready_timeout=5)
+        job = restarter.submit([spec('alpha', STDIO_SERVER)])
+        assert job.wait(10)
+        assert running.poll() is not None
+        result = job.to_dict()
+        server = result['servers'][0]
+        # 没有客户端连接的stdio实例没有意义，交给MCP客户端重新启动
+        assert server['stopped_pids'] == [running.pid]
+        assert server['status'] == 'stopped' and 'pid' not in server
+        assert result['stopped'] == 1 and restarter.stats()['spawned'] == {}
+    finally:
+        if running.poll() is None:
+            running.kill()
+
+
+def test_failed_servers_are_reported(restarter):
+    job = restarter.submit([
+        spec('crashes', 'import sys; sys.exit(3)', url=URL),
+        server_spec('missing', {'command': '/nonexistent/mcp-server', 'url': URL})
+    ])
+    assert job.wait(10)
+    servers = {server['server_name']: server for server in job.to_dict()['servers']}
+    assert servers['crashes']['status'] == 'exited'
+    assert '3' in servers['crashes']['error']
+    assert servers['missing']['status'] == 'spawn_failed'
+    assert restarter.stats()['latency'] == {}
+
+
+def test_readiness_waits_for_health_endpoint(restarter):
+    ready = threading.Event()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200 if ready.is_set() else 503)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f'http://127.0.0.1:{server.server_port}/health'
+        job = restarter.submit([spec('proxy', healthEndpoint=url)])
+        assert not job.wait(0.6)
+        assert job.to_dict()['servers'][0]['status'] == 'starting'
+        ready.set()
+        assert job.wait(5)
+        assert job.to_dict()['servers'][0]['status'] == 'ready'
+    finally:
+        server.shutdown()
+
+
+def test_only_one_restart_at_a_time(restarter):
+    job = restarter.submit([spec('alpha', url=URL)])
+    with pytest.raises(RuntimeError):
+        restarter.submit([spec('beta', url=URL)])
+    job.wait(10)
+    with pytest.raises(ValueError):
+        restarter.submit([])
+
+
+def test_workers_share_spawned_instances(tmp_path):
+    # 两个工作进程中的重启器共用同一个记录文件
+    path = str(tmp_path / 'spawned.json')
+    first, second = (McpRestarter(ProcessControl(), lambda spec: {}, stop_grace=1, settle_time=0.3,
+                                  ready_timeout=5, registry=SpawnRegistry(path)) for _ in range(2))
+    try:
+        job = first.submit([spec('alpha', url=URL)])
+        with pytest.raises(RuntimeError):
+            second.submit([spec('alpha', url=URL)])
+        assert job.wait(10)
+        old_pid = job.to_dict()['servers'][0]['pid']
+
+        job = second.submit([spec('alpha', url=URL)])
+        assert job.wait(10)
+        server = job.to_dict()['servers'][0]
+        assert server['stopped_pids'] == [old_pid] and server['stop_summary'] == {'terminated': 1}
+        assert first.stats()['spawned'] == {'alpha': server['pid']}
+    finally:
+        kill_spawned(second)
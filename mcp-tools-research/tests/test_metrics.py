@@ -0,0 +1,80 @@
+"""OpenMetrics 导出测试"""
+
+from histogram import LatencyHistogram
+from metrics import MetricsResponses, OpenMetricsWriter, render_monitor_metrics
+from status_snapshot import SnapshotPublisher
+
+
+class FakeProbe:
+    def __init__(self, available, latencies):
+        self.result = {'available': available}
+        self.histogram = LatencyHistogram()
+        for latency in latencies:
+            self.histogram.observe(latency)
+
+
+def running_tool(tool_type, processes):
+    return {
+        'tool_type': tool_type,
+        'category': 'test',
+        'instance_count': len(processes),
+        'memory_mb': processes[0]['memory_mb'],
+        'processes': processes
+    }
+
+
+def test_render_monitor_metrics():
+    publisher = SnapshotPublisher()
+    snapshot = publisher.publish(
+        running_tools=[
+            running_tool('github', [
+                {'pid': 10, 'memory_mb': 1.5, 'rss_mb': 2.0, 'start_time': 900.0},
+                {'pid': 11, 'memory_mb': 1.0, 'rss_mb': 1.0, 'start_time': 950.0}
+            ]),
+            {'tool_type': 'ai-service', 'category': 'ai', 'is_ai_service': True,
+             'instance_count': 1, 'memory_mb': 0, 'processes': []}
+        ],
+        configured_tools=[{'server_name': 'github'}],
+        last_update='t'
+    )
+    scan = LatencyHistogram()
+    scan.observe(0.003)
+    text = render_monitor_metrics(snapshot, {'ai-service': FakeProbe(True, [0.002, 0.2])}, scan, now=1000.0).decode()
+    lines = text.splitlines()
+
+    assert 'mcp_monitor_tool_instances{tool="github"} 2' in lines
+    assert 'mcp_monitor_tool_rss_bytes{tool="github"} 3145728' in lines
+    assert 'mcp_monitor_process_rss_bytes{tool="github",pid="10"} 2097152' in lines
+    assert 'mcp_monitor_process_uptime_seconds{tool="github",pid="11"} 50' in lines
+    assert 'mcp_monitor_health_probe_up{service="ai-service"} 1' in lines
+    assert 'mcp_monitor_health_probe_latency_seconds_bucket{service="ai-service",le="0.0025"} 1' in lines
+    assert 'mcp_monitor_health_probe_latency_seconds_bucket{service="ai-service",le="+Inf"} 2' in lines
+    assert 'mcp_monitor_health_probe_latency_seconds_count{service="ai-service"} 2' in lines
+    assert 'mcp_monitor_scan_duration_seconds_count 1' in lines
+    assert 'mcp_monitor_snapshot_version 1' in lines
+    # AI服务没有进程，不计入工具实例
+    assert 'tool="ai-service"' not in text
+    assert lines[-1] == '# EOF'
+
+
+def test_label_values_are_escaped():
+    writer = OpenMetricsWriter(prefix='')
+    writer.gauge('x', 'help', [({'cmd': 'a "b"\\c\nd'}, 1)])
+    assert 'x{cmd="a \\"b\\"\\\\c\\nd"} 1' in writer.render().decode()
+
+
+def test_rendered_once_per_snapshot():
+    publisher = SnapshotPublisher()
+    rendered = []
+
+    def render(snapshot):
+        rendered.append(snapshot.version)
+        return b'# EOF\n'
+
+    responses = MetricsResponses(publisher, render)
+    first = responses.get()
+    assert responses.get() is first
+    publisher.publish([], [], 't')
+    second = responses.get()
+    assert second is not first and responses.get() is second
+    assert rendered == [0, 1]
@@ -0,0 +1,33 @@
+"""netlink进程事件解析测试"""
+
+import struct
+
+from proc_events import (CN_MSG, NLMSGHDR, PROC_EVENT_EXEC, PROC_EVENT_EXIT, PROC_EVENT_FORK,
+                         PROC_EVENT_HEADER, build_control_message, parse_proc_events)
+
+
+def make_event(what, payload):
+    event = PROC_EVENT_HEADER.pack(what, 0, 123456789) + payload
+    cn_msg = CN_MSG.pack(1, 1, 0, 0, len(event), 0) + event
+    return NLMSGHDR.pack(NLMSGHDR.size + len(cn_msg), 3, 0, 0, 0) + cn_msg
+
+
+def test_parse_process_level_events():
+    data = (make_event(PROC_EVENT_FORK, struct.pack('=IIII', 1, 1, 200, 200))
+            + make_event(PROC_EVENT_EXEC, struct.pack('=II', 200, 200))
+            + make_event(PROC_EVENT_EXIT, struct.pack('=IIII', 200, 200, 0, 17)))
+    assert parse_proc_events(data) == [('fork', 200), ('exec', 200), ('exit', 200)]
+
+
+def test_thread_events_are_ignored():
+    data = (make_event(PROC_EVENT_FORK, struct.pack('=IIII', 1, 1, 201, 200))
+            + make_event(PROC_EVENT_EXIT, struct.pack('=IIII', 201, 200, 0, 0)))
+    assert parse_proc_events(data) == []
+
+
+def test_control_message_layout():
+    message = build_control_message(1)
+    length, msg_type = NLMSGHDR.unpack_from(message)[:2]
+    assert length == len(message) == NLMSGHDR.size + CN_MSG.size + 4
+    assert msg_type == 3
+    assert struct.unpack_from('=I', message, NLMSGHDR.size + CN_MSG.size)[0] == 1
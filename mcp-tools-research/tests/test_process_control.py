@@ -0,0 +1,185 @@
+"""批量进程控制：同时SIGTERM，宽限期后升级为SIGKILL，按PID汇报结果"""
+
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+from process_control import ProcessControl
+
+SLEEPER = 'import time; time.sleep(60)'
+# 忽略SIGTERM，只能被SIGKILL结束
+STUBBORN = 'import signal, sys, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print(1, flush=True); time.sleep(60)'
+# 启动一个子进程后等待，用于测试 tree
+PARENT = ('import subprocess, sys, time; '
+          'child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"]); '
+          'print(child.pid, flush=True); time.sleep(60)')
+
+
+@pytest.fixture
+def spawn():
+    procs = []
+
+    def start(code):
+        proc = subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE, text=True)
+        procs.append(proc)
+        return proc
+
+    yield start
+    for proc in procs:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+def test_terminate_then_escalate_to_kill(spawn):
+    polite = spawn(SLEEPER)
+    stubborn = spawn(STUBBORN)
+    # 等信号处理函数安装好
+    stubborn.stdout.readline()
+    finished = []
+    control = ProcessControl(on_finish=finished.append)
+
+    job = control.submit([polite.pid, stubborn.pid], grace=0.5)
+    assert job.wait(10)
+    outcomes = {outcome['pid']: outcome for outcome in job.to_dict()['processes']}
+
+    assert outcomes[polite.pid]['status'] == 'terminated'
+    assert outcomes[polite.pid]['exit_code'] == -15
+    assert outcomes[stubborn.pid]['status'] == 'killed'
+    assert outcomes[stubborn.pid]['exit_code'] == -9
+    # 两个进程一起收到SIGTERM：正常进程不必等宽限期
+    assert outcomes[polite.pid]['elapsed_ms'] < 500 <= outcomes[stubborn.pid]['elapsed_ms']
+    assert finished == [job]
+    assert control.get(job.id) is job
+    assert job.to_dict()['summary'] == {'terminated': 1, 'killed': 1}
+
+
+def test_missing_and_protected_pids_are_reported(spawn):
+    proc = spawn(SLEEPER)
+    proc.kill()
+    proc.wait()
+    control = ProcessControl()
+
+    job = control.submit([proc.pid, 1, os.getpid()], grace=0)
+    assert job.wait(10)
+    statuses = {outcome['pid']: outcome['status'] for outcome in job.to_dict()['processes']}
+    assert statuses == {proc.pid: 'gone', 1: 'protected', os.getpid(): 'protected'}
+    assert psutil.pid_exists(os.getpid())
+
+
+def test_reused_pid_is_not_signalled(spawn):
+    proc = spawn(SLEEPER)
+    create_time = psutil.Process(proc.pid).create_time()
+
+    # 快照记录的创建时间与现在的进程不符：PID已被其他进程复用
+    job = ProcessControl().submit([proc.pid], grace=0, identities={proc.pid: create_time - 100})
+    assert job.wait(10)
+    assert job.to_dict()['processes'][0]['status'] == 'replaced'
+    assert proc.poll() is None
+
+    job = ProcessControl().submit([proc.pid], grace=2, identities={proc.pid: create_time})
+    assert job.wait(10)
+    assert job.to_dict()['processes'][0]['status'] == 'terminated'
+
+
+def test_submit_validates_and_retains_recent_jobs():
+    control = ProcessControl(max_jobs=2)
+    with pytest.raises(ValueError):
+        control.submit([])
+    with pytest.raises(ValueError):
+        control.submit([12345678], grace=-1)
+
+    jobs = [control.submit([1], grace=0) for _ in range(3)]
+    for job in jobs:
+        job.wait(10)
+    control.submit([1], grace=0).wait(10)
+    assert len(control.recent()) == 2
+    assert control.stats()['submitted'] == 4
+
+
+def test_terminate_endpoint_polls_job(spawn, monkeypatch):
+    pytest.importorskip('flask')
+    pytest.importorskip('flask_cors')
+    import live_monitoring_app as m
+
+    monkeypatch.setattr(m, 'monitor_started', True)
+    client = m.app.test_client()
+    proc = spawn(SLEEPER)
+
+    response = client.post('/api/processes/terminate', json={'pids': [proc.pid], 'grace': 2})
+    assert response.status_code in (200, 202)
+    location = response.headers['Location']
+    job = client.get(location + '?wait=10').get_json()['job']
+    assert job['state'] == 'done'
+    assert job['processes'][0]['status'] == 'terminated'
+    assert any(item['id'] == job['id'] for item in client.get('/api/processes/jobs').get_json()['data'])
+
+    assert client.post('/api/processes/terminate', json={'pids': ['x']}).status_code == 400
+    assert client.post('/api/processes/terminate', json={'tool_type': 'no-such-tool'}).status_code == 404
+    assert client.get('/api/processes/jobs/missing').status_code == 404
+
+
+@pytest.fixture
+def app_client(monkeypatch):
+    pytest.importorskip('flask')
+    pytest.importorskip('flask_cors')
+    import live_monitoring_app as m
+    from status_snapshot import SnapshotPublisher
+
+    publisher = SnapshotPublisher(m.render_api_payloads)
+    # 不启动后台组件，由测试直接发布快照
+    monkeypatch.setattr(m, 'monitor_started', True)
+    monkeypatch.setattr(m, 'status_publisher', publisher)
+    monkeypatch.delenv('MCP_MONITOR_PROCESS_SOURCE', raising=False)
+    return m.app.test_client(), publisher
+
+
+def publish_unit(publisher, pids):
+    """发布一个只含一个MCP服务单元的快照，单元成员为 pids"""
+    members = [[pid, psutil.Process(pid).create_time()] for pid in pids]
+    process = {'pid': pids[0], 'cmdline': 'node mcp-server', 'start_time': members[0][1],
+               'memory_mb': 1.0, 'rss_mb': 1.0, 'process_count': len(pids), 'members': members}
+    tool = {'tool_type': 'filesystem', 'name': 'Filesystem', 'category': '文件', 'status': 'running',
+            'instance_count': 1, 'total_memory_mb': 1.0, 'processes': [process], 'pid': pids[0],
+            'cmdline': process['cmdline'], 'start_time': members[0][1], 'memory_mb': 1.0}
+    publisher.publish([tool], [], '2026-10-18T10:00:00')
+
+
+def test_tree_terminates_snapshot_unit(spawn, app_client):
+    client, publisher = app_client
+    parent = spawn(PARENT)
+    child_pid = int(parent.stdout.readline())
+    publish_unit(publisher, [parent.pid, child_pid])
+
+    # 从单元中任一成员展开为整个单元
+    response = client.post('/api/processes/terminate?wait=10', json={'pids': [child_pid], 'tree': True, 'grace': 2})
+    job = response.get_json()['job']
+    assert response.status_code == 200
+    assert {outcome['pid']: outcome['status'] for outcome in job['processes']} == \
+        {parent.pid: 'terminated', child_pid: 'terminated'}
+
+
+def test_tree_ignores_protected_and_non_mcp_roots(spawn, app_client, request):
+    client, publisher = app_client
+    mcp = spawn(SLEEPER)
+    other = spawn(PARENT)
+    other_child = psutil.Process(int(other.stdout.readline()))
+    request.addfinalizer(other_child.kill)
+    publish_unit(publisher, [mcp.pid])
+
+    for pids in ([1], [os.getpid()], [other.pid]):
+        response = client.post('/api/processes/terminate?wait=10', json={'pids': pids, 'tree': True})
+        assert response.status_code == 404
+        assert response.get_json()['ignored'] == pids
+    assert other.poll() is None and other_child.is_running() and mcp.poll() is None
+
+    # 混合请求只处理MCP单元，其余PID原样报告为 ignored
+    response = client.post('/api/processes/terminate?wait=10', json={'pids': [1, other.pid, mcp.pid], 'tree': True})
+    body = response.get_json()
+    assert [outcome['pid'] for outcome in body['job']['processes']] == [mcp.pid]
+    assert body['ignored'] == sorted([1, other.pid])
+    assert other.poll() is None
@@ -0,0 +1,151 @@
+"""增量进程扫描器回归测试"""
+
+from process_scanner import ProcessScanner
+from process_sources import ProcessGone
+
+
+class FakeProcessSource:
+    """可控的进程数据源，记录各类读取次数"""
+
+    def __init__(self):
+        # pid -> {'ppid', 'hint', 'create_time', 'cmdline', 'rss', 'cpu_time'}
+        self.table = {}
+        self.cmdline_reads = 0
+        self.create_time_reads = 0
+
+    def add(self, pid, create_time, cmdline, hint=None, rss=1024, ppid=1):
+        self.table[pid] = {
+            'ppid': ppid,
+            'hint': create_time if hint is None else hint,
+            'create_time': create_time,
+            'cmdline': cmdline,
+            'rss': rss,
+            'cpu_time': 0.0
+        }
+
+    def iter_processes(self):
+        for pid, proc in list(self.table.items()):
+            yield pid, proc['hint']
+
+    def _get(self, pid):
+        if pid not in self.table:
+            raise ProcessGone(pid)
+        return self.table[pid]
+
+    def read_cmdline(self, pid):
+        self.cmdline_reads += 1
+        return self._get(pid)['cmdline']
+
+    def read_identity(self, pid):
+        self.create_time_reads += 1
+        proc = self._get(pid)
+        if proc['create_time'] is None:
+            # 模拟无权读取
+            return None
+        return proc['create_time'], proc['ppid']
+
+    def read_usage(self, pid):
+        proc = self._get(pid)
+        return proc['rss'], proc['cpu_time']
+
+
+def classify(cmdline):
+    return 'mcp-server-github' if 'github' in cmdline else None
+
+
+def test_known_process_is_not_reclassified():
+    source = FakeProcessSource()
+    source.add(100, 1000.0, 'npx mcp-server-github')
+    scanner = ProcessScanner(classify, source)
+
+    assert [r.pid for r in scanner.scan()] == [100]
+    source.table[100]['rss'] = 4096
+    records = scanner.scan()
+    assert [(r.pid, r.rss) for r in records] == [(100, 4096)]
+    assert source.cmdline_reads == 1
+    assert source.create_time_reads == 1
+
+
+def test_restarted_pid_gets_new_cache_key():
+    source = FakeProcessSource()
+    source.add(100, 1000.0, 'npx mcp-server-github')
+    scanner = ProcessScanner(classify, source)
+    assert scanner.scan()[0].create_time == 1000.0
+
+    # 同一PID被复用为非MCP进程：create_time不同，必须重新分类
+    source.add(100, 2000.0, 'bash')
+    assert scanner.scan() == []
+    assert scanner.cache_size() == 1
+    assert source.cmdline_reads == 2
+
+
+def test_changed_hint_with_same_create_time_is_not_reclassified():
+    # /proc 目录项inode在dentry缓存回收后会变化，但进程并没有变
+    source = FakeProcessSource()
+    source.add(100, 1000.0, 'npx mcp-server-github', hint=11)
+    scanner = ProcessScanner(classify, source)
+    scanner.scan()
+
+    source.table[100]['hint'] = 12
+    assert [r.pid for r in scanner.scan()] == [100]
+    assert source.create_time_reads == 2
+    assert source.cmdline_reads == 1
+
+
+def test_process_without_create_time_is_skipped():
+    source = FakeProcessSource()
+    source.add(100, None, 'npx mcp-server-github', hint=1)
+    scanner = ProcessScanner(classify, source)
+    assert scanner.scan() == []
+
+
+def test_exited_process_is_dropped():
+    source = FakeProcessSource()
+    source.add(100, 1000.0, 'npx mcp-server-github')
+    scanner = ProcessScanner(classify, source)
+    scanner.scan()
+
+    del source.table[100]
+    assert scanner.scan() == []
+    assert scanner.cache_size() == 0
+
+
+def test_wrapper_and_descendants_form_one_unit():
+    source = FakeProcessSource()
+    source.add(100, 1000.0, 'npx mcp-server-github', rss=10)
+    source.add(101, 1001.0, 'sh -c node', ppid=100, rss=1)
+    source.add(102, 1002.0, 'node mcp-server-github/dist/index.js', ppid=101, rss=100)
+    source.add(103, 1003.0, 'node worker.js', ppid=102, rss=5)
+    source.add(200, 1000.0, 'npx mcp-server-github', rss=20)
+    # PID 300 的父进程PID已被更晚启动的进程复用，不能算作后代
+    source.add(300, 900.0, 'helper', ppid=200, rss=7)
+    scanner = ProcessScanner(classify, source)
+
+    assert sorted(r.pid for r in scanner.scan()) == [100, 102, 200]
+    units = sorted(scanner.units(), key=lambda unit: unit.pid)
+    assert [unit.pid for unit in units] == [100, 200]
+    assert [m.pid for m in units[0].members] == [100, 101, 102, 103]
+    assert units[0].rss == 116
+    assert units[0].tool_type == 'mcp-server-github'
+    assert [m.pid for m in units[1].members] == [200]
+
+    # 后代进程退出后从单元中移除
+    del source.table[103]
+    scanner.scan()
+    assert sorted(scanner.units(), key=lambda unit: unit.pid)[0].rss == 111
+
+
+def test_last_scan_reports_counts_and_phases():
+    source = FakeProcessSource()
+    source.add(100, 1000.0, 'npx mcp-server-github')
+    source.add(101, 1001.0, 'node child', ppid=100)
+    source.add(200, 1000.0, 'bash')
+    scanner = ProcessScanner(classify, source)
+
+    scanner.scan()
+    stats = scanner.last_scan
+    assert (stats['visited'], stats['matched'], stats['classified']) == (3, 1, 3)
+    assert all(stats[phase] >= 0 for phase in ('enumerate', 'classify', 'usage', 'tree', 'footprint'))
+
+    scanner.scan()
+    assert (scanner.last_scan['visited'], scanner.last_scan['classified']) == (3, 0)
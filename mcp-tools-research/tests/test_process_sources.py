@@ -0,0 +1,94 @@
+"""进程数据源回归测试：/proc 直读与psutil在真实进程表上结果一致"""
+
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+import process_sources
+from process_scanner import ProcessScanner
+from process_sources import ProcFSProcessSource, PsutilProcessSource
+from tool_catalog import TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS
+from tool_classifier import ToolClassifier
+
+pytestmark = pytest.mark.skipif(not ProcFSProcessSource.available(), reason='需要Linux /proc')
+
+
+@pytest.fixture
+def mcp_child():
+    """启动一个命令行带MCP关键词的子进程，保证两边都至少有一个命中"""
+    proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)', 'mcp-server-filesystem'])
+    time.sleep(0.2)
+    yield proc
+    proc.kill()
+    proc.wait()
+
+
+def scan_all(source):
+    """用"所有有命令行的进程都算命中"的分类器扫描，覆盖整张进程表"""
+    scanner = ProcessScanner(lambda cmdline: cmdline or None, source)
+    return {record.pid: record for record in scanner.scan()}
+
+
+def test_sources_agree_on_live_process_table(mcp_child):
+    classifier = ToolClassifier(TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS)
+    procfs = scan_all(ProcFSProcessSource())
+    by_psutil = scan_all(PsutilProcessSource())
+
+    # 两次扫描之间可能有进程启停，只比较两边都存在的进程
+    common = procfs.keys() & by_psutil.keys()
+    assert mcp_child.pid in common
+    assert len(common) >= 0.9 * max(len(procfs), len(by_psutil))
+
+    for pid in common:
+        a, b = procfs[pid], by_psutil[pid]
+        assert (a.pid, a.cmdline, classifier.classify(a.cmdline)) == \
+            (b.pid, b.cmdline, classifier.classify(b.cmdline))
+        assert abs(a.create_time - b.create_time) < 1.0
+        assert abs(a.rss - b.rss) <= max(4 * 1024 * 1024, 0.1 * b.rss)
+
+    assert classifier.classify(procfs[mcp_child.pid].cmdline) == 'mcp-server-filesystem'
+
+
+def test_sources_report_same_usage():
+    pid = os.getpid()
+    rss_a, cpu_a = ProcFSProcessSource().read_usage(pid)
+    rss_b, cpu_b = PsutilProcessSource().read_usage(pid)
+    assert abs(rss_a - rss_b) <= max(4 * 1024 * 1024, 0.1 * rss_b)
+    assert abs(cpu_a - cpu_b) < 0.5
+
+
+def test_procfs_permission_error_on_stat_returns_none(monkeypatch):
+    source = ProcFSProcessSource()
+
+    def deny(pid, name):
+        raise PermissionError(name)
+
+    monkeypatch.setattr(source, '_read', deny)
+    assert source.read_identity(1) is None
+    assert source.read_usage(1) is None
+    assert source.read_cmdline(1) == ''
+
+
+def test_psutil_access_denied_on_create_time_returns_none(monkeypatch):
+    source = PsutilProcessSource()
+
+    class DeniedProcess:
+        def create_time(self):
+            raise psutil.AccessDenied(1)
+
+        def ppid(self):
+            return 0
+
+    monkeypatch.setattr(source, '_get', lambda pid: DeniedProcess())
+    assert source.read_identity(1) is None
+
+
+def test_create_process_source_auto_prefers_procfs():
+    assert process_sources.create_process_source('auto').name == 'procfs'
+    assert process_sources.create_process_source('psutil').name == 'psutil'
+    with pytest.raises(ValueError):
+        process_sources.create_process_source('nope')
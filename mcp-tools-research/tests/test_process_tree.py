@@ -0,0 +1,57 @@
+"""MCP服务进程树和PSS/USS采样测试"""
+
+from process_scanner import ProcessRecord
+from process_tree import FootprintSampler, ProcessUnit
+
+
+def member(pid, rss):
+    record = ProcessRecord(pid, 1000.0 + pid, '', 'mcp-server-github')
+    record.rss = rss
+    return record
+
+
+class FootprintSource:
+    def __init__(self, footprints):
+        self.footprints = footprints
+        self.reads = []
+
+    def read_footprint(self, pid):
+        self.reads.append(pid)
+        return self.footprints.get(pid)
+
+
+def make_unit(*members):
+    unit = ProcessUnit('mcp-server-github', members[0])
+    unit.members.extend(members[1:])
+    return unit
+
+
+def test_sampler_respects_budget_and_rotates(monkeypatch):
+    source = FootprintSource({1: (50, 40), 2: (30, 20), 3: (10, 5)})
+    sampler = FootprintSampler(source, budget=0.0)
+    unit = make_unit(member(1, 100), member(2, 60), member(3, 20))
+
+    # 预算为0时每轮只测量一个成员，未测量的按RSS计入
+    sampler.sample([unit])
+    assert source.reads == [1]
+    assert (unit.pss, unit.uss, unit.footprint_complete) == (50 + 60 + 20, 40 + 60 + 20, False)
+
+    sampler.sample([unit])
+    sampler.sample([unit])
+    assert source.reads == [1, 2, 3]
+    assert (unit.pss, unit.uss, unit.footprint_complete) == (90, 65, True)
+    assert unit.memory == 90
+
+    # 最久未测量的成员优先
+    sampler.sample([unit])
+    assert source.reads[-1] == 1
+
+
+def test_denied_members_fall_back_to_rss():
+    source = FootprintSource({1: (50, 40)})
+    sampler = FootprintSampler(source, budget=1.0)
+    unit = make_unit(member(1, 100), member(2, 60))
+    sampler.sample([unit])
+    assert (unit.pss, unit.footprint_complete) == (110, False)
+    # 没有采样器时按RSS合计
+    assert make_unit(member(1, 100), member(2, 60)).memory == 160
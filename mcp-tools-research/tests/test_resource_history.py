@@ -0,0 +1,58 @@
+"""资源使用时间序列测试"""
+
+from process_scanner import ProcessRecord
+from resource_history import MetricRing, ResourceHistory, downsample
+
+
+def record(pid, tool_type, rss_mb, cpu_percent=0.0, create_time=1000.0):
+    rec = ProcessRecord(pid, create_time, 'cmd', tool_type)
+    rec.rss = int(rss_mb * 1024 * 1024)
+    rec.cpu_percent = cpu_percent
+    return rec
+
+
+def test_ring_overwrites_oldest_and_keeps_time_order():
+    ring = MetricRing(4)
+    for t in range(6):
+        ring.append(float(t), t * 10.0, 0.0, 1)
+    times, columns = ring.window(0)
+    assert list(times) == [2.0, 3.0, 4.0, 5.0]
+    assert list(columns['rss_mb']) == [20.0, 30.0, 40.0, 50.0]
+    times, columns = ring.window(3.5)
+    assert list(times) == [4.0, 5.0]
+
+
+def test_downsample_min_max_avg_per_bucket():
+    times = [0.0, 1.0, 2.0, 3.0, 7.0]
+    values = [1.0, 5.0, 3.0, 2.0, 9.0]
+    points = downsample(times, values, 0.0, 10.0, 2)
+    assert points == [
+        {'t': 0.0, 'min': 1.0, 'max': 5.0, 'avg': 2.75},
+        {'t': 5.0, 'min': 9.0, 'max': 9.0, 'avg': 9.0}
+    ]
+    # 空桶不输出
+    assert downsample(times, values, 0.0, 10.0, 10)[-1] == {'t': 7.0, 'min': 9.0, 'max': 9.0, 'avg': 9.0}
+
+
+def test_history_aggregates_tools_and_tracks_processes():
+    history = ResourceHistory(tool_capacity=10, process_capacity=10, min_interval=1.0, process_retention=5)
+    history.record([record(1, 'github', 10), record(2, 'github', 20, cpu_percent=50)], now=100.0)
+    # 间隔不足 min_interval 的采样被跳过
+    assert history.record([record(1, 'github', 99)], now=100.5) is False
+    history.record([record(1, 'github', 12)], now=101.0)
+    history.record([], now=102.0)
+
+    result = history.query(tool='github', window=10, points=20, now=102.0)
+    assert result['samples'] == 3
+    assert [p['avg'] for p in result['series']['rss_mb']] == [30.0, 12.0, 0.0]
+    assert [p['avg'] for p in result['series']['instance_count']] == [2.0, 1.0, 0.0]
+    assert [p['avg'] for p in result['series']['cpu_percent']] == [50.0, 0.0, 0.0]
+
+    process = history.query(pid=2, window=10, points=10, now=102.0)
+    assert process['tool'] == 'github' and process['samples'] == 1
+    assert history.query(tool='nope', now=102.0) is None
+
+    # 已退出进程的序列超过保留时长后被丢弃
+    history.record([], now=110.0)
+    assert history.query(pid=2, window=10, now=110.0) is None
+    assert history.tools() == ['github']
@@ -0,0 +1,38 @@
+"""扫描循环自测量测试"""
+
+from scan_profiler import SCAN_PHASES, PhaseTimer, ScanProfiler
+
+
+def test_timer_laps_feed_phase_histograms():
+    profiler = ScanProfiler()
+    for _ in range(3):
+        timer = profiler.timer()
+        timer.lap('scan')
+        timer.lap('publish')
+        assert timer.finish() >= 0
+
+    report = profiler.report()['phases']
+    assert report['scan']['count'] == 3
+    assert report['tick']['count'] == 3
+    assert report['health']['count'] == 0 and report['health']['p50_ms'] is None
+    assert set(report['publish']) == {'count', 'avg_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'}
+
+
+def test_record_scan_keeps_last_and_average_counts():
+    profiler = ScanProfiler()
+    for visited, matched in ((100, 2), (300, 4)):
+        stats = dict.fromkeys(SCAN_PHASES, 0.001)
+        stats.update(visited=visited, matched=matched, classified=visited)
+        profiler.record_scan(stats)
+
+    processes = profiler.report()['processes']
+    assert processes['scans'] == 2
+    assert processes['last'] == {'visited': 300, 'matched': 4, 'classified': 300}
+    assert processes['avg'] == {'visited': 200.0, 'matched': 3.0, 'classified': 200.0}
+    assert profiler.report()['phases']['enumerate']['max_ms'] == 1.0
+
+
+def test_timer_without_profiler_records_nothing():
+    timer = PhaseTimer()
+    timer.lap('scan')
+    assert timer.finish() >= 0
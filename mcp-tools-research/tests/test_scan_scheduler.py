@@ -0,0 +1,68 @@
+"""自适应扫描调度测试"""
+
+from scan_scheduler import AdaptiveScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(**kwargs):
+    clock = FakeClock()
+    options = dict(min_interval=0.5, base_interval=3, idle_interval=30, cpu_budget=0.05,
+                   boost_duration=10, client_idle_after=60, clock=clock)
+    options.update(kwargs)
+    return AdaptiveScheduler(**options), clock
+
+
+def test_idle_until_clients_appear():
+    scheduler, clock = make_scheduler()
+    scheduler.record_scan(0.001, 0.002, churned=True)
+    # 第一轮扫描不算进程变动
+    assert scheduler.next_interval() == 30
+    assert scheduler.reason == 'idle'
+
+    # 从长间隔恢复时要求立即唤醒扫描
+    assert scheduler.note_client() is True
+    assert scheduler.next_interval() == 3
+    assert scheduler.note_client() is False
+
+    clock.now += 61
+    assert scheduler.next_interval() == 30
+
+
+def test_churn_and_config_change_tighten_interval():
+    scheduler, clock = make_scheduler()
+    scheduler.record_scan(0.001, 0.002, churned=False)
+    scheduler.record_scan(0.001, 0.002, churned=True)
+    assert scheduler.next_interval() == 0.5
+    assert scheduler.reason == 'churn'
+
+    clock.now += 11
+    assert scheduler.next_interval() == 30
+
+    scheduler.boost('config-change')
+    assert scheduler.next_interval() == 0.5
+    assert scheduler.reason == 'config-change'
+
+
+def test_cpu_budget_limits_scan_rate():
+    scheduler, clock = make_scheduler(cpu_budget=0.1)
+    scheduler.boost('churn')
+    # 每轮扫描耗CPU 0.2秒，10%预算要求间隔至少1.8秒
+    scheduler.record_scan(0.2, 0.25, churned=False)
+    assert abs(scheduler.next_interval() - 1.8) < 1e-9
+    assert scheduler.reason == 'cpu-budget'
+    assert scheduler.stats()['cpu_share'] == 0.1
+
+
+def test_event_mode_floor_does_not_block_boost():
+    scheduler, clock = make_scheduler()
+    scheduler.note_client()
+    assert scheduler.next_interval(floor=30) == 30
+    scheduler.boost('config-change')
+    assert scheduler.next_interval(floor=30) == 0.5
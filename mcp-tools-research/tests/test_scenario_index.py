@@ -0,0 +1,57 @@
+"""MCP场景索引测试"""
+
+import json
+import os
+
+from scenario_index import CUSTOM_SCENARIO, MISSING_SCENARIO, ScenarioIndex, config_fingerprint
+
+
+def write(path, data, indent=None):
+    path.write_text(json.dumps(data, indent=indent))
+
+
+def test_fingerprint_ignores_formatting_and_key_order():
+    a = b'{"mcpServers": {"a": {"command": "npx", "args": ["x"]}}}'
+    b = b'{\n  "mcpServers": {\n    "a": {"args": ["x"], "command": "npx"}\n  }\n}\n'
+    assert config_fingerprint(a) == config_fingerprint(b)
+    assert config_fingerprint(b'{broken') != config_fingerprint(b'{broken ')
+
+
+def test_lookup_matches_scenario_by_content(tmp_path):
+    scenarios = tmp_path / 'mcp-configs'
+    scenarios.mkdir()
+    write(scenarios / 'minimal.json', {'mcpServers': {'files': {'command': 'npx'}}})
+    write(scenarios / 'web.json', {'mcpServers': {'playwright': {'command': 'npx'}}})
+    config = tmp_path / 'mcp.json'
+
+    index = ScenarioIndex(str(scenarios))
+    assert index.detect(str(config)) == MISSING_SCENARIO
+    assert index.scenarios() == ['minimal', 'web']
+
+    # 切换脚本用 cp 覆盖，格式不同也能识别
+    write(config, {'mcpServers': {'playwright': {'command': 'npx'}}}, indent=4)
+    assert index.detect(str(config)) == 'web'
+
+    write(config, {'mcpServers': {}})
+    assert index.detect(str(config)) == CUSTOM_SCENARIO
+
+
+def test_refresh_rehashes_only_changed_files(tmp_path, monkeypatch):
+    scenarios = tmp_path / 'mcp-configs'
+    scenarios.mkdir()
+    write(scenarios / 'a.json', {'a': 1})
+    write(scenarios / 'b.json', {'b': 1})
+    index = ScenarioIndex(str(scenarios))
+    assert index.refresh() is True
+
+    hashed = []
+    original = config_fingerprint
+    monkeypatch.setattr('scenario_index.config_fingerprint', lambda raw: hashed.append(raw) or original(raw))
+    assert index.refresh() is False
+    assert hashed == []
+
+    write(scenarios / 'b.json', {'b': 2, 'padding': True})
+    os.remove(scenarios / 'a.json')
+    assert index.refresh() is True
+    assert len(hashed) == 1
+    assert index.scenarios() == ['b']
@@ -0,0 +1,134 @@
+"""跨进程共享快照测试"""
+
+import os
+import threading
+import time
+import uuid
+
+import pytest
+
+from shared_snapshot import (SEQ_OFFSET, U64, SharedSnapshotReader, SharedSnapshotWriter, SnapshotMirror,
+                             decode_frame, encode_frame)
+from snapshot_delta import DeltaResponses
+from status_snapshot import CachedResponse, SnapshotPublisher
+
+
+def render(snapshot):
+    return {
+        'running-tools': {'success': True, 'data': snapshot.running_tools, 'version': snapshot.version},
+        'configured-tools': {'success': True, 'data': snapshot.configured_tools},
+        'tools-overview': {'success': True, 'data': snapshot.overview}
+    }
+
+
+def tool(tool_type, memory_mb=1.0):
+    return {'tool_type': tool_type, 'category': 'test', 'memory_mb': memory_mb,
+            'processes': [{'pid': 1, 'memory_mb': memory_mb}]}
+
+
+@pytest.fixture
+def segment():
+    writer = SharedSnapshotWriter(f'mcp-test-{os.getpid()}-{uuid.uuid4().hex[:8]}', size=1024 * 1024)
+    reader = SharedSnapshotReader(writer.name)
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def test_frame_roundtrip_keeps_bodies_and_etags():
+    publisher = SnapshotPublisher(render)
+    snapshot = publisher.publish([tool('github')], [{'server_name': 'github'}], 't1', current_scenario='dev')
+    metrics = CachedResponse('metrics', b'# EOF\n', snapshot.version, snapshot.epoch)
+
+    decoded, status = decode_frame(encode_frame(snapshot, [metrics], {'perf': {'ticks': 3}}))
+    assert decoded.version == snapshot.version and decoded.current_scenario == 'dev'
+    assert decoded.running_tools == snapshot.running_tools
+    assert decoded.overview == snapshot.overview
+    for name, cached in snapshot.responses.items():
+        assert decoded.responses[name].body == cached.body
+        assert decoded.responses[name].etag == cached.etag
+    assert decoded.responses['metrics'].body == b'# EOF\n'
+    assert status == {'perf': {'ticks': 3}}
+
+
+def test_reader_sees_only_complete_frames(segment):
+    writer, reader = segment
+    assert reader.read() is None
+    writer.write(b'first')
+    seq, frame = reader.read()
+    assert frame == b'first'
+    assert reader.read(seq) is None
+
+    # 模拟写入进行中（序号为奇数）：读者放弃并返回None，而不是读到半帧
+    U64.pack_into(writer.shm.buf, SEQ_OFFSET, writer.seq + 1)
+    assert reader.read(seq) is None
+    assert reader.retries > 0
+    U64.pack_into(writer.shm.buf, SEQ_OFFSET, writer.seq)
+
+    writer.write(b'second frame')
+    assert reader.read(seq)[1] == b'second frame'
+    assert not writer.write(b'x' * writer.capacity + b'x')
+
+
+def test_mirror_serves_published_snapshots(segment):
+    writer, reader = segment
+    publisher = SnapshotPublisher(render, on_publish=lambda snapshot: writer.write(encode_frame(snapshot)))
+    mirror = SnapshotMirror(reader, render)
+    # 第一帧之前是空快照，响应齐全
+    assert set(mirror.current.responses) == {'running-tools', 'configured-tools', 'tools-overview'}
+
+    publisher.publish([tool('github'), tool('hotnews')], [], 't1')
+    assert mirror.current.version == 1
+    assert mirror.current is mirror.current
+    assert mirror.decodes == 1
+
+    publisher.publish([tool('github', memory_mb=5.0)], [], 't2')
+    assert mirror.wait_for_newer(1, 1.0).version == 2
+    assert mirror.wait_for_newer(2, 0.01) is None
+
+    # 增量响应与单进程模式下一致
+    delta = DeltaResponses(mirror).get(1)
+    assert delta.body == DeltaResponses(publisher).get(1).body
+    mirror.close()
+
+
+def test_worker_client_activity_reaches_scanner(segment):
+    writer, reader = segment
+    assert writer.last_client() == 0.0
+    reader.note_client(now=100.0)
+    reader.note_client(now=100.5)
+    assert writer.last_client() == 100.0
+    reader.note_client(now=101.0)
+    assert writer.last_client() == 101.0
+
+
+def test_one_poller_wakes_all_stream_subscribers(segment):
+    writer, reader = segment
+    publisher = SnapshotPublisher(render, on_publish=lambda snapshot: writer.write(encode_frame(snapshot)))
+    mirror = SnapshotMirror(reader, render)
+    publisher.publish([tool('github')], [], 't1')
+    assert mirror.current.version == 1
+
+    woken = []
+    waiters = [threading.Thread(target=lambda: woken.append(mirror.wait_for_newer(1, 5.0))) for _ in range(5)]
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.1)
+    started = time.monotonic()
+    publisher.publish([tool('github', memory_mb=5.0)], [], 't2')
+    for waiter in waiters:
+        waiter.join()
+
+    assert [snapshot.version for snapshot in woken] == [2] * 5
+    assert time.monotonic() - started < 1.0
+    # 每个工作进程只有一个轮询线程，而不是每个订阅者各自轮询
+    assert [t.name for t in threading.enumerate()].count('snapshot-mirror') == 1
+    assert mirror.decodes == 2
+    mirror.close()
+
+
+def test_frame_carries_scenario_index_version():
+    publisher = SnapshotPublisher(render)
+    snapshot = publisher.publish([], [], 't1', scenario_version=3)
+    decoded, _ = decode_frame(encode_frame(snapshot))
+    assert decoded.scenario_version == 3
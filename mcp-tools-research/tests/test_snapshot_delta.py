@@ -0,0 +1,113 @@
+"""运行工具增量响应测试"""
+
+import json
+
+from snapshot_delta import DeltaResponses, apply_delta, diff_tools, tool_key
+from status_snapshot import SnapshotPublisher
+
+
+def process(pid, memory_mb=1.0):
+    return {'pid': pid, 'cmdline': f'node mcp-{pid}', 'running_time': '0:00:01', 'memory_mb': memory_mb}
+
+
+def tool(tool_type, processes, **fields):
+    entry = {
+        'tool_type': tool_type,
+        'name': tool_type,
+        'category': 'test',
+        'memory_mb': 1.0,
+        'functions': ['a', 'b', 'c'],
+        'instance_count': len(processes),
+        'processes': processes
+    }
+    entry.update(fields)
+    return entry
+
+
+def by_key(tools):
+    return {tool_key(tool): tool for tool in tools}
+
+
+def test_diff_sends_only_changed_fields_and_processes():
+    old = [
+        tool('github', [process(1), process(2)]),
+        tool('hotnews', [process(3)]),
+        tool('filesystem', [process(4)])
+    ]
+    new = [
+        tool('github', [process(1, memory_mb=5.0), process(5)], instance_count=2),
+        tool('filesystem', [process(4)]),
+        tool('playwright', [process(6)])
+    ]
+    delta = diff_tools(old, new)
+
+    assert [t['tool_type'] for t in delta['added']] == ['playwright']
+    assert delta['removed'] == ['hotnews']
+    assert len(delta['changed']) == 1
+    github = delta['changed'][0]
+    # 功能目录等未变化的字段不下发
+    assert 'fields' not in github
+    assert github['processes'] == {'upsert': [process(1, memory_mb=5.0), process(5)], 'removed': [2]}
+
+    assert by_key(apply_delta(old, delta)) == by_key(new)
+
+
+def test_diff_reports_changed_and_removed_fields():
+    old = [tool('ai', [], status='running', error='')]
+    new = [tool('ai', [], status='stopped')]
+    delta = diff_tools(old, new)
+    assert delta['changed'] == [{'tool_type': 'ai', 'fields': {'status': 'stopped'}, 'removed_fields': ['error']}]
+    assert apply_delta(old, delta) == new
+
+
+def test_process_and_service_entries_of_same_type_round_trip():
+    # 代理进程和AI服务健康探测条目的 tool_type 相同
+    proxy = tool('ai-tools-deepseek', [process(7)])
+    service = tool('ai-tools-deepseek', [], is_ai_service=True, status='healthy', response_time=12)
+    old = [proxy, service]
+    new = [tool('ai-tools-deepseek', [process(7, memory_mb=3.0)]),
+           tool('ai-tools-deepseek', [], is_ai_service=True, status='unhealthy', response_time=0)]
+
+    delta = diff_tools(old, new)
+    assert delta['added'] == [] and delta['removed'] == []
+    assert len(delta['changed']) == 2
+    assert apply_delta(old, delta) == new
+
+    # 服务条目消失时只删除它
+    delta = diff_tools(old, [proxy])
+    assert delta['removed'] == ['ai-tools-deepseek#service']
+    assert apply_delta(old, delta) == [proxy]
+
+
+def test_delta_responses_fall_back_when_history_expired():
+    publisher = SnapshotPublisher(history_size=3)
+    deltas = DeltaResponses(publisher)
+    publisher.publish([tool('github', [process(1)])], [], None)
+    publisher.publish([tool('github', [process(1)]), tool('hotnews', [process(2)])], [], None)
+
+    cached = deltas.get(1)
+    payload = json.loads(cached.body)
+    assert payload['full'] is False
+    assert payload['since'] == 1 and payload['version'] == 2
+    assert [t['tool_type'] for t in payload['added']] == ['hotnews']
+    assert payload['changed'] == [] and payload['removed'] == []
+    # 同一个 (since, 当前版本) 复用已序列化的响应
+    assert deltas.get(1) is cached
+
+    for _ in range(3):
+        publisher.publish([], [], None)
+    assert deltas.get(1) is None
+    assert deltas.get(publisher.current.version + 1) is None
+    assert json.loads(deltas.get(publisher.current.version - 1).body)['removed'] == []
+
+
+def test_hosts_are_part_of_the_key():
+    old = [dict(tool('github', [process(1)]), host='a'), dict(tool('github', [process(1)]), host='b')]
+    new = [dict(tool('github', [process(1)]), host='a'), dict(tool('github', [process(2)]), host='b')]
+    delta = diff_tools(old, new)
+    assert delta['added'] == [] and delta['removed'] == []
+    assert [(e['host'], e['tool_type']) for e in delta['changed']] == [('b', 'github')]
+    assert by_key(apply_delta(old, delta)) == by_key(new)
+
+    delta = diff_tools(old, new[:1])
+    assert delta['removed'] == ['b/github']
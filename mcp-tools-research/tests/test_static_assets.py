@@ -0,0 +1,69 @@
+"""仪表盘静态页面：内存副本、预压缩、按文件签名重新加载"""
+
+import gzip
+import os
+
+import pytest
+
+import static_assets
+from static_assets import StaticAssets
+
+
+@pytest.fixture
+def page(tmp_path):
+    path = tmp_path / 'page.html'
+    path.write_text('<html>' + '仪表盘' * 500 + '</html>', encoding='utf-8')
+    return path
+
+
+def test_loads_once_and_precompresses(page):
+    assets = StaticAssets({'page': str(page)})
+    asset = assets.get('page', now=0)
+    assert asset.mimetype == 'text/html; charset=utf-8'
+    assert gzip.decompress(asset.variants['gzip']) == page.read_bytes()
+    assert assets.get('page', now=10) is asset
+    assert assets.loads == 1
+
+    encoding, body, etag = asset.negotiate({'gzip', 'deflate'})
+    assert encoding == 'gzip' and body == asset.variants['gzip'] and etag == asset.etag + '-gz'
+    assert asset.negotiate(()) == (None, asset.body, asset.etag)
+    if static_assets.brotli is not None:
+        assert asset.negotiate({'gzip', 'br'})[0] == 'br'
+
+
+def test_reloads_only_after_change_and_check_interval(page):
+    assets = StaticAssets({'page': str(page)}, check_interval=1.0)
+    first = assets.get('page', now=0)
+    page.write_text('<html>新版本</html>', encoding='utf-8')
+    os.utime(page, ns=(1, 1))
+    # 检查间隔内仍然返回旧的副本，不访问文件
+    assert assets.get('page', now=0.5) is first
+    second = assets.get('page', now=1.5)
+    assert second is not first and second.body == '<html>新版本</html>'.encode()
+    assert second.etag != first.etag
+
+
+def test_missing_file_keeps_last_copy(page, tmp_path):
+    assets = StaticAssets({'page': str(page), 'absent': str(tmp_path / 'absent.html')}, check_interval=0)
+    assert assets.get('absent') is None
+    first = assets.get('page')
+    page.unlink()
+    assert assets.get('page') is first
+
+
+def test_dashboard_route_revalidates_with_304(monkeypatch):
+    pytest.importorskip('flask')
+    pytest.importorskip('flask_cors')
+    import live_monitoring_app as m
+
+    monkeypatch.setattr(m, 'monitor_started', True)
+    client = m.app.test_client()
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    etag = response.headers['ETag']
+
+    repeat = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert repeat.status_code == 304 and repeat.data == b''
+    assert client.get('/standalone').status_code == 200
@@ -0,0 +1,80 @@
+"""状态快照测试"""
+
+import dataclasses
+import threading
+
+import pytest
+
+from status_snapshot import SnapshotPublisher
+
+
+def tool(category, memory_mb):
+    return {'category': category, 'memory_mb': memory_mb}
+
+
+def test_publish_bumps_version_and_precomputes_overview():
+    publisher = SnapshotPublisher()
+    assert publisher.current.version == 0
+
+    first = publisher.publish([tool('文件系统', 10.0), tool('文件系统', 2.5)], [{}], '2026-01-01T00:00:00')
+    assert first.version == 1
+    assert first.overview['categories'] == {'文件系统': {'running': 2, 'total': 2}}
+    assert first.overview['total_memory_mb'] == 12.5
+    assert first.overview['configured_count'] == 1
+    assert first.overview['system_health'] == 'healthy'
+
+    second = publisher.publish([], [], '2026-01-01T00:00:03')
+    assert second.version == 2
+    assert publisher.current is second
+    # 已发布的旧快照保持不变
+    assert len(first.running_tools) == 2
+    assert second.overview['system_health'] == 'warning'
+
+
+def test_snapshot_is_immutable():
+    snapshot = SnapshotPublisher().publish([], [], None)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.version = 99
+    assert isinstance(snapshot.running_tools, tuple)
+
+
+def render(snapshot):
+    return {
+        'running': {'data': snapshot.running_tools, 'version': snapshot.version},
+        'configured': {'data': snapshot.configured_tools}
+    }
+
+
+def test_responses_serialized_once_and_reused_when_unchanged():
+    publisher = SnapshotPublisher(render)
+    first = publisher.publish([tool('文件系统', 1.0)], [{'name': 'files'}], None)
+    second = publisher.publish([tool('文件系统', 2.0)], [{'name': 'files'}], None)
+
+    assert second.responses['configured'] is first.responses['configured']
+    assert second.responses['configured'].etag.endswith('-1')
+    assert second.responses['running'].etag != first.responses['running'].etag
+    assert b'"version":2' in second.responses['running'].body
+
+
+def test_gzip_body_cached_and_skipped_for_small_payloads():
+    publisher = SnapshotPublisher(render)
+    snapshot = publisher.publish([tool('文件系统' * 200, 1.0)], [], None)
+    large = snapshot.responses['running']
+    assert large.gzip_body is large.gzip_body
+    assert len(large.gzip_body) < len(large.body)
+    assert snapshot.responses['configured'].gzip_body is None
+
+
+def test_wait_for_newer_wakes_on_publish():
+    publisher = SnapshotPublisher()
+    assert publisher.wait_for_newer(0, timeout=0.01) is None
+
+    published = []
+    timer = threading.Timer(0.05, lambda: published.append(publisher.publish([], [], None)))
+    timer.start()
+    snapshot = publisher.wait_for_newer(0, timeout=5)
+    timer.join()
+    assert snapshot is published[0]
+    assert snapshot.version == 1
+    # 已有更新的快照时立即返回
+    assert publisher.wait_for_newer(0, timeout=5) is snapshot
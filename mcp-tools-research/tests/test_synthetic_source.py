@@ -0,0 +1,71 @@
+"""合成进程数据源：可复现、有进程树和进程更替，能直接交给 ProcessScanner 扫描"""
+
+import pytest
+
+import process_sources
+from process_scanner import ProcessScanner
+from running_tools import aggregate_units
+from synthetic_source import INIT_PID, SyntheticProcessSource
+from tool_catalog import TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS
+from tool_classifier import ToolClassifier
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return ToolClassifier(TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS)
+
+
+def test_same_seed_same_table():
+    a = SyntheticProcessSource(processes=500, mcp_ratio=0.1, seed=7)
+    b = SyntheticProcessSource(processes=500, mcp_ratio=0.1, seed=7)
+    assert len(a) >= 500
+    assert [(pid, a.read_cmdline(pid), a.read_identity(pid)) for pid, _ in a.iter_processes()] == \
+           [(pid, b.read_cmdline(pid), b.read_identity(pid)) for pid, _ in b.iter_processes()]
+
+
+def test_mcp_flags_agree_with_classifier(classifier):
+    source = SyntheticProcessSource(processes=2000, mcp_ratio=0.2, seed=1)
+    flagged = [pid for pid, _ in source.iter_processes() if classifier.classify(source.read_cmdline(pid))]
+    assert len(flagged) == source.mcp_count() > 0
+
+
+def test_scanner_groups_service_trees_into_units(classifier):
+    source = SyntheticProcessSource(processes=2000, mcp_ratio=0.2, seed=3)
+    scanner = ProcessScanner(classifier.classify, source)
+    records = scanner.scan()
+    assert len(records) == source.mcp_count()
+    units = scanner.units()
+    # npx -> node 的同类嵌套合并为一个单元，渲染进程等非MCP后代计入单元
+    assert len(units) < len(records)
+    assert max(len(unit.members) for unit in units) > 2
+
+    tools = aggregate_units(units)
+    assert sum(tool['instance_count'] for tool in tools) == len(units)
+    assert {tool['tool_type'] for tool in tools} <= set(TOOL_MAPPING)
+
+
+def test_churn_replaces_processes_and_reparents_orphans(classifier):
+    source = SyntheticProcessSource(processes=1000, mcp_ratio=0.05, churn=0.05, seed=5)
+    scanner = ProcessScanner(classifier.classify, source)
+    scanner.scan()
+    before = set(source.pids())
+    scanner.scan()
+    after = set(source.pids())
+
+    assert source.exited >= 100
+    assert len(after) >= 1000 and before != after
+    # 新进程只需分类一次：稳态一轮的分类次数约等于更替的进程数
+    assert 0 < scanner.last_scan['classified'] <= len(after - before) + 100
+    assert scanner.last_scan['matched'] == source.mcp_count()
+    for pid in after:
+        ppid = source.read_identity(pid)[1]
+        assert ppid == INIT_PID or ppid in after
+
+
+def test_create_process_source_parses_synthetic_spec():
+    source = process_sources.create_process_source('synthetic:processes=50,mcp_ratio=0.5,churn=0.1,seed=3')
+    assert source.name == 'synthetic'
+    assert len(source) >= 50
+    assert source.churn == 0.1
+    with pytest.raises(ValueError):
+        process_sources.create_process_source('synthetic:threads=4')
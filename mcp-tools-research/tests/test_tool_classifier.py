@@ -0,0 +1,58 @@
+"""工具分类器回归测试：优先级与旧版逐关键词匹配保持一致"""
+
+import pytest
+
+from tool_catalog import TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS
+from tool_classifier import ToolClassifier
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return ToolClassifier(TOOL_MAPPING, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS)
+
+
+@pytest.mark.parametrize('cmdline, expected', [
+    # 映射表键优先于额外规则
+    ('node /x/mcp-server-github/index.js', 'mcp-server-github'),
+    ('npx -y @modelcontextprotocol/server-github', 'mcp-server-github'),
+    # 映射表内部按声明顺序：github键先于playwright键
+    ('node playwright-mcp-server-github', 'mcp-server-github'),
+    ('node /x/playwright-mcp-server/dist/index.js', 'playwright-mcp-server'),
+    ('node playwright --mcp', 'playwright-mcp-server'),
+    # 额外规则按顺序：github 先于 filesystem
+    ('node filesystem-mcp github', 'mcp-server-github'),
+    ('NODE /X/MCP-SERVER-FILESYSTEM /tmp', 'mcp-server-filesystem'),
+    ('node /x/mcp-server-hotnews/build/index.js', 'mcp-server-hotnews'),
+    # AI工具: ai-tools + deepseek 与单独的 ai-tools 都归类为deepseek
+    ('node /Users/dev/mcp-ai-tools/deepseek-server-proxy.js', 'ai-tools-deepseek'),
+    ('node /Users/dev/mcp-ai-tools/gemini-server-proxy.js', 'ai-tools-deepseek'),
+    ('node /Users/dev/mcp-ai-tools/image-generation-simple.js', 'ai-tools-deepseek'),
+    ('node /Users/dev/ai-tools-deepseek/server.js --mcp', 'ai-tools-deepseek'),
+    ('npx -y @wonderwhy-er/desktop-commander --mcp', 'desktop-commander'),
+    ('node /opt/mcp/some-other-server.js', 'unknown'),
+])
+def test_classify_priority(classifier, cmdline, expected):
+    assert classifier.classify(cmdline) == expected
+    assert classifier.detect(cmdline) == expected
+
+
+@pytest.mark.parametrize('cmdline', [
+    '/usr/lib/systemd/systemd-journald',
+    'node /x/filesystem-watcher.js',
+    'python3 deepseek_client.py',
+    '',
+])
+def test_non_mcp_processes_are_filtered(classifier, cmdline):
+    assert classifier.classify(cmdline) is None
+
+
+def test_detect_without_prefilter(classifier):
+    assert classifier.detect('node /x/filesystem-watcher.js') == 'mcp-server-filesystem'
+    assert classifier.detect('bash') == 'unknown'
+
+
+def test_new_catalog_entries_are_included():
+    catalog = dict(TOOL_MAPPING)
+    catalog['mcp-server-slack'] = {}
+    classifier = ToolClassifier(catalog, TOOL_PATTERN_RULES, MCP_PROCESS_KEYWORDS)
+    assert classifier.classify('npx mcp-server-slack') == 'mcp-server-slack'
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+MCP工具目录
+工具映射表和进程匹配规则，供监控后端和分类器共用
+"""
+
+# 工具映射表
+TOOL_MAPPING = {
+    'mcp-server-filesystem': {
+        'name': 'Files工具',
+        'category': '文件系统',
+        'description': '完整的文件系统操作工具集',
+        'icon': 'fas fa-folder',
+        'color': '#67c23a',
+        'functions': [
+            {'name': 'read_file', 'desc': '读取文件内容'},
+            {'name': 'write_file', 'desc': '写入文件内容'},
+            {'name': 'create_directory', 'desc': '创建目录'},
+            {'name': 'list_directory', 'desc': '列出目录内容'},
+            {'name': 'move_file', 'desc': '移动/重命名文件'},
+            {'name': 'search_files', 'desc': '搜索文件'},
+            {'name': 'get_file_info', 'desc': '获取文件信息'},
+            {'name': 'directory_tree', 'desc': '获取目录树结构'},
+            {'name': 'read_multiple_files', 'desc': '批量读取文件'},
+            {'name': 'edit_file', 'desc': '编辑文件内容'},
+            {'name': 'list_allowed_directories', 'desc': '查看允许访问的目录'}
+        ],
+        'total_functions': 11
+    },
+    'mcp-server-github': {
+        'name': 'GitHub工具',
+        'category': 'GitHub集成',
+        'description': '完整的GitHub API集成工具',
+        'icon': 'fab fa-github',
+        'color': '#24292e',
+        'functions': [
+            {'name': 'get_user_profile', 'desc': '获取用户资料'},
+            {'name': 'list_repositories', 'desc': '列出仓库'},
+            {'name': 'get_repository', 'desc': '获取仓库详情'},
+            {'name': 'list_issues', 'desc': '列出Issues'},
+            {'name': 'create_issue', 'desc': '创建Issue'},
+            {'name': 'update_issue', 'desc': '更新Issue'},
+            {'name': 'list_pull_requests', 'desc': '列出Pull Requests'},
+            {'name': 'create_pull_request', 'desc': '创建Pull Request'},
+            {'name': 'get_file_contents', 'desc': '获取文件内容'},
+            {'name': 'create_file', 'desc': '创建文件'},
+            {'name': 'update_file', 'desc': '更新文件'},
+            {'name': 'delete_file', 'desc': '删除文件'},
+            {'name': 'list_commits', 'desc': '列出提交记录'},
+            {'name': 'get_commit', 'desc': '获取提交详情'},
+            {'name': 'create_branch', 'desc': '创建分支'},
+            {'name': 'list_branches', 'desc': '列出分支'},
+            {'name': 'fork_repository', 'desc': 'Fork仓库'},
+            {'name': 'star_repository', 'desc': '标星仓库'},
+            {'name': 'search_repositories', 'desc': '搜索仓库'},
+            {'name': 'search_users', 'desc': '搜索用户'},
+            {'name': 'search_issues', 'desc': '搜索Issues'},
+            {'name': 'get_workflow_runs', 'desc': '获取工作流运行'},
+            {'name': 'list_releases', 'desc': '列出发布版本'},
+            {'name': 'create_release', 'desc': '创建发布版本'},
+            {'name': 'list_collaborators', 'desc': '列出协作者'},
+            {'name': 'manage_webhooks', 'desc': '管理Webhooks'}
+        ],
+        'total_functions': 26
+    },
+    'playwright-mcp-server': {
+        'name': 'Playwright工具',
+        'category': '网页自动化',
+        'description': '强大的网页自动化和测试工具',
+        'icon': 'fas fa-robot',
+        'color': '#e67e22',
+        'functions': [
+            {'name': 'navigate', 'desc': '导航到URL'},
+            {'name': 'click', 'desc': '点击元素'},
+            {'name': 'fill', 'desc': '填写表单'},
+            {'name': 'type', 'desc': '输入文本'},
+            {'name': 'screenshot', 'desc': '页面截图'},
+            {'name': 'get_text', 'desc': '获取文本内容'},
+            {'name': 'get_html', 'desc': '获取HTML内容'},
+            {'name': 'wait_for_element', 'desc': '等待元素出现'},
+            {'name': 'select_option', 'desc': '选择下拉选项'},
+            {'name': 'upload_file', 'desc': '上传文件'},
+            {'name': 'download_file', 'desc': '下载文件'},
+            {'name': 'execute_script', 'desc': '执行JavaScript'},
+            {'name': 'scroll', 'desc': '页面滚动'},
+            {'name': 'hover', 'desc': '鼠标悬停'},
+            {'name': 'drag_and_drop', 'desc': '拖拽操作'},
+            {'name': 'press_key', 'desc': '键盘按键'},
+            {'name': 'go_back', 'desc': '后退'},
+            {'name': 'go_forward', 'desc': '前进'},
+            {'name': 'reload', 'desc': '刷新页面'},
+            {'name': 'set_viewport', 'desc': '设置视窗大小'},
+            {'name': 'get_cookies', 'desc': '获取Cookies'},
+            {'name': 'set_cookies', 'desc': '设置Cookies'},
+            {'name': 'intercept_requests', 'desc': '拦截请求'},
+            {'name': 'mock_responses', 'desc': '模拟响应'},
+            {'name': 'pdf_export', 'desc': '导出PDF'},
+            {'name': 'performance_metrics', 'desc': '性能指标'},
+            {'name': 'network_monitoring', 'desc': '网络监控'},
+            {'name': 'console_logs', 'desc': '控制台日志'},
+            {'name': 'iframe_operations', 'desc': 'iframe操作'},
+            {'name': 'mobile_simulation', 'desc': '移动设备模拟'},
+            {'name': 'accessibility_testing', 'desc': '无障碍测试'},
+            {'name': 'visual_testing', 'desc': '视觉回归测试'}
+        ],
+        'total_functions': 32
+    },
+    'mcp-server-hotnews': {
+        'name': 'HotNews工具',
+        'category': '数据获取',
+        'description': '实时热点新闻数据抓取工具',
+        'icon': 'fas fa-newspaper',
+        'color': '#f39c12',
+        'functions': [
+            {'name': 'get_hot_news', 'desc': '获取热点新闻列表 (支持多平台)'}
+        ],
+        'platforms': [
+            {'name': '知乎热榜', 'id': 1},
+            {'name': '36氪热榜', 'id': 2}, 
+            {'name': '百度热点', 'id': 3},
+            {'name': 'B站热榜', 'id': 4},
+            {'name': '微博热搜', 'id': 5},
+            {'name': '抖音热点', 'id': 6},
+            {'name': '虎扑热榜', 'id': 7},
+            {'name': '豆瓣热榜', 'id': 8},
+            {'name': 'IT新闻', 'id': 9}
+        ],
+        'total_functions': 1
+    },
+    'desktop-commander': {
+        'name': 'Desktop Commander',
+        'category': '系统控制',
+        'description': '桌面应用控制和系统监控工具',
+        'icon': 'fas fa-desktop',
+        'color': '#9b59b6',
+        'functions': [
+            {'name': 'list_applications', 'desc': '列出运行中的应用'},
+            {'name': 'launch_application', 'desc': '启动应用程序'},
+            {'name': 'quit_application', 'desc': '退出应用程序'},
+            {'name': 'get_system_info', 'desc': '获取系统信息'},
+            {'name': 'monitor_resources', 'desc': '监控系统资源'}
+        ],
+        'total_functions': 5
+    },
+    'ai-tools-deepseek': {
+        'name': 'AI DeepSeek工具',
+        'category': 'AI增强',
+        'description': 'DeepSeek AI智能分析工具 (支持Gemini备用)',
+        'icon': 'fas fa-brain',
+        'color': '#ff6b6b',
+        'server_port': 3001,
+        'health_endpoint': 'http://localhost:3001/health',
+        'functions': [
+            {'name': 'smart_conversation', 'desc': '智能对话交流'},
+            {'name': 'code_review', 'desc': '代码审查分析'},
+            {'name': 'readme_generation', 'desc': 'README文档生成'},
+            {'name': 'ui_feedback', 'desc': 'UI设计反馈'}
+        ],
+        'total_functions': 4,
+        'is_ai_service': True
+    }
+}
+
+# MCP相关进程的关键词预筛选
+MCP_PROCESS_KEYWORDS = ['mcp', 'playwright', 'github', 'gemini-server-proxy']
+
+# 映射表键之外的额外匹配规则，按优先级排列: (工具类型, 必须同时出现的关键词)
+TOOL_PATTERN_RULES = [
+    ('mcp-server-github', ['github']),
+    ('playwright-mcp-server', ['playwright']),
+    ('mcp-server-filesystem', ['filesystem']),
+    ('mcp-server-hotnews', ['hotnews']),
+    ('ai-tools-deepseek', ['deepseek-server-proxy']),
+    ('ai-tools-deepseek', ['gemini-server-proxy']),
+    ('ai-tools-deepseek', ['ai-tools'])  # 默认归类为deepseek工具
+]
+
+# 未在映射表中的MCP进程
+UNKNOWN_TOOL_INFO = {
+    'name': '未知工具',
+    'category': '其他',
+    'description': '检测到的MCP相关进程',
+    'icon': 'fas fa-question',
+    'color': '#95a5a6'
+}
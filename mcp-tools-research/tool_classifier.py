@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+MCP工具分类器
+根据工具映射表和额外匹配规则编译出一个前缀树形式的组合正则，
+单次扫描命令行即可找出全部关键词并按原有优先级确定工具类型
+"""
+
+import re
+
+# 关键词组合 -> 分类结果 的缓存上限
+MAX_MEMO_SIZE = 4096
+
+
+def build_trie_pattern(keywords):
+    """把关键词集合编译成前缀树形式的正则，同一位置总是命中最长的关键词"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != '']
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # 当前节点本身是关键词结尾时，后续分支可选（贪婪匹配更长的关键词）
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+def restart_offset(keyword, keywords):
+    """
+    命中keyword后下一次搜索的起始偏移：
+    若keyword的某个后缀恰好是另一个关键词的前缀（交叉重叠），需从该后缀处继续搜索，
+    否则直接跳到keyword末尾（被它完整包含的关键词已通过包含关系推出）
+    """
+    for offset in range(1, len(keyword)):
+        suffix = keyword[offset:]
+        for other in keywords:
+            if len(other) > len(suffix) and other.startswith(suffix):
+                return offset
+    return len(keyword)
+
+
+class ToolClassifier:
+    def __init__(self, catalog, pattern_rules=(), prefilter_keywords=()):
+        """
+        catalog: 工具映射表，每个键本身就是最高优先级的匹配关键词
+        pattern_rules: [(工具类型, [必须同时出现的关键词...]), ...]，按优先级排列
+        prefilter_keywords: 判定为MCP相关进程所需的关键词（任意一个）
+        """
+        # 规则顺序即优先级：先映射表键，再额外规则
+        self._rules = [(tool_key, frozenset([tool_key])) for tool_key in catalog]
+        self._rules += [(tool_type, frozenset(keywords)) for tool_type, keywords in pattern_rules]
+        self._prefilter = frozenset(prefilter_keywords)
+        # 预筛选关键词按长度升序排列，短关键词（如'mcp'）最可能先命中
+        self._prefilter_order = tuple(sorted(self._prefilter, key=lambda k: (len(k), k)))
+
+        keywords = set(self._prefilter)
+        for _, rule_keywords in self._rules:
+            keywords |= rule_keywords
+
+        self._search = re.compile(build_trie_pattern(keywords)).search
+        self._restart = {keyword: restart_offset(keyword, keywords) for keyword in keywords}
+
+        # 命中一个关键词即意味着其中包含的所有短关键词也出现了
+        self._implied = {
+            keyword: frozenset(other for other in keywords if other in keyword)
+            for keyword in keywords
+        }
+        self._memo = {}
+
+    def _scan(self, text):
+        """从左到右扫描一遍文本，返回命中的关键词序列（每个起始位置取最长）"""
+        search = self._search
+        restart = self._restart
+        matches = []
+        match = search(text)
+        while match is not None:
+            keyword = match.group()
+            matches.append(keyword)
+            match = search(text, match.start() + restart[keyword])
+        return matches
+
+    def detect(self, cmdline):
+        """检测工具类型，无法识别时返回'unknown'"""
+        return self._resolve(self._scan(cmdline.lower()))
+
+    def classify(self, cmdline):
+        """预筛选+检测工具类型，非MCP相关进程返回None"""
+        text = cmdline.lower()
+        if self._prefilter:
+            # 绝大多数进程不含任何预筛选关键词；CPython的子串查找（memchr加速）
+            # 排除它们比正则逐字符扫描更快
+            for keyword in self._prefilter_order:
+                if keyword in text:
+                    break
+            else:
+                return None
+        return self._resolve(self._scan(text))
+
+    def _resolve(self, matches):
+        """根据命中的关键词序列按优先级决定工具类型，结果按关键词组合缓存"""
+        key = tuple(matches)
+        if key in self._memo:
+            return self._memo[key]
+
+        found = set()
+        for keyword in matches:
+            found |= self._implied[keyword]
+
+        result = 'unknown'
+        for tool_type, keywords in self._rules:
+            if keywords <= found:
+                result = tool_type
+                break
+
+        if len(self._memo) < MAX_MEMO_SIZE:
+            self._memo[key] = result
+        return result